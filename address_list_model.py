@@ -0,0 +1,106 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+# 地址行的状态
+ADDRESS_STATUS_USED = "used" # 本次运行中已成功提币
+ADDRESS_STATUS_FAILED = "failed" # 最近一次提币失败或被跳过
+
+STATUS_COLORS = {
+    ADDRESS_STATUS_USED: QColor("#2ECC71"),
+    ADDRESS_STATUS_FAILED: QColor("#E74C3C"),
+}
+STATUS_TEXT = {
+    ADDRESS_STATUS_USED: "已提币",
+    ADDRESS_STATUS_FAILED: "失败",
+}
+
+
+class AddressListModel(QAbstractListModel):
+    """
+    提币地址列表的模型，配合 QListView 使用。
+
+    只保存对地址列表的引用，显示文本 (包括打码) 在 data() 中按需生成并缓存，
+    视图只为可见行调用 data()，因此行数不受限制，切换显示方式或标记状态的
+    重绘开销与可见行数成正比。
+    """
+
+    def __init__(self, mask=None, parent=None):
+        super().__init__(parent)
+        self._addresses: list[dict] = []
+        self._mask = mask or (lambda text: text)
+        self._show_full = False
+        self._display_cache: dict[int, str] = {} # 行号 -> 显示文本 (当前显示模式下)
+        self._rows_by_address: dict[str, list[int]] = {}
+        self._status: dict[str, str] = {} # 地址 -> ADDRESS_STATUS_*
+
+    # --- Qt 模型接口 ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._addresses)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._addresses):
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            text = self._display_cache.get(row)
+            if text is None:
+                text = self._format_row(row)
+                self._display_cache[row] = text
+            return text
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return STATUS_COLORS.get(self._status.get(self._addresses[row].get('address', '')))
+        if role == Qt.ItemDataRole.ToolTipRole:
+            address = self._addresses[row].get('address', '')
+            status = self._status.get(address)
+            shown = address if self._show_full else self._mask(address)
+            return f"{shown} ({STATUS_TEXT[status]})" if status else shown
+        return None
+
+    def _format_row(self, row: int) -> str:
+        item = self._addresses[row]
+        address = item.get('address') or '[地址缺失]'
+        label = item.get('label')
+        display_addr = address if self._show_full else self._mask(address)
+        text = f"{row + 1:>4}: "
+        return text + (f"{label} ({display_addr})" if label else display_addr)
+
+    # --- 供界面调用 ---
+    def set_addresses(self, addresses: list[dict], used: set | None = None):
+        """替换整个地址列表，used 中的地址标记为已提币。"""
+        self.beginResetModel()
+        self._addresses = addresses
+        self._display_cache.clear()
+        self._rows_by_address = {}
+        for row, item in enumerate(addresses):
+            self._rows_by_address.setdefault(item.get('address', ''), []).append(row)
+        self._status = {address: ADDRESS_STATUS_USED for address in (used or ()) if address in self._rows_by_address}
+        self.endResetModel()
+
+    def set_show_full(self, show_full: bool):
+        if show_full == self._show_full:
+            return
+        self._show_full = show_full
+        self._display_cache.clear()
+        if self._addresses:
+            # 视图只会重新请求可见行的数据
+            self.dataChanged.emit(self.index(0), self.index(len(self._addresses) - 1),
+                                  [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole])
+
+    def set_status(self, address: str, status: str | None):
+        """设置某个地址的状态 (None 表示清除)，只刷新对应的行。"""
+        rows = self._rows_by_address.get(address)
+        if not rows:
+            return
+        if status is None:
+            self._status.pop(address, None)
+        else:
+            self._status[address] = status
+        for row in rows:
+            model_index = self.index(row)
+            self.dataChanged.emit(model_index, model_index, [Qt.ItemDataRole.ForegroundRole, Qt.ItemDataRole.ToolTipRole])
+
+    def status_counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for status in self._status.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
@@ -0,0 +1,328 @@
+"""
+地址文件 (CSV / XLSX) 读取，不依赖任何界面代码。
+
+支持两种文件格式:
+1. 单列地址格式: 包含 'address' 和可选的 'label' 列
+2. 多列地址格式: 每列代表一种类型的地址 (EVM、SUI、SOL等)
+
+CSV 用标准库 csv 流式读取；XLSX 用 python-calamine (如已安装) 或 openpyxl 只读模式逐行读取。
+"""
+import csv
+import os
+from contextlib import contextmanager
+
+# 多列格式中，列名包含这些关键词时归入对应的地址类型
+ADDRESS_TYPE_KEYWORDS = {
+    'evm': ['evm', 'eth', 'ethereum', 'bsc', 'polygon', 'avax', 'avalanche', 'arb', 'arbitrum'],
+    'sui': ['sui'],
+    'sol': ['sol', 'solana'],
+}
+STANDARD_ADDRESS_TYPE = 'standard' # 单列格式对应的地址类型
+PROGRESS_INTERVAL_ROWS = 5000 # 读取时每隔多少行报告一次进度
+
+
+class AddressFileError(Exception):
+    """地址文件无法读取或内容无效。"""
+    pass
+
+
+class AddressTable:
+    """
+    地址文件的列式内容: 每列一个字符串列表，列名已转小写并去除首尾空格。
+
+    提取地址时直接遍历列表，不经过 DataFrame。
+    """
+
+    __slots__ = ("_columns", "row_count")
+
+    def __init__(self, columns: dict[str, list[str]], row_count: int):
+        self._columns = columns
+        self.row_count = row_count
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> list[str]:
+        return self._columns[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._columns
+
+    def __len__(self) -> int:
+        return self.row_count
+
+
+def _normalize_columns(header) -> list[str]:
+    """列名转小写并去除首尾空格；重名的列依次加 .1、.2 后缀。"""
+    names = []
+    seen: dict[str, int] = {}
+    for raw in header:
+        name = str(raw).strip().lower()
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _collect_columns(names: list[str], rows, select=None, report=None) -> AddressTable:
+    """
+    逐行把需要的列追加到各自的列表。空行跳过，缺少的字段按空字符串处理，多出的字段忽略。
+
+    Args:
+        report (callable | None): 每读取 PROGRESS_INTERVAL_ROWS 行调用一次，参数为已读取的行数。
+    """
+    keep = names if select is None else [name for name in select(names) if name in names]
+    columns = {name: [] for name in keep}
+    targets = [(names.index(name), columns[name].append) for name in keep]
+    width = max((index for index, _ in targets), default=-1) + 1
+    row_count = 0
+    for row in rows:
+        if not any(row): # 空行
+            continue
+        if len(row) < width:
+            row = list(row) + [''] * (width - len(row))
+        for index, append in targets:
+            append(row[index])
+        row_count += 1
+        if report is not None and row_count % PROGRESS_INTERVAL_ROWS == 0:
+            report(row_count)
+    return AddressTable(columns, row_count)
+
+
+def _read_csv_table(file_path: str, select=None, progress=None) -> AddressTable:
+    """用标准库 csv 逐行读取，直接追加到各列的列表，不构建整张表的中间对象。进度按字节计算。"""
+    total_bytes = os.path.getsize(file_path)
+    # utf-8-sig 兼容 Excel 导出的带 BOM 的 CSV
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise AddressFileError("文件为空，没有可导入的地址。")
+        report = None
+        if progress is not None:
+            report = lambda _rows: progress(f.buffer.tell(), total_bytes)
+        table = _collect_columns(_normalize_columns(header), reader, select, report)
+    if progress is not None:
+        progress(total_bytes, total_bytes)
+    return table
+
+
+def _excel_cell_text(value) -> str:
+    """单元格的值转为字符串；整数值不带小数点 (123.0 -> "123")，空单元格为空字符串。"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+@contextmanager
+def _open_excel_rows(file_path: str):
+    """
+    逐行读取第一个工作表，产出 (总行数或None, 行迭代器)。
+
+    安装了 python-calamine 时优先使用 (Rust 实现，比 openpyxl 快数倍)，
+    否则使用 openpyxl 的只读模式，按行解析而不加载整个工作簿。
+    """
+    try:
+        from python_calamine import CalamineWorkbook
+    except ImportError:
+        CalamineWorkbook = None
+
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(file_path)
+        try:
+            sheet = workbook.get_sheet_by_index(0)
+            yield sheet.height, sheet.iter_rows()
+        finally:
+            workbook.close()
+    else:
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            yield sheet.max_row, sheet.iter_rows(values_only=True) # 文件中缺少尺寸信息时 max_row 为None
+        finally:
+            workbook.close()
+
+
+def _read_excel_table(file_path: str, select=None, progress=None) -> AddressTable:
+    """流式读取 XLSX，只保留需要的列，读取完成后再把单元格的值转为字符串。进度按行计算。"""
+    with _open_excel_rows(file_path) as (total_rows, rows):
+        header = [_excel_cell_text(value).strip() for value in next(rows, None) or ()]
+        while header and not header[-1]: # 工作表尺寸可能比实际数据宽
+            header.pop()
+        if not header:
+            raise AddressFileError("文件为空，没有可导入的地址。")
+        names = _normalize_columns(name or f"unnamed: {i}" for i, name in enumerate(header))
+        report = None
+        if progress is not None:
+            data_rows = total_rows - 1 if total_rows else None # 不含表头
+            report = lambda row_count: progress(row_count, data_rows)
+        table = _collect_columns(names, rows, select, report)
+    for name in table.columns:
+        values = table.column(name)
+        values[:] = map(_excel_cell_text, values)
+    if progress is not None:
+        progress(table.row_count, table.row_count)
+    return table
+
+
+def read_address_table(file_path: str, select=None, progress=None) -> AddressTable:
+    """
+    读取地址文件 (CSV / XLSX)，所有单元格作为字符串读取。
+
+    Args:
+        select (callable | None): 接收表头 (处理后的列名列表)，返回需要保留的列名；为None时保留全部列。
+            只需要其中一种地址时，其它列在读取过程中直接丢弃。
+        progress (callable | None): progress(已完成, 总量) 在读取过程中定期调用 (CSV按字节，XLSX按行；
+            总量未知时为None)。回调中抛出的异常会中止读取。
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith('.csv'):
+        table = _read_csv_table(file_path, select, progress)
+    elif lower_path.endswith('.xlsx'):
+        table = _read_excel_table(file_path, select, progress)
+    else:
+        raise AddressFileError("不支持的文件格式。请选择 .csv 或 .xlsx 文件。")
+    if not table.row_count:
+        raise AddressFileError("文件为空，没有可导入的地址。")
+    return table
+
+
+def is_single_column_format(columns) -> bool:
+    return 'address' in columns
+
+
+def detect_address_type_columns(columns) -> dict[str, str]:
+    """
+    识别多列格式中的地址类型列。
+
+    Returns:
+        dict[str, str]: {地址类型: 列名}，按列在文件中的顺序。无法归类的列以列名本身作为类型。
+    """
+    type_columns: dict[str, str] = {}
+    for col in columns:
+        col_lower = col.lower()
+        if 'label' in col_lower: # 跳过标签列
+            continue
+        for addr_type, keywords in ADDRESS_TYPE_KEYWORDS.items():
+            if col_lower in keywords or any(keyword in col_lower for keyword in keywords):
+                type_columns[addr_type] = col
+                break
+        if col not in type_columns.values():
+            type_columns[col_lower] = col
+    return type_columns
+
+
+def extract_single_column_addresses(table: AddressTable) -> list[dict]:
+    """从单列格式中提取 [{'address', 'label'}, ...]，跳过空地址行。"""
+    addresses = table.column('address')
+    if 'label' not in table:
+        return [{'address': addr, 'label': None} for addr in map(str.strip, addresses) if addr]
+    return [{'address': addr, 'label': label.strip() or None}
+            for addr, label in zip(map(str.strip, addresses), table.column('label')) if addr]
+
+
+def _column_records(values: list[str]) -> list[dict]:
+    return [{'address': addr, 'label': None} for addr in map(str.strip, values) if addr]
+
+
+def extract_column_addresses(table: AddressTable, column: str) -> list[dict]:
+    """从多列格式的某一列提取地址。多列格式暂不支持label。"""
+    return _column_records(table.column(column))
+
+
+def file_signature(file_path: str) -> tuple[int, int]:
+    """(修改时间ns, 文件大小)，用于判断文件读取后是否被修改。"""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class AddressBook:
+    """
+    已导入的多列地址文件在内存中的列式表示，切换地址类型时不再重新读取文件。
+
+    每个地址类型列保存一份字符串列表，第一次取用时提取为地址记录并缓存 (原始列随即释放)，
+    之后切换类型直接返回已有的列表。文件的修改时间或大小变化后 is_stale() 返回True。
+    """
+
+    def __init__(self, file_path: str, signature: tuple[int, int], table: AddressTable):
+        self.file_path = file_path
+        self.signature = signature
+        self.type_columns = detect_address_type_columns(table.columns) # {地址类型: 列名}
+        self._columns = {address_type: table.column(column) for address_type, column in self.type_columns.items()}
+        self._addresses: dict[str, list[dict]] = {}
+
+    @classmethod
+    def load(cls, file_path: str, progress=None) -> "AddressBook":
+        """读取多列地址文件，只保留地址类型列。progress 见 read_address_table。"""
+        signature = file_signature(file_path) # 读取前取签名，读取期间的修改也能被发现
+        table = read_address_table(file_path, select=lambda columns: list(detect_address_type_columns(columns).values()),
+                                   progress=progress)
+        return cls(file_path, signature, table)
+
+    @property
+    def address_types(self) -> list[str]:
+        return list(self.type_columns)
+
+    def addresses(self, address_type: str) -> list[dict]:
+        """
+        某个地址类型的地址列表。返回的列表在各次调用间共享，调用方不应修改。
+
+        Raises:
+            KeyError: 文件中没有该类型的地址列。
+        """
+        addresses = self._addresses.get(address_type)
+        if addresses is None:
+            addresses = self._addresses[address_type] = _column_records(self._columns.pop(address_type))
+        return addresses
+
+    def is_stale(self) -> bool:
+        try:
+            return file_signature(self.file_path) != self.signature
+        except OSError: # 文件已被删除或移动
+            return True
+
+
+def load_addresses(file_path: str, address_type: str | None = None) -> tuple[list[dict], str, dict[str, str]]:
+    """
+    读取地址文件并提取地址。
+
+    Args:
+        address_type (str | None): 多列格式时要使用的地址类型，为None时使用第一个识别到的类型。
+
+    Returns:
+        tuple: (地址列表, 实际使用的地址类型, {地址类型: 列名})。单列格式时类型为 'standard'。
+
+    Raises:
+        AddressFileError: 文件格式不支持、为空或没有有效地址。
+    """
+    # 读到表头时确定格式和要使用的列，其它列在读取过程中丢弃
+    selected: dict = {}
+
+    def select(columns):
+        if is_single_column_format(columns):
+            return ['address', 'label']
+        type_columns = detect_address_type_columns(columns)
+        if not type_columns:
+            raise AddressFileError("文件中未能识别出任何地址类型列。请确保列名包含EVM、SUI、SOL等关键词，或者使用单列'address'格式。")
+        selected_type = next(iter(type_columns)) if address_type is None else address_type
+        if selected_type not in type_columns:
+            raise AddressFileError(f"文件中没有 {selected_type} 类型的地址列，可用类型: {', '.join(type_columns)}")
+        selected.update(type=selected_type, type_columns=type_columns)
+        return [type_columns[selected_type]]
+
+    table = read_address_table(file_path, select)
+    if not selected:
+        addresses = extract_single_column_addresses(table)
+        if not addresses:
+            raise AddressFileError("文件中未能提取到有效的地址行。")
+        return addresses, STANDARD_ADDRESS_TYPE, {}
+    type_columns = selected['type_columns']
+    return extract_column_addresses(table, type_columns[selected['type']]), selected['type'], type_columns
@@ -1,5 +1,4 @@
 import re
-from eth_utils import is_hex_address, to_checksum_address
 import base58
 import base64
 import binascii
@@ -71,8 +70,9 @@ class AddressValidator:
         if not address.startswith('0x'):
             return False, "以太坊地址必须以0x开头"
             
-        # 使用eth_utils验证地址
+        # 使用eth_utils验证地址 (按需导入，eth_utils 依赖链较重，启动时不加载)
         try:
+            from eth_utils import is_hex_address, to_checksum_address
             if not is_hex_address(address):
                 return False, "无效的以太坊地址格式"
                 
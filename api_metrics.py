@@ -0,0 +1,225 @@
+"""
+交易所API调用的耗时和错误率统计。
+
+BaseExchangeAPI 的公开方法 (get_balance、withdraw 等) 和经过 _call 的每个SDK端点
+都会记录调用次数、错误次数和耗时直方图，按 (交易所, 方法) 分组。
+最近的样本用于计算 p50/p95/p99；累计直方图可以导出为 Prometheus 文本格式
+(写入文件，或通过本地HTTP端口提供 /metrics)。
+"""
+import functools
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 累计直方图的桶上限 (秒)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SAMPLE_WINDOW = 1024 # 每个方法保留最近多少次调用的耗时用于计算分位数
+
+KIND_METHOD = "method" # BaseExchangeAPI 的公开方法
+KIND_ENDPOINT = "endpoint" # _call 调用的SDK端点 (实际HTTP请求)
+
+METRIC_PREFIX = "withdrawal_helper"
+PROMETHEUS_METRICS = { # 类型 -> (指标名, 标签名, 说明)
+    KIND_METHOD: ("api_call", "method", "交易所API方法"),
+    KIND_ENDPOINT: ("sdk_request", "endpoint", "交易所SDK端点请求"),
+}
+
+
+@dataclass(frozen=True)
+class MetricsRow:
+    """某个方法的统计快照。耗时单位为毫秒。"""
+    kind: str
+    exchange: str
+    name: str
+    count: int
+    errors: int
+    total_ms: float
+    p50_ms: float | None
+    p95_ms: float | None
+    p99_ms: float | None
+    max_ms: float | None
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.count if self.count else 0.0
+
+    @property
+    def mean_ms(self) -> float | None:
+        return self.total_ms / self.count if self.count else None
+
+
+def _percentile(sorted_samples: list[float], q: float) -> float | None:
+    """最近邻法分位数 (q 取 0~100)。"""
+    if not sorted_samples:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class LatencyStats:
+    """单个方法的累计统计 (由 ApiMetrics 的锁保护)。"""
+
+    __slots__ = ("count", "errors", "total", "bucket_counts", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS) # 每个桶单独计数，导出时累加
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def record(self, seconds: float, error: bool):
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.total += seconds
+        for i, upper in enumerate(LATENCY_BUCKETS):
+            if seconds <= upper:
+                self.bucket_counts[i] += 1
+                break
+        self.samples.append(seconds)
+
+
+class ApiMetrics:
+    """线程安全的统计注册表，进程内共用 API_METRICS 一个实例。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str, str], LatencyStats] = {}
+
+    def record(self, kind: str, exchange: str, name: str, seconds: float, error: bool = False):
+        key = (kind, exchange, name)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = LatencyStats()
+            stats.record(seconds, error)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self, kind: str | None = None) -> list[MetricsRow]:
+        """各方法的统计快照，按总耗时从高到低排序 (最占批次时间的在前)。"""
+        with self._lock:
+            items = [(key, stats.count, stats.errors, stats.total, sorted(stats.samples))
+                     for key, stats in self._stats.items() if kind is None or key[0] == kind]
+        rows = []
+        for (row_kind, exchange, name), count, errors, total, samples in items:
+            ms = [s * 1000 for s in samples]
+            rows.append(MetricsRow(row_kind, exchange, name, count, errors, total * 1000,
+                                   _percentile(ms, 50), _percentile(ms, 95), _percentile(ms, 99),
+                                   ms[-1] if ms else None))
+        rows.sort(key=lambda row: row.total_ms, reverse=True)
+        return rows
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式 (累计直方图 + 错误计数)。"""
+        with self._lock:
+            items = [(key, stats.count, stats.errors, stats.total, list(stats.bucket_counts))
+                     for key, stats in sorted(self._stats.items())]
+        lines = []
+        for kind, (metric, label, description) in PROMETHEUS_METRICS.items():
+            kind_items = [item for item in items if item[0][0] == kind]
+            if not kind_items:
+                continue
+            base = f"{METRIC_PREFIX}_{metric}"
+            lines.append(f"# HELP {base}_duration_seconds {description}耗时")
+            lines.append(f"# TYPE {base}_duration_seconds histogram")
+            for (_, exchange, name), count, _errors, total, bucket_counts in kind_items:
+                labels = f'exchange="{_escape_label(exchange)}",{label}="{_escape_label(name)}"'
+                cumulative = 0
+                for upper, bucket_count in zip(LATENCY_BUCKETS, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f'{base}_duration_seconds_bucket{{{labels},le="{upper}"}} {cumulative}')
+                lines.append(f'{base}_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{base}_duration_seconds_sum{{{labels}}} {total:.6f}')
+                lines.append(f'{base}_duration_seconds_count{{{labels}}} {count}')
+            lines.append(f"# HELP {base}_errors_total {description}失败次数")
+            lines.append(f"# TYPE {base}_errors_total counter")
+            for (_, exchange, name), _count, errors, _total, _buckets in kind_items:
+                lines.append(f'{base}_errors_total{{exchange="{_escape_label(exchange)}",{label}="{_escape_label(name)}"}} {errors}')
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write_prometheus(self, path: str):
+        """原子地写入 Prometheus 文本文件 (可供 node_exporter textfile collector 读取)。"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+API_METRICS = ApiMetrics()
+
+
+# 返回None表示调用失败的方法 (其它方法返回None可能只是没有数据)
+RESULT_NONE_IS_ERROR = frozenset({"get_balance", "get_symbol_ticker", "get_withdrawal_fee"})
+# 返回 (success, message) 的方法
+RESULT_TUPLE_METHODS = frozenset({"connect", "withdraw"})
+
+
+def _result_is_error(method_name: str, result) -> bool:
+    """各方法出错时大多记录日志后返回None或 (False, 原因)，而不是抛出异常。"""
+    if method_name in RESULT_TUPLE_METHODS:
+        return isinstance(result, tuple) and bool(result) and not result[0]
+    return method_name in RESULT_NONE_IS_ERROR and result is None
+
+
+def instrument_method(method_name: str, func):
+    """包装 BaseExchangeAPI 子类的方法，记录耗时和是否出错。"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = func(self, *args, **kwargs)
+            error = _result_is_error(method_name, result)
+            return result
+        finally:
+            API_METRICS.record(KIND_METHOD, self.metrics_exchange_name, method_name, time.perf_counter() - start, error)
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = API_METRICS.to_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # 不向标准错误输出访问日志
+        pass
+
+
+class MetricsServer:
+    """在后台线程中通过 http://127.0.0.1:<port>/metrics 提供统计数据。"""
+
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self._server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
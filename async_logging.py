@@ -0,0 +1,87 @@
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_QUEUE_SIZE = 10000 # 队列满时丢弃新日志，而不是阻塞调用线程
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    把日志记录放入有界队列的处理器，调用线程不做格式化和文件I/O。
+
+    队列已满时丢弃该条记录并计数；队列恢复空闲后补写一条警告，说明丢弃了多少条。
+    队列末尾的 1/10 只留给 WARNING 及以上的记录，大量DEBUG日志不会挤掉错误信息。
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._low_level_limit = log_queue.maxsize - max(1, log_queue.maxsize // 10) if log_queue.maxsize > 0 else 0
+        self._lock = threading.Lock()
+        self._dropped = 0 # 尚未报告的丢弃数
+        self.dropped_total = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 同一进程内传递，不需要像默认实现那样先格式化成字符串；格式化 (包括异常堆栈) 交给监听线程。
+        # 只合并 % 参数，避免参数对象在写入前被调用方修改。
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def _has_room_for_low_level(self) -> bool:
+        return not self._low_level_limit or self.queue.qsize() < self._low_level_limit
+
+    def enqueue(self, record: logging.LogRecord):
+        with self._lock:
+            if self._dropped and self._has_room_for_low_level():
+                notice = logging.LogRecord(record.name, logging.WARNING, __file__, 0,
+                                           f"日志队列已满，丢弃了 {self._dropped} 条日志", None, None)
+                try:
+                    self.queue.put_nowait(notice)
+                    self._dropped = 0
+                except queue.Full:
+                    pass
+            try:
+                if record.levelno < logging.WARNING and not self._has_room_for_low_level():
+                    raise queue.Full
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self._dropped += 1
+                self.dropped_total += 1
+
+
+class _BlockingSentinelListener(QueueListener):
+    def enqueue_sentinel(self):
+        # 默认实现使用 put_nowait，队列满时会抛出 queue.Full；停止时可以等待监听线程腾出空间
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogging:
+    """后台线程写日志: logger -> BoundedQueueHandler -> 有界队列 -> QueueListener -> 实际处理器。"""
+
+    def __init__(self, logger: logging.Logger, handlers: list[logging.Handler], queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = BoundedQueueHandler(self.queue)
+        self.listener = _BlockingSentinelListener(self.queue, *handlers, respect_handler_level=True)
+        self._handlers = handlers
+        self._stopped = False
+        logger.addHandler(self.handler)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    @property
+    def dropped_total(self) -> int:
+        return self.handler.dropped_total
+
+    def stop(self):
+        """写完队列中剩余的日志后停止后台线程并关闭文件 (可重复调用)。"""
+        if self._stopped:
+            return
+        self._stopped = True
+        try:
+            self.listener.stop() # 放入结束标记并等待线程写完队列
+        finally:
+            for handler in self._handlers:
+                handler.close()
@@ -0,0 +1,87 @@
+import logging
+import threading
+from decimal import Decimal
+
+
+class BalanceLedger:
+    """
+    批量提币期间的本地余额账本。
+
+    批次开始时从交易所获取一次余额，之后每笔成功提币在本地扣减 (数量 + 手续费)。
+    只有在以下情况才会重新向交易所同步:
+      - 尚未同步过，或距离上次同步已完成 resync_every 笔提币；
+      - 上一笔提币失败 (余额可能已部分变化，或本地数字不可信)；
+      - 本地余额接近所需金额 (扣除本笔后不足以再支付一笔同样大小的提币)。
+    """
+
+    DEFAULT_RESYNC_EVERY = 20
+
+    def __init__(self, fetch_balance, logger: logging.Logger, resync_every: int = DEFAULT_RESYNC_EVERY):
+        """
+        Args:
+            fetch_balance (callable): 无参数，返回余额字符串或None (同 BaseExchangeAPI.get_balance)。
+            resync_every (int): 每完成多少笔提币强制与交易所同步一次。
+        """
+        self._fetch_balance = fetch_balance
+        self.logger = logger
+        self.resync_every = max(1, int(resync_every))
+        self._lock = threading.Lock()
+        self._available: Decimal | None = None
+        self._since_sync = 0
+        self._dirty = True
+        self.sync_count = 0 # 实际向交易所请求余额的次数，用于统计
+
+    @property
+    def available(self) -> Decimal | None:
+        return self._available
+
+    def sync(self) -> Decimal | None:
+        """立即从交易所获取余额。获取失败时返回None，本地余额保持不可信状态。"""
+        with self._lock:
+            return self._sync_locked()
+
+    def _sync_locked(self) -> Decimal | None:
+        self.sync_count += 1
+        balance_str = self._fetch_balance()
+        if balance_str is None:
+            self._dirty = True
+            self.logger.warning("余额账本: 无法从交易所获取余额。")
+            return None
+        self._available = Decimal(balance_str)
+        self._since_sync = 0
+        self._dirty = False
+        self.logger.debug(f"余额账本: 已与交易所同步，可用余额 {self._available}")
+        return self._available
+
+    def _needs_sync(self, required: Decimal) -> bool:
+        if self._dirty or self._available is None:
+            return True
+        if self._since_sync >= self.resync_every:
+            return True
+        # 本地余额接近所需金额时，以交易所的真实数字为准
+        return self._available < required * 2
+
+    def check(self, required: Decimal) -> tuple[bool, Decimal | None]:
+        """
+        检查余额是否足够支付 required (数量 + 手续费)，必要时先与交易所同步。
+
+        Returns:
+            tuple[bool, Decimal | None]: (是否足够, 当前可用余额)。余额无法获取时为 (False, None)。
+        """
+        with self._lock:
+            if self._needs_sync(required):
+                if self._sync_locked() is None:
+                    return False, None
+            return self._available >= required, self._available
+
+    def record_success(self, amount: Decimal, fee: Decimal):
+        """一笔提币成功后在本地扣减余额。"""
+        with self._lock:
+            if self._available is not None:
+                self._available -= amount + fee
+            self._since_sync += 1
+
+    def record_failure(self):
+        """一笔提币失败后标记账本需要重新同步。"""
+        with self._lock:
+            self._dirty = True
@@ -0,0 +1,319 @@
+"""
+无界面批量提币入口，适用于服务器和定时任务。
+
+用法示例:
+    python -m batch_cli --exchange Binance --addresses addrs.csv --coin USDT --network BSC \
+        --min-amount 10 --max-amount 12
+
+进度以 JSON Lines 形式输出到标准输出 (每行一个事件)，日志输出到标准错误或 --log-file。
+本模块不导入 PyQt6。
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import signal
+import sys
+import threading
+from configparser import ConfigParser
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from address_loader import AddressFileError, load_addresses
+from balance_ledger import BalanceLedger
+from retry_policy import RetryPolicy
+from withdrawal_engine import WithdrawalEngine, WithdrawalStats, reconcile_journal_state
+from withdrawal_failures import FailureSet
+from withdrawal_events import EVENT_LOG_FILE, WithdrawalEventLog
+from withdrawal_journal import STATUS_COMPLETED, WithdrawalJournal, replay_journal
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.expanduser("~"), "Documents", "MultiWithdrawalHelper", "config.ini")
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), "Documents", "MultiWithdrawalHelper", "journal")
+DEFAULT_EVENTS_FILE = os.path.join(os.path.expanduser("~"), "Documents", "MultiWithdrawalHelper", EVENT_LOG_FILE)
+
+EXIT_OK = 0
+EXIT_FAILURES = 1 # 有提币失败
+EXIT_USAGE = 2
+EXIT_SETUP = 3 # 配置、地址文件或API连接错误
+EXIT_INTERRUPTED = 130
+
+
+class JsonLineEmitter:
+    """线程安全地向输出流写入 JSON Lines 事件。"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields):
+        record = {"ts": datetime.now().isoformat(timespec='seconds'), "event": event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def _get_exchange_class(exchange_name: str):
+    # 按需导入，只加载实际使用的交易所SDK
+    if exchange_name == "Binance":
+        from binance_exchange import BinanceAPI
+        return BinanceAPI
+    if exchange_name == "OKX":
+        from okx_exchange import OKXAPI
+        return OKXAPI
+    raise ValueError(f"不支持的交易所: {exchange_name}")
+
+
+def _price_symbol(exchange_name: str, coin: str) -> str:
+    return f"{coin.upper()}-USDT" if exchange_name == "OKX" else f"{coin.upper()}USDT"
+
+
+def _decimal_arg(value: str) -> Decimal:
+    try:
+        result = Decimal(value)
+    except InvalidOperation:
+        raise argparse.ArgumentTypeError(f"无效的数量: {value}")
+    if result <= 0:
+        raise argparse.ArgumentTypeError("提币数量必须大于0")
+    return result
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m batch_cli", description="多交易所批量提币 (无界面)")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="config.ini 路径 (默认: %(default)s)")
+    parser.add_argument("--exchange", choices=["Binance", "OKX"], help="交易所，默认使用配置中上次选择的交易所")
+    parser.add_argument("--addresses", required=True, help="地址文件 (.csv 或 .xlsx)")
+    parser.add_argument("--address-type", help="多列地址文件中使用的地址类型 (如 evm、sol、sui)")
+    parser.add_argument("--coin", required=True)
+    parser.add_argument("--network", required=True)
+    parser.add_argument("--min-amount", required=True, type=_decimal_arg)
+    parser.add_argument("--max-amount", required=True, type=_decimal_arg)
+    parser.add_argument("--start", type=int, default=1, help="起始地址序号 (1-based，默认1)")
+    parser.add_argument("--end", type=int, help="结束地址序号 (包含，默认最后一个)")
+    parser.add_argument("--min-interval", type=int, help="最小间隔秒数，默认读取配置")
+    parser.add_argument("--max-interval", type=int, help="最大间隔秒数，默认读取配置")
+    parser.add_argument("--sequential", action="store_true", help="按文件顺序提币 (默认随机打乱)")
+    parser.add_argument("--yes-large", action="store_true", help="自动确认大额提币 (默认跳过大额提币)")
+    parser.add_argument("--dry-run", action="store_true", help="只生成并输出提币计划，不执行提币")
+    parser.add_argument("--journal-dir", default=DEFAULT_JOURNAL_DIR, help="提币日志目录 (默认: %(default)s)")
+    parser.add_argument("--resume", metavar="JOURNAL", help="继续处理某个批次日志中尚未完成的地址 (忽略地址范围和顺序参数，提币数量和间隔使用日志中的值)")
+    parser.add_argument("--failures-csv", help="失败地址CSV的保存路径 (默认保存在地址文件旁边)；该文件可以直接用作 --addresses 重新提币")
+    parser.add_argument("--events-file", default=DEFAULT_EVENTS_FILE,
+                        help="结构化提币事件 (JSONL，按大小轮转) 的路径 (默认: %(default)s)")
+    parser.add_argument("--log-file", help="日志文件路径 (默认输出到标准错误)")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    return parser
+
+
+def _setup_logger(log_file: str | None, level: str) -> logging.Logger:
+    logger = logging.getLogger("WithdrawalHelper")
+    logger.setLevel(logging.DEBUG)
+    if logger.hasHandlers():
+        logger.handlers.clear()
+    handler = logging.FileHandler(log_file, encoding='utf-8') if log_file else logging.StreamHandler(sys.stderr)
+    handler.setLevel(getattr(logging, level))
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+    return logger
+
+
+def run(args: argparse.Namespace, emitter: JsonLineEmitter, stop_event: threading.Event) -> int:
+    logger = _setup_logger(args.log_file, args.log_level)
+
+    def log(message, level="INFO"):
+        log_level = logging.INFO if level.upper() == "SUCCESS" else getattr(logging, level.upper(), logging.INFO)
+        logger.log(log_level, message)
+        if log_level >= logging.WARNING or level.upper() == "SUCCESS":
+            emitter.emit("log", level=level.upper(), message=message)
+
+    # --- 配置 ---
+    config = ConfigParser()
+    if not config.read(args.config, encoding='utf-8'):
+        emitter.emit("error", stage="config", message=f"无法读取配置文件: {args.config}")
+        return EXIT_SETUP
+    exchange_name = args.exchange or config.get('GENERAL', 'last_selected_exchange', fallback='Binance')
+    min_interval = args.min_interval if args.min_interval is not None else config.getint('WITHDRAWAL', 'min_interval', fallback=60)
+    max_interval = args.max_interval if args.max_interval is not None else config.getint('WITHDRAWAL', 'max_interval', fallback=600)
+    enable_warning = config.getboolean('WITHDRAWAL', 'enable_warning', fallback=True)
+    warning_threshold = config.getfloat('WITHDRAWAL', 'warning_threshold', fallback=1000.0)
+    resync_every = config.getint('WITHDRAWAL', 'balance_resync_every', fallback=BalanceLedger.DEFAULT_RESYNC_EVERY)
+    retry_policy = RetryPolicy.from_config(config, 'WITHDRAWAL')
+    coin, network = args.coin.upper(), args.network
+    min_amount, max_amount = args.min_amount, args.max_amount
+    if min_amount > max_amount or min_interval > max_interval:
+        emitter.emit("error", stage="args", message="最小值不能大于最大值")
+        return EXIT_USAGE
+
+    # --- 地址 ---
+    try:
+        addresses, address_type, _ = load_addresses(args.addresses, args.address_type)
+    except (AddressFileError, OSError, ImportError) as e:
+        emitter.emit("error", stage="addresses", message=str(e))
+        return EXIT_SETUP
+    end = args.end or len(addresses)
+    if args.start < 1 or end > len(addresses) or args.start > end:
+        emitter.emit("error", stage="args", message=f"地址范围 [{args.start}, {end}] 无效 (共 {len(addresses)} 个地址)")
+        return EXIT_USAGE
+    selected = addresses[args.start - 1:end]
+    if not args.sequential:
+        random.shuffle(selected)
+    resume_state = None
+    if args.resume:
+        try:
+            resume_state = replay_journal(args.resume)
+        except OSError as e:
+            emitter.emit("error", stage="resume", message=str(e))
+            return EXIT_SETUP
+        if resume_state is None or resume_state.finished:
+            emitter.emit("error", stage="resume", message=f"{args.resume} 不是未完成的批次日志")
+            return EXIT_USAGE
+        header = resume_state.header
+        journal_key = (header.get('exchange'), str(header.get('coin') or '').upper(), str(header.get('network') or '').upper())
+        if journal_key != (exchange_name, coin, network.upper()):
+            emitter.emit("error", stage="resume", message=f"批次日志与参数不一致: {resume_state.describe()}")
+            return EXIT_USAGE
+        # 与界面恢复批次一致: 币种、网络、提币数量和间隔都使用日志中记录的值
+        params = header.get('params', {})
+        try:
+            resume_min_amount = Decimal(params['min_amount'])
+            resume_max_amount = Decimal(params['max_amount'])
+            min_interval = int(params.get('min_interval', min_interval))
+            max_interval = int(params.get('max_interval', max_interval))
+        except (KeyError, ValueError, ArithmeticError) as e:
+            emitter.emit("error", stage="resume", message=f"批次日志中的参数无效: {e}")
+            return EXIT_USAGE
+        if (resume_min_amount, resume_max_amount) != (min_amount, max_amount):
+            log(f"恢复批次使用日志中的提币数量 {resume_min_amount} - {resume_max_amount}，"
+                f"忽略参数中的 {min_amount} - {max_amount}。", level="WARNING")
+        coin, network = header['coin'], header['network']
+        min_amount, max_amount = resume_min_amount, resume_max_amount
+    emitter.emit("addresses", file=args.addresses, address_type=address_type, total=len(addresses), selected=len(selected))
+
+    # --- API ---
+    try:
+        api = _get_exchange_class(exchange_name)(config, logger)
+        connected, message = api.connect()
+    except Exception as e:
+        connected, message = False, str(e)
+    if not connected:
+        emitter.emit("error", stage="connect", exchange=exchange_name, message=message)
+        return EXIT_SETUP
+    emitter.emit("connected", exchange=exchange_name)
+    if resume_state is not None:
+        # 恢复前先按 client_id 对账结果未知的地址，确认未提币的地址会被重新处理
+        if resume_state.uncertain:
+            reconcile_journal_state(resume_state, api, logger)
+        selected = resume_state.remaining_targets()
+        emitter.emit("resume", journal=args.resume, completed=len(resume_state.completed),
+                     uncertain=sorted(resume_state.uncertain), remaining=len(selected))
+
+    journal = None
+    stats = None
+    engine = None
+    try:
+        usd_price = None
+        if enable_warning:
+            try:
+                price_str = api.get_symbol_ticker(symbol=_price_symbol(exchange_name, coin))
+                usd_price = Decimal(price_str) if price_str else None
+            except Exception as e:
+                log(f"无法获取 {coin} 的USD价格进行大额检查: {e}", level="WARNING")
+
+        def confirm_large(coin, network, planned):
+            emitter.emit("large_withdrawal", index=planned.index, amount=planned.amount_str,
+                         usd_value=planned.usd_value, confirmed=args.yes_large)
+            return args.yes_large
+
+        engine = WithdrawalEngine(
+            api, exchange_name, logger,
+            log=log,
+            on_progress=lambda processed, total: emitter.emit("progress", processed=processed, total=total),
+            confirm_large=confirm_large,
+            on_result=lambda planned, success, msg: emitter.emit(
+                "result", index=planned.index, address=planned.address, amount=planned.amount_str,
+                success=success, message=msg),
+            should_stop=stop_event.is_set,
+            resync_every=resync_every,
+            failures=FailureSet(exchange_name, coin, network, min_amount, max_amount,
+                                source_path=args.addresses),
+            retry_policy=retry_policy,
+            on_retry=lambda planned, attempt, delay, reason, budget_remaining: emitter.emit(
+                "retry", index=planned.index, attempt=attempt, delay=round(delay, 2), reason=reason,
+                budget_remaining=budget_remaining),
+        )
+        if not args.dry_run:
+            if resume_state is not None:
+                journal = WithdrawalJournal.reopen(resume_state, logger)
+            else:
+                journal = WithdrawalJournal.create(
+                    args.journal_dir, logger, exchange_name, coin, network, selected,
+                    params={'min_amount': str(min_amount), 'max_amount': str(max_amount),
+                            'min_interval': min_interval, 'max_interval': max_interval})
+            engine.journal = journal
+            engine.events = WithdrawalEventLog(args.events_file)
+            emitter.emit("journal", path=journal.path, batch_id=journal.batch_id)
+        plan = engine.prepare(coin, network, selected, min_amount, max_amount,
+                              usd_price=usd_price, warning_threshold=warning_threshold if enable_warning else None)
+        emitter.emit("plan", exchange=exchange_name, coin=plan.coin, network=plan.network,
+                     executable=len(plan.executable_items), skipped=plan.skipped_count,
+                     total_amount=plan.total_amount, total_fee=plan.total_fee,
+                     balance=plan.balance_snapshot, balance_sufficient=plan.balance_sufficient)
+        if args.dry_run:
+            for item in plan.items:
+                emitter.emit("planned", index=item.index, address=item.address, label=item.label,
+                             amount=item.amount_str, is_large=item.is_large, skip_reason=item.skip_reason)
+            return EXIT_OK
+
+        stats: WithdrawalStats = engine.execute(plan, min_interval, max_interval)
+        if len(engine.failures):
+            try:
+                failures_path = engine.failures.save_csv(args.failures_csv)
+            except OSError as e:
+                log(f"保存失败地址CSV出错: {e}", level="ERROR")
+                failures_path = None
+            emitter.emit("failures", path=failures_path, total=len(engine.failures),
+                         rerunnable=len(engine.failures.rerun_targets()), by_reason=engine.failures.counts_by_reason())
+        emitter.emit("done", total=stats.total, processed=stats.processed, succeeded=stats.succeeded,
+                     failed=stats.failed, skipped=stats.skipped, retries=stats.retries,
+                     retry_exhausted=stats.retry_exhausted, retry_budget_remaining=engine.retry_budget.remaining,
+                     stopped=stats.stopped)
+        if stats.stopped:
+            return EXIT_INTERRUPTED
+        return EXIT_FAILURES if stats.failed else EXIT_OK
+    except Exception as e:
+        logger.error(f"批量提币出错: {e}", exc_info=True)
+        emitter.emit("error", stage="run", message=str(e))
+        return EXIT_SETUP
+    finally:
+        if journal is not None:
+            if stats is not None and not stats.stopped:
+                journal.finish(STATUS_COMPLETED)
+            else:
+                journal.close() # 被中断或出错的批次不写结束记录，之后可以用 --resume 继续
+        if engine is not None and engine.events is not None:
+            engine.events.close()
+        try:
+            api.close()
+        except Exception:
+            pass
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    emitter = JsonLineEmitter()
+    stop_event = threading.Event()
+
+    def _request_stop(signum, frame):
+        emitter.emit("stopping", signal=signum)
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _request_stop)
+    return run(args, emitter, stop_event)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
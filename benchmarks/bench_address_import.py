@@ -0,0 +1,183 @@
+"""
+地址导入基准: 旧实现 (pandas.read_csv / read_excel + 逐行 iloc 提取) 与 address_loader 的流式读取对比。
+
+每种实现在单独的子进程中运行，分别测量耗时和导入引起的峰值内存 (RSS) 增长；
+各实现提取出的地址和标签必须完全一致。默认生成 100 万行的单列 CSV (address,label)、
+同样行数的多列 CSV (evm,sol,sui，取 sol 列)，以及 20 万行的多列 XLSX (evm,sol,sui,label，取 sol 列)。
+XLSX 分别测量 openpyxl 只读模式和 python-calamine (未安装时跳过)。
+
+用法:
+    python benchmarks/bench_address_import.py
+    python benchmarks/bench_address_import.py --rows 200000 --xlsx-rows 50000 --skip-legacy
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+HEX_DIGITS = "0123456789abcdef"
+
+
+def legacy_load(file_path: str, column: str | None) -> list[dict]:
+    """address_loader 的原实现: pandas 读取整个文件，再按行 iloc 取标签。"""
+    import pandas as pd
+    if file_path.endswith('.xlsx'):
+        df = pd.read_excel(file_path, dtype=str, header=0, keep_default_na=False)
+    else:
+        df = pd.read_csv(file_path, dtype=str, header=0, keep_default_na=False)
+    df.columns = df.columns.str.strip().str.lower()
+    addresses_data = []
+    if column is None:
+        labels = df['label'] if 'label' in df.columns else None
+        for i, raw_addr in enumerate(df['address']):
+            addr = str(raw_addr).strip()
+            if not addr:
+                continue
+            label = str(labels.iloc[i]).strip() or None if labels is not None else None
+            addresses_data.append({'address': addr, 'label': label})
+    else:
+        for raw_addr in df[column]:
+            addr = str(raw_addr).strip()
+            if addr:
+                addresses_data.append({'address': addr, 'label': None})
+    return addresses_data
+
+
+def streaming_load(file_path: str, column: str | None) -> list[dict]:
+    from address_loader import load_addresses
+    addresses, _address_type, _columns = load_addresses(file_path, column)
+    return addresses
+
+
+LOADERS = {"legacy": legacy_load, "streaming": streaming_load, "openpyxl": streaming_load, "calamine": streaming_load}
+
+
+def rss_mb() -> tuple[float | None, float | None]:
+    """(当前RSS, 峰值RSS)，单位MB。只在 Linux 上可用。"""
+    try:
+        with open("/proc/self/status", encoding='ascii') as f:
+            fields = dict(line.split(":", 1) for line in f)
+    except OSError:
+        return None, None
+    return int(fields['VmRSS'].split()[0]) / 1024, int(fields['VmHWM'].split()[0]) / 1024
+
+
+def run_worker(loader: str, file_path: str, column: str | None):
+    """子进程入口: 预先导入依赖，只测量读取和提取本身。"""
+    if loader == "legacy":
+        import pandas  # noqa: F401
+    elif loader == "openpyxl":
+        sys.modules['python_calamine'] = None # 让 address_loader 回退到 openpyxl
+    elif loader == "calamine":
+        import python_calamine  # noqa: F401
+    import address_loader  # noqa: F401
+    rss_before, _ = rss_mb()
+    start = time.perf_counter()
+    addresses = LOADERS[loader](file_path, column)
+    seconds = time.perf_counter() - start
+    _, peak = rss_mb()
+    digest = hashlib.sha256()
+    for item in addresses:
+        digest.update(f"{item['address']}\t{item['label']}\n".encode('utf-8'))
+    print(json.dumps({'seconds': seconds, 'count': len(addresses), 'digest': digest.hexdigest(),
+                      'rss_increase_mb': None if peak is None else peak - rss_before}))
+
+
+def write_files(directory: str, rows: int, xlsx_rows: int, seed: int = 11) -> dict[str, tuple[str, str | None, list[str]]]:
+    """生成测试文件，返回 {名称: (路径, 地址类型, 要运行的实现)}。"""
+    rng = random.Random(seed)
+
+    def random_row(i):
+        evm = "0x" + "".join(rng.choices(HEX_DIGITS, k=40))
+        sol = "".join(rng.choices(BASE58_ALPHABET, k=44))
+        sui = "0x" + "".join(rng.choices(HEX_DIGITS, k=64))
+        return evm, sol, sui, f"wallet-{i}" if i % 4 else ""
+
+    single_path = os.path.join(directory, "single.csv")
+    multi_path = os.path.join(directory, "multi.csv")
+    with open(single_path, 'w', encoding='utf-8', newline='') as single, \
+            open(multi_path, 'w', encoding='utf-8', newline='') as multi:
+        single.write("Address,Label\n")
+        multi.write("EVM,SOL,SUI\n")
+        for i in range(rows):
+            evm, sol, sui, label = random_row(i)
+            single.write(f"{evm},{label}\n")
+            multi.write(f"{evm},{sol},{sui}\n")
+    cases = {"单列CSV (address,label)": (single_path, None, ["legacy", "streaming"]),
+             "多列CSV (取sol列)": (multi_path, "sol", ["legacy", "streaming"])}
+    if xlsx_rows:
+        from openpyxl import Workbook
+        xlsx_path = os.path.join(directory, "multi.xlsx")
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(["EVM", "SOL", "SUI", "Label"])
+        for i in range(xlsx_rows):
+            sheet.append(random_row(i))
+        workbook.save(xlsx_path)
+        cases["多列XLSX (取sol列)"] = (xlsx_path, "sol", ["legacy", "openpyxl", "calamine"])
+    return cases
+
+
+def run_case(loader: str, file_path: str, column: str | None) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--worker", loader, file_path]
+    if column:
+        command.append(column)
+    proc = subprocess.run(command, capture_output=True, text=True, cwd=REPO_ROOT)
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"退出码 {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        run_worker(sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else None)
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="CSV 文件的行数")
+    parser.add_argument("--xlsx-rows", type=int, default=200_000, help="XLSX 文件的行数，0为不测试 XLSX")
+    parser.add_argument("--skip-legacy", action="store_true", help="不运行旧实现 (需要 pandas)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"生成测试文件 (CSV {args.rows} 行，XLSX {args.xlsx_rows} 行)...")
+        cases = write_files(directory, args.rows, args.xlsx_rows)
+        for case_name, (file_path, column, loaders) in cases.items():
+            size_mb = os.path.getsize(file_path) / 1024 / 1024
+            print(f"\n{case_name}: {size_mb:.1f} MB")
+            results = {}
+            for loader in loaders:
+                if loader == "legacy" and args.skip_legacy:
+                    continue
+                result = results[loader] = run_case(loader, file_path, column)
+                if 'error' in result:
+                    print(f"  {loader:<10} 失败: {result['error']}")
+                    continue
+                rss = "-" if result['rss_increase_mb'] is None else f"{result['rss_increase_mb']:.0f} MB"
+                print(f"  {loader:<10} {result['seconds']:8.2f} s   峰值内存增长 {rss:>8}   {result['count']} 条")
+            legacy = results.pop("legacy", None)
+            if not legacy or 'error' in legacy:
+                continue
+            for loader, result in results.items():
+                if 'error' in result:
+                    continue
+                if legacy['digest'] != result['digest']:
+                    print(f"  警告: {loader} 与旧实现提取的结果不一致")
+                memory = ""
+                if legacy['rss_increase_mb'] and result['rss_increase_mb']:
+                    memory = f"，内存 {legacy['rss_increase_mb'] / result['rss_increase_mb']:.1f}x"
+                print(f"  {loader}: 加速 {legacy['seconds'] / result['seconds']:.1f}x{memory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
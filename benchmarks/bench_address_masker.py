@@ -0,0 +1,107 @@
+"""
+地址打码微基准: 旧实现 (四个正则依次 finditer + 字符列表拼接) 与 address_masker 的单次 re.sub 对比。
+
+新旧实现对 Base58 地址 (SOL 等) 的结果可能不同: 旧实现先对整段文本应用 BTC 正则，
+会从地址中间的 '1' 或 '3' 开始匹配，只打码地址的后半段；新实现在同一位置按优先级匹配，完整打码。
+
+用法:
+    python benchmarks/bench_address_masker.py
+    python benchmarks/bench_address_masker.py --lines 2000 --repeat 7
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import timeit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from address_masker import mask_address, mask_addresses_in_text  # noqa: E402
+
+LEGACY_PATTERNS = [
+    r'(0x[a-fA-F0-9]{40})',
+    r'([13][a-zA-Z0-9]{25,34}|bc1[a-zA-Z0-9]{25,90})',
+    r'(T[a-zA-Z0-9]{33})',
+    r'([1-9A-HJ-NP-Za-km-z]{32,44})'
+]
+
+
+def legacy_mask(text):
+    """main_qt.WithdrawalHelper._mask_addresses_in_text 的原实现。"""
+    original_text = text
+    for pattern in LEGACY_PATTERNS:
+        matches = list(re.finditer(pattern, original_text))
+        temp_text = list(original_text)
+        current_offset = 0
+        for match in matches:
+            original_addr = match.group(1)
+            if '...' in original_addr:
+                continue
+            masked_addr = f"{original_addr[:8]}...{original_addr[-6:]}"
+            start = match.start(1) + current_offset
+            end = match.end(1) + current_offset
+            temp_text[start:end] = list(masked_addr)
+            current_offset += len(masked_addr) - len(original_addr)
+        original_text = "".join(temp_text)
+    return original_text
+
+
+def _random_evm(rng):
+    return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40))
+
+
+def _random_sol(rng):
+    alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    return rng.choice("ABCDEFGHJKLMNPQRSUVWXYZ") + "".join(rng.choice(alphabet) for _ in range(43))
+
+
+def build_log_lines(count: int, address_count: int, seed: int = 7) -> tuple[list[str], list[str]]:
+    """生成与提币流程日志相似的文本行 (大部分行含一个地址，部分行不含地址)。"""
+    rng = random.Random(seed)
+    addresses = [(_random_evm if i % 3 else _random_sol)(rng) for i in range(address_count)]
+    templates = [
+        "[12:00:{s:02d}] [INFO]:   -> 准备调用API提币: 1.{n:06d} USDT 到 {addr}...",
+        "[12:00:{s:02d}] [SUCCESS]: 地址 {addr} (第 {n} 个) 提币成功: 8f1c{n:06d}",
+        "[12:00:{s:02d}] [WARNING]: 余额不足 (需要: 12.5, 可用: 3.1)，跳过地址 {addr} (第 {n} 个)",
+        "[12:00:{s:02d}] [INFO]: 下一次提币前等待 {n} 秒...",
+        "[12:00:{s:02d}] [DEBUG]: [{n}/500] 处理地址: wallet-{n} ({addr})，计划数量: 1.2 USDT",
+    ]
+    lines = [rng.choice(templates).format(s=i % 60, n=i, addr=rng.choice(addresses)) for i in range(count)]
+    return lines, addresses
+
+
+def bench(func, items, repeat: int) -> float:
+    """返回处理全部 items 一次的中位耗时 (毫秒)。"""
+    timer = timeit.Timer(lambda: [func(item) for item in items])
+    return statistics.median(timer.repeat(repeat=repeat, number=1)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1000, help="日志行数")
+    parser.add_argument("--addresses", type=int, default=200, help="不同地址的数量")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lines, addresses = build_log_lines(args.lines, args.addresses)
+    mismatches = sum(1 for line in lines if legacy_mask(line) != mask_addresses_in_text(line))
+
+    legacy_ms = bench(legacy_mask, lines, args.repeat)
+    new_ms = bench(mask_addresses_in_text, lines, args.repeat)
+    print(f"日志行 ({args.lines} 行): 旧实现 {legacy_ms:.2f} ms，新实现 {new_ms:.2f} ms，"
+          f"加速 {legacy_ms / new_ms:.1f}x (与旧实现输出不同 {mismatches} 行，见模块说明)")
+
+    rows = addresses * max(1, args.lines // len(addresses)) # 地址列表反复打码同一批地址
+    legacy_ms = bench(legacy_mask, rows, args.repeat)
+    mask_address.cache_clear()
+    new_ms = bench(mask_address, rows, args.repeat)
+    print(f"单个地址 ({len(rows)} 次，{len(addresses)} 个不同地址): 旧实现 {legacy_ms:.2f} ms，"
+          f"新实现 (LRU) {new_ms:.2f} ms，加速 {legacy_ms / new_ms:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+端到端批量提币吞吐基准: WithdrawalEngine + BinanceAPI/OKXAPI 对本地模拟交易所 (mock_exchange_server.py)。
+
+提币间隔设为0，默认关闭客户端令牌桶限频 (--rate-limit 开启，此时吞吐受交易所限频上限约束)，依次测量 100、1000、10000 个地址的:
+地址/秒、每笔提币的API请求数 (模拟服务器实际收到的请求)、单笔处理耗时 p50/p95、进程峰值内存 (RSS)。
+另外测量地址导入 (address_loader)、地址验证 (AddressValidator) 和日志渲染 (打码 + HTML，有 PyQt6 时包括写入 QTextEdit)。
+
+结果保存为JSON，便于在不同提交之间比较:
+    python benchmarks/bench_batch_throughput.py --output bench.json
+    git checkout <另一个提交>
+    python benchmarks/bench_batch_throughput.py --compare bench.json
+
+用法:
+    python benchmarks/bench_batch_throughput.py
+    python benchmarks/bench_batch_throughput.py --sizes 100 1000 --exchange OKX --latency-ms 20
+    python benchmarks/bench_batch_throughput.py --skip-engine --import-rows 100000
+
+需要 python-binance / python-okx (引擎部分)、pandas (导入)、base58 (验证)；缺少依赖的部分会被跳过并在结果中注明。
+峰值RSS是进程启动以来的最大值，各部分按规模从小到大运行，因此每一项反映的是运行到该项为止的峰值。
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from configparser import ConfigParser
+from datetime import datetime
+from decimal import Decimal
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from address_masker import mask_addresses_in_text  # noqa: E402
+from mock_exchange_server import MockExchangeConfig, MockExchangeServer  # noqa: E402
+
+DEFAULT_SIZES = (100, 1000, 10000)
+# 交易所 -> (网络, 币种, 最小数量, 最大数量)，与模拟服务器的默认币种配置对应
+EXCHANGE_TARGETS = {
+    "Binance": ("TRX", "USDT", Decimal('11'), Decimal('12')),
+    "OKX": ("TRC20", "USDT", Decimal('11'), Decimal('12')),
+}
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+LOG_LEVEL_COLORS = {"ERROR": "#E74C3C", "WARNING": "#F39C12", "SUCCESS": "#2ECC71", "CRITICAL": "#FF0000", "DEBUG": "#888888"}
+# 比较结果时越小越好的指标 (其余越大越好)
+LOWER_IS_BETTER = ("seconds", "ms", "api_calls_per_withdrawal", "peak_rss_mb")
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1) # macOS 单位为字节，Linux 为KB
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def random_evm(rng: random.Random) -> str:
+    return "0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40))
+
+
+def random_tron(rng: random.Random) -> str:
+    return "T" + "".join(rng.choice(BASE58_ALPHABET) for _ in range(33))
+
+
+def random_solana(rng: random.Random) -> str:
+    return rng.choice("ABCDEFGHJKLMNPQRSUVWXYZ") + "".join(rng.choice(BASE58_ALPHABET) for _ in range(43))
+
+
+def git_commit() -> str | None:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True)
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+
+# --- 引擎 ---
+
+def bench_engine(exchange_name: str, size: int, mock_config: MockExchangeConfig, rate_limit: bool) -> dict:
+    from binance_exchange import BinanceAPI
+    from okx_exchange import OKXAPI
+    from retry_policy import RetryPolicy
+    from withdrawal_engine import WithdrawalEngine
+
+    network, coin, min_amount, max_amount = EXCHANGE_TARGETS[exchange_name]
+    api_class = {"Binance": BinanceAPI, "OKX": OKXAPI}[exchange_name]
+    logger = logging.getLogger("bench")
+    rng = random.Random(size)
+    targets = [{'address': random_tron(rng), 'label': f"w{i}"} for i in range(size)]
+
+    with MockExchangeServer(mock_config) as server:
+        config = ConfigParser()
+        config['GENERAL'] = {}
+        config[exchange_name.upper()] = {'api_key': "bench", 'api_secret': "bench", 'passphrase': "bench",
+                                         'base_url': server.base_url}
+        api = api_class(config, logger)
+        if not rate_limit:
+            api.rate_limiter = None
+        connected, message = api.connect()
+        if not connected:
+            raise RuntimeError(f"连接模拟交易所失败: {message}")
+
+        item_times: list[float] = []
+        last = [0.0]
+
+        def on_progress(_processed, _total):
+            now = time.perf_counter()
+            item_times.append((now - last[0]) * 1000)
+            last[0] = now
+
+        engine = WithdrawalEngine(api, exchange_name, logger, log=lambda message, level: None, on_progress=on_progress,
+                                  retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05, budget=size),
+                                  rng=random.Random(1))
+        engine.reconcile_delays = (0.0,)
+        start = time.perf_counter()
+        plan = engine.prepare(coin, network, targets, min_amount, max_amount)
+        requests_before = sum(server.state.request_counts.values())
+        execute_start = last[0] = time.perf_counter()
+        stats = engine.execute(plan, 0, 0)
+        end = time.perf_counter()
+        requests = sum(server.state.request_counts.values()) - requests_before
+        api.close()
+
+    withdrawals = stats.succeeded + stats.failed
+    return {
+        'exchange': exchange_name, 'size': size,
+        'seconds': round(end - start, 3), 'prepare_seconds': round(execute_start - start, 3),
+        'addresses_per_second': round(size / (end - execute_start), 1),
+        'succeeded': stats.succeeded, 'failed': stats.failed, 'skipped': stats.skipped, 'retries': stats.retries,
+        'balance_queries': stats.balance_queries,
+        'api_calls': requests, 'api_calls_per_withdrawal': round(requests / withdrawals, 2) if withdrawals else None,
+        'p50_item_ms': round(percentile(item_times, 50), 2), 'p95_item_ms': round(percentile(item_times, 95), 2),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+# --- 导入和验证 ---
+
+def bench_import(rows: int) -> dict:
+    from address_loader import load_addresses
+    rng = random.Random(rows)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "addresses.csv")
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write("address,label\n")
+            for i in range(rows):
+                f.write(f"{random_evm(rng)},wallet-{i}\n")
+        start = time.perf_counter()
+        addresses, _address_type, _columns = load_addresses(path)
+        seconds = time.perf_counter() - start
+    return {'rows': rows, 'loaded': len(addresses), 'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds, 1), 'peak_rss_mb': peak_rss_mb()}
+
+
+def bench_validation(count: int) -> list[dict]:
+    from address_validator import AddressValidator
+    rng = random.Random(count)
+    results = []
+    for coin, generator in (("ETH", random_evm), ("SOL", random_solana)):
+        addresses = [generator(rng) for _ in range(count)]
+        start = time.perf_counter()
+        AddressValidator.batch_validate_addresses(coin, addresses)
+        seconds = time.perf_counter() - start
+        results.append({'coin': coin, 'count': count, 'seconds': round(seconds, 4),
+                        'addresses_per_second': round(count / seconds, 1)})
+    return results
+
+
+# --- 日志渲染 ---
+
+def render_log_entry(message: str, level: str) -> str:
+    """与 main_qt.WithdrawalHelper.log_message 相同的格式化: 时间戳、打码、着色。"""
+    log_entry = f"{datetime.now().strftime('[%H:%M:%S]')} [{level.upper()}]: {message}"
+    log_entry = mask_addresses_in_text(log_entry)
+    return f'<span style="color:{LOG_LEVEL_COLORS.get(level.upper(), "#AAAAAA")};">{log_entry}</span>'
+
+
+def bench_log_rendering(lines: int) -> dict:
+    rng = random.Random(lines)
+    messages = [(f"地址 {random_evm(rng)} (第 {i} 个) 提币成功: mock{i:08d}", "SUCCESS") if i % 3
+                else (f"[{i}/{lines}] 处理地址: w{i} ({random_tron(rng)})，计划数量: 11.5 USDT", "INFO")
+                for i in range(lines)]
+    start = time.perf_counter()
+    rendered = [render_log_entry(message, level) for message, level in messages]
+    format_seconds = time.perf_counter() - start
+    result = {'lines': lines, 'format_seconds': round(format_seconds, 4),
+              'format_lines_per_second': round(lines / format_seconds, 1)}
+
+    try:
+        if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication, QTextEdit
+        from log_sink import BatchedLogSink
+    except ImportError as e:
+        result['widget'] = f"跳过: {e}"
+        return result
+    app = QApplication.instance() or QApplication([])
+    text_edit = QTextEdit()
+    sink = BatchedLogSink(text_edit)
+    start = time.perf_counter()
+    for i, html in enumerate(rendered):
+        sink.post(html)
+        if i % 200 == 199: # 约等于100ms刷新间隔内到达的行数
+            sink.flush()
+    sink.stop()
+    app.processEvents()
+    widget_seconds = time.perf_counter() - start
+    result.update({'widget_seconds': round(widget_seconds, 4), 'widget_lines_per_second': round(lines / widget_seconds, 1),
+                   'widget_blocks': text_edit.document().blockCount()})
+    return result
+
+
+# --- 汇总 ---
+
+def run_section(results: dict, name: str, func, *args):
+    try:
+        value = func(*args)
+    except ImportError as e:
+        value = {'skipped': f"缺少依赖: {e}"}
+    except Exception as e:
+        value = {'error': f"{type(e).__name__}: {e}"}
+    results.setdefault(name, []).extend(value if isinstance(value, list) else [value])
+    for entry in value if isinstance(value, list) else [value]:
+        print(f"[{name}] " + ", ".join(f"{key}={val}" for key, val in entry.items()))
+
+
+def _entry_key(section: str, entry: dict) -> tuple:
+    return section, entry.get('exchange'), entry.get('size'), entry.get('rows'), entry.get('coin'), entry.get('lines')
+
+
+def compare(results: dict, baseline: dict):
+    """打印与基线结果相比的变化 (正数表示变好)。"""
+    print(f"\n与基线 {baseline.get('meta', {}).get('commit')} 比较:")
+    baseline_entries = {_entry_key(section, entry): entry
+                        for section, entries in baseline.items() if section != 'meta' for entry in entries}
+    for section, entries in results.items():
+        if section == 'meta':
+            continue
+        for entry in entries:
+            old = baseline_entries.get(_entry_key(section, entry))
+            if not old:
+                continue
+            changes = []
+            for key, value in entry.items():
+                old_value = old.get(key)
+                if not isinstance(value, (int, float)) or not isinstance(old_value, (int, float)) or not old_value \
+                        or key in ('size', 'rows', 'lines', 'count'):
+                    continue
+                change = (value - old_value) / old_value * 100
+                if any(marker in key for marker in LOWER_IS_BETTER):
+                    change = -change
+                changes.append(f"{key} {old_value} -> {value} ({change:+.1f}%)")
+            label = " ".join(str(part) for part in _entry_key(section, entry)[1:] if part is not None)
+            print(f"  [{section} {label}] " + "; ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="引擎基准的地址数量")
+    parser.add_argument("--exchange", choices=sorted(EXCHANGE_TARGETS), nargs="+", default=["Binance"])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="模拟服务器每个请求的延迟")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟服务器返回503的概率")
+    parser.add_argument("--rate-limit", action="store_true", help="启用客户端令牌桶限频")
+    parser.add_argument("--import-rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--validate-count", type=int, default=10000)
+    parser.add_argument("--log-lines", type=int, default=10000)
+    parser.add_argument("--skip-engine", action="store_true")
+    parser.add_argument("--output", help="结果JSON的保存路径")
+    parser.add_argument("--compare", help="与之比较的基线结果JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("bench").setLevel(logging.CRITICAL) # 交易所层的日志不计入基准
+    results = {'meta': {'commit': git_commit(), 'time': datetime.now().isoformat(timespec='seconds'),
+                        'python': platform.python_version(), 'platform': platform.platform(),
+                        'latency_ms': args.latency_ms, 'error_rate': args.error_rate, 'rate_limit': args.rate_limit}}
+
+    if not args.skip_engine:
+        for exchange_name in args.exchange:
+            for size in sorted(args.sizes):
+                mock_config = MockExchangeConfig(latency_ms=args.latency_ms, error_rate=args.error_rate, seed=size)
+                run_section(results, 'engine', bench_engine, exchange_name, size, mock_config, args.rate_limit)
+    for rows in sorted(args.import_rows):
+        run_section(results, 'import', bench_import, rows)
+    run_section(results, 'validation', bench_validation, args.validate_count)
+    run_section(results, 'log_rendering', bench_log_rendering, args.log_lines)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
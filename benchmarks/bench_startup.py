@@ -0,0 +1,132 @@
+"""
+启动耗时基准: 模块导入耗时 (python -X importtime) 与首个窗口显示耗时。
+
+用法:
+    python benchmarks/bench_startup.py            # 当前工作区
+    python benchmarks/bench_startup.py --repeat 5 --top 15
+
+对比优化前后: 在两个提交上分别运行 (例如 git stash / git checkout <commit>)，比较输出。
+首个窗口耗时在子进程中测量: 导入 main_qt 并在 offscreen Qt 下构造主窗口。子进程的主目录指向
+临时目录并写入存根配置，不会读写真实配置；连接交易所API的初始化步骤被跳过，不发任何网络请求。
+需要可用的 PyQt6。
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(\s*)(\S+)")
+STARTUP_LINE = re.compile(r"STARTUP imports_ms=([\d.]+) first_window_ms=([\d.]+)")
+
+
+def measure_imports(module: str) -> tuple[float, list[tuple[str, float]]]:
+    """返回 (总导入耗时ms, [(顶层包, 累计耗时ms), ...])。"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    per_package: dict[str, float] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        if indent == "": # 顶层导入，累计时间已包含其子模块
+            total_us += cumulative_us
+            package = name.split(".")[0]
+            per_package[package] = per_package.get(package, 0) + cumulative_us / 1000
+    return total_us / 1000, sorted(per_package.items(), key=lambda item: item[1], reverse=True)
+
+
+STUB_CONFIG = """[GENERAL]
+last_selected_exchange = Binance
+
+[BINANCE]
+api_key =
+api_secret =
+
+[WITHDRAWAL]
+enable_warning = false
+"""
+
+
+def first_window_child() -> int:
+    """子进程: 导入 main_qt、构造并显示主窗口，事件循环开始后输出耗时并退出。"""
+    start = time.perf_counter()
+    sys.path.insert(0, REPO_ROOT)
+    import main_qt
+    imports_done = time.perf_counter()
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    # 只测量窗口构造和首次显示，不连接交易所 (价格数据源和主交易所API都不初始化)
+    main_qt.WithdrawalHelper._start_price_provider_init = lambda self: None
+    main_qt.WithdrawalHelper._initialize_api_for_exchange = lambda self, exchange_name: None
+    app = QApplication([])
+    window = main_qt.WithdrawalHelper()
+    window.show()
+
+    def report():
+        print(f"STARTUP imports_ms={(imports_done - start) * 1000:.1f} "
+              f"first_window_ms={(time.perf_counter() - start) * 1000:.1f}", flush=True)
+        app.quit()
+
+    QTimer.singleShot(0, report) # 事件循环开始后的第一个回调，此时主窗口已完成首次显示
+    return app.exec()
+
+
+def measure_first_window() -> tuple[float, float] | None:
+    with tempfile.TemporaryDirectory() as home:
+        app_data_dir = os.path.join(home, "Documents", "MultiWithdrawalHelper")
+        os.makedirs(app_data_dir)
+        with open(os.path.join(app_data_dir, "config.ini"), "w", encoding="utf-8") as f:
+            f.write(STUB_CONFIG)
+        env = dict(os.environ, HOME=home, USERPROFILE=home, QT_QPA_PLATFORM="offscreen")
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--first-window-child"],
+                              cwd=home, capture_output=True, text=True, env=env, timeout=120) # app.log 写在工作目录
+    match = STARTUP_LINE.search(proc.stdout)
+    if not match:
+        return None
+    return float(match.group(1)), float(match.group(2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--module", default="main_qt")
+    parser.add_argument("--first-window-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.first_window_child:
+        return first_window_child()
+
+    totals = []
+    breakdown = []
+    for _ in range(args.repeat):
+        try:
+            total, breakdown = measure_imports(args.module)
+        except RuntimeError as e:
+            print(f"导入 {args.module} 失败: {e}")
+            return 1
+        totals.append(total)
+    print(f"import {args.module}: 中位数 {statistics.median(totals):.1f} ms (共 {args.repeat} 次)")
+    for package, ms in breakdown[:args.top]:
+        print(f"  {package:<24} {ms:8.1f} ms")
+
+    windows = [result for result in (measure_first_window() for _ in range(args.repeat)) if result]
+    if windows:
+        print(f"首个窗口显示: 中位数 {statistics.median(w[1] for w in windows):.1f} ms "
+              f"(其中模块导入 {statistics.median(w[0] for w in windows):.1f} ms)")
+    else:
+        print("首个窗口显示: 无法测量 (需要 PyQt6)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
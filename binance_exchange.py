@@ -1,24 +1,322 @@
 import time
-from binance.client import Client
-from binance.exceptions import BinanceAPIException, BinanceOrderException
+import threading
+from dataclasses import dataclass, field
 from decimal import Decimal, ROUND_DOWN
 import logging
 from configparser import ConfigParser
-from exchange_api_base import BaseExchangeAPI
+from exchange_api_base import (BaseExchangeAPI, ErrorClassification, RetryableExchangeError,
+                               WithdrawalUncertainError)
+from rate_limiter import BucketSpec, SCOPE_IP, SCOPE_ACCOUNT
+
+# python-binance 体积较大，在 BinanceAPI.connect() 时才导入 (见 _load_binance_sdk)。
+# 导入前 BinanceAPIException / BinanceOrderException 是永远不会被抛出的占位类，保证 except 子句可以正常求值。
+Client = None
+
+class BinanceAPIException(Exception):
+    status_code = None
+    code = None
+    message = ""
+
+
+class BinanceOrderException(Exception):
+    message = ""
+
+
+def _load_binance_sdk():
+    global Client, BinanceAPIException, BinanceOrderException
+    if Client is None:
+        from binance.client import Client as _Client
+        from binance.exceptions import BinanceAPIException as _BinanceAPIException
+        from binance.exceptions import BinanceOrderException as _BinanceOrderException
+        BinanceAPIException = _BinanceAPIException
+        BinanceOrderException = _BinanceOrderException
+        Client = _Client
+    return Client
+
+
+def _client_class_for(base_url: str):
+    """
+    base_url 为空时返回 SDK 的 Client；否则返回把所有REST请求发往 base_url 的子类
+    (例如 mock_exchange_server.py)。在类属性上替换地址，构造时的 ping 也不会访问真实服务器。
+    """
+    client_class = _load_binance_sdk()
+    if not base_url:
+        return client_class
+    base_url = base_url.rstrip('/')
+    return type("BaseUrlClient", (client_class,), {
+        'API_URL': f"{base_url}/api",
+        'API_TESTNET_URL': f"{base_url}/api",
+        'MARGIN_API_URL': f"{base_url}/sapi",
+        'WEBSITE_URL': base_url,
+    })
+
+
+# 可以直接重试的错误码 (请求未被处理): -1003 请求过多, -1021 时间戳超出 recvWindow (重试前会重新同步时间偏移)
+BINANCE_RETRYABLE_ERROR_CODES = {-1003, -1021}
+BINANCE_TIMESTAMP_ERROR_CODE = -1021
+# 结果未知的错误码 (请求可能已被处理): -1001 内部连接断开, -1006 意外响应, -1007 等待后端超时
+BINANCE_AMBIGUOUS_ERROR_CODES = {-1001, -1006, -1007}
+
+# 提现历史中表示交易所已取消/拒绝/失败的状态码 (1: 已取消, 3: 已拒绝, 5: 失败)
+BINANCE_WITHDRAW_FAILED_STATUSES = (1, 3, 5)
+
 
 # 自定义币安特定的异常，如果需要的话
 class BinanceExchangeAPIException(Exception):
     pass
 
+
+@dataclass(frozen=True)
+class NetworkInfo:
+    """币安单个币种在某一网络上的提现参数 (来自 capital/config/getall)."""
+    coin: str
+    network: str
+    withdraw_enable: bool
+    withdraw_fee: str | None
+    withdraw_min: str | None
+    withdraw_integer_multiple: str | None
+    raw: dict = field(default_factory=dict, compare=False, hash=False, repr=False)
+
+    @classmethod
+    def from_raw(cls, coin: str, net_info: dict) -> "NetworkInfo":
+        return cls(
+            coin=coin.upper(),
+            network=str(net_info.get('network', '')).upper(),
+            withdraw_enable=bool(net_info.get('withdrawEnable')),
+            withdraw_fee=net_info.get('withdrawFee'),
+            withdraw_min=net_info.get('withdrawMin'),
+            withdraw_integer_multiple=net_info.get('withdrawIntegerMultiple'),
+            raw=net_info,
+        )
+
+
+class BinanceCoinMetadataStore:
+    """
+    币安币种/网络元数据的内存缓存。
+
+    get_all_coins_info() 的返回体包含数千个币种。这里只拉取一次并建立
+    {(coin, network): NetworkInfo} 索引，查询网络、手续费、精度时都直接读内存，
+    超过 TTL 或被显式 invalidate() 后才会重新拉取。刷新失败时如果已有旧数据，
+    则继续使用旧数据，避免一次网络抖动让整个UI失去币种信息。
+    seed() 载入的磁盘快照只供界面读取 (币种/网络列表、手续费显示)；get_network() 等
+    提币参数查询默认要求至少成功拉取过一次实时数据，否则抛出异常。
+    """
+
+    DEFAULT_TTL_SECONDS = 300
+    INFLIGHT_WAIT_SECONDS = 30 # 等待其它线程进行中的刷新的最长时间
+
+    def __init__(self, fetch_func, logger: logging.Logger, ttl: float = DEFAULT_TTL_SECONDS):
+        self._fetch_func = fetch_func # 返回原始 coins info 列表的可调用对象
+        self.logger = logger
+        self.ttl = ttl
+        self._lock = threading.Lock() # 只保护索引的读写，下载期间不持有
+        self._coins_info: list = []
+        self._networks: dict[tuple[str, str], NetworkInfo] = {}
+        self._coin_networks: dict[str, list[NetworkInfo]] = {}
+        self._loaded_at: float | None = None
+        self._from_snapshot = False # 当前数据来自磁盘快照，尚未被实时数据替换
+        self._inflight: threading.Event | None = None
+        self._last_error: Exception | None = None # 最近一次刷新失败的原因
+
+    def invalidate(self):
+        """标记缓存失效，下次访问时重新拉取。"""
+        with self._lock:
+            self._loaded_at = None
+        self.logger.debug("币安元数据缓存已失效。")
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or (time.monotonic() - self._loaded_at) >= self.ttl
+
+    @property
+    def from_snapshot(self) -> bool:
+        return self._from_snapshot
+
+    def refresh(self):
+        """
+        立即从交易所拉取并重建索引。失败时抛出原始异常。
+        同一时刻只有一个线程真正去请求 (single-flight)，其他线程等待该请求完成后
+        共享其结果；下载期间不持有锁，界面读取快照数据不会被阻塞。
+        """
+        with self._lock:
+            event = self._inflight
+            leader = event is None
+            if leader:
+                event = threading.Event()
+                self._inflight = event
+        if not leader:
+            self.logger.debug("币安元数据缓存: 等待进行中的刷新请求。")
+            if not event.wait(self.INFLIGHT_WAIT_SECONDS):
+                raise BinanceExchangeAPIException(f"等待币安元数据刷新超时 ({self.INFLIGHT_WAIT_SECONDS} 秒)")
+            with self._lock:
+                error = self._last_error
+            if error is not None:
+                raise error
+            return
+        try:
+            try:
+                raw = self._fetch_func()
+                if not isinstance(raw, list):
+                    raise BinanceExchangeAPIException(f"get_all_coins_info() 返回的不是列表，而是: {type(raw)}")
+            except Exception as e:
+                # 记录下来，让等待同一次刷新的其它线程也能得到失败原因
+                with self._lock:
+                    self._last_error = e
+                raise
+            with self._lock:
+                self._build_index(raw)
+                self._loaded_at = time.monotonic()
+                self._from_snapshot = False
+                self._last_error = None
+            self.logger.info(f"币安元数据缓存已刷新: {len(self._coins_info)} 个币种, {len(self._networks)} 个币种-网络组合。")
+        finally:
+            with self._lock:
+                self._inflight = None
+            event.set()
+
+    def _build_index(self, raw: list):
+        networks = {}
+        coin_networks = {}
+        for coin_info in raw:
+            if not isinstance(coin_info, dict) or 'coin' not in coin_info:
+                continue
+            coin = str(coin_info['coin']).upper()
+            net_list = coin_info.get('networkList')
+            if not isinstance(net_list, list):
+                continue
+            entries = coin_networks.setdefault(coin, [])
+            for net_info in net_list:
+                if not isinstance(net_info, dict) or not net_info.get('network'):
+                    continue
+                info = NetworkInfo.from_raw(coin, net_info)
+                networks[(coin, info.network)] = info
+                entries.append(info)
+        self._coins_info = raw
+        self._networks = networks
+        self._coin_networks = coin_networks
+
+    def _ensure_fresh(self, force_refresh: bool = False, live: bool = False):
+        """live=True 时不接受快照数据: 快照尚未被实时数据替换时必须刷新成功，否则抛出异常。"""
+        with self._lock:
+            if not force_refresh and not self.is_stale():
+                return
+            if not force_refresh and not live and self._from_snapshot:
+                return # 界面读取直接使用快照，由后台验证替换为实时数据
+        try:
+            self.refresh()
+        except Exception as e:
+            with self._lock:
+                if (self._loaded_at is None and not self._coins_info) or (live and self._from_snapshot):
+                    raise
+                if self._from_snapshot:
+                    # 快照不推迟刷新时间，下次提币参数查询仍会重新拉取
+                    self.logger.warning(f"刷新币安元数据失败，界面继续使用快照数据: {e}")
+                    return
+                # 已有旧的实时数据时继续使用，并推迟下次刷新，避免连续失败时反复请求
+                self._loaded_at = time.monotonic()
+            self.logger.warning(f"刷新币安元数据失败，继续使用旧缓存: {e}")
+
+    def seed(self, raw: list):
+        """用快照数据填充缓存。快照视为已过期: 只供界面读取，提币参数查询仍会拉取实时数据。"""
+        with self._lock:
+            self._build_index(raw)
+            self._loaded_at = None
+            self._from_snapshot = True
+        self.logger.info(f"币安元数据缓存已从快照载入: {len(self._coins_info)} 个币种。")
+
+    def get_coins_info(self, force_refresh: bool = False) -> list:
+        self._ensure_fresh(force_refresh)
+        return self._coins_info
+
+    def get_network(self, coin: str, network: str, live: bool = True) -> NetworkInfo | None:
+        """查询提币参数 (手续费、精度、最小额)。默认只使用实时数据；live=False 仅供界面显示，接受快照数据。"""
+        self._ensure_fresh(live=live)
+        return self._networks.get((coin.upper(), network.upper()))
+
+    def get_coin_networks(self, coin: str, live: bool = False) -> list[NetworkInfo] | None:
+        """返回币种的全部网络；币种不存在时返回 None。live=True 时不接受快照数据。"""
+        self._ensure_fresh(live=live)
+        return self._coin_networks.get(coin.upper())
+
 class BinanceAPI(BaseExchangeAPI):
     """币安交易所API实现"""
 
-    def __init__(self, config: ConfigParser, logger: logging.Logger):
-        super().__init__(config, logger)
+    DEFAULT_CONFIG_SECTION = "BINANCE"
+
+    # 权重取自币安API文档: /api 按IP每分钟6000，/sapi 按IP每分钟12000、按UID每分钟180000。
+    # 提现记录 (GET /sapi/v1/capital/withdraw/history) 单独按UID每秒限频: 权重18000/每秒180000，即每秒10次
+    RATE_LIMIT_EXCHANGE = "Binance"
+    RATE_LIMIT_BUCKETS = {
+        'api_ip': BucketSpec(6000, 60, SCOPE_IP),
+        'sapi_ip': BucketSpec(12000, 60, SCOPE_IP),
+        'sapi_uid': BucketSpec(180000, 60, SCOPE_ACCOUNT),
+        'withdraw_history_uid': BucketSpec(10, 1, SCOPE_ACCOUNT),
+    }
+    RATE_LIMIT_ENDPOINTS = {
+        'ping': [('api_ip', 1)],
+        'time': [('api_ip', 1)],
+        'account': [('api_ip', 20)], # get_asset_balance -> GET /api/v3/account
+        'ticker_price': [('api_ip', 2)],
+        'capital_config_getall': [('sapi_ip', 10)],
+        'funding_wallet': [('sapi_ip', 1)],
+        'withdraw_apply': [('sapi_uid', 600)],
+        'withdraw_history': [('withdraw_history_uid', 1)],
+    }
+    # 响应头中的已用权重 -> 对应的令牌桶
+    USED_WEIGHT_HEADERS = {
+        'x-mbx-used-weight-1m': 'api_ip',
+        'x-sapi-used-ip-weight-1m': 'sapi_ip',
+        'x-sapi-used-uid-weight-1m': 'sapi_uid',
+    }
+
+    def __init__(self, config: ConfigParser, logger: logging.Logger, config_section: str | None = None):
+        super().__init__(config, logger, config_section)
         self.api_key = None
         self.api_secret = None
         self.client = None # Will be initialized in connect()
         self.timestamp_error_detected = False # 新增标志位
+        # 币种/网络元数据缓存，所有查询网络、手续费、精度的方法共用
+        self.metadata_store = BinanceCoinMetadataStore(
+            lambda: self._call('capital_config_getall', self.client.get_all_coins_info), logger)
+
+    def _on_rate_limit_feedback(self, endpoint: str, result, error: Exception | None):
+        """读取币安响应头中的已用权重；收到 429/418 时按 Retry-After 暂停对应端点。"""
+        if self.rate_limiter is None or self.client is None:
+            return
+        response = getattr(self.client, 'response', None) # python-binance 会保存最近一次的 requests 响应
+        headers = getattr(response, 'headers', None) or {}
+        for header, bucket_name in self.USED_WEIGHT_HEADERS.items():
+            used = headers.get(header)
+            if used is not None:
+                try:
+                    self.rate_limiter.sync_used(bucket_name, float(used))
+                except ValueError:
+                    pass
+        status_code = getattr(error, 'status_code', None)
+        if status_code in (418, 429):
+            retry_after = self._retry_after(headers)
+            self.logger.warning(f"币安限频 (HTTP {status_code})，端点 {endpoint} 暂停 {retry_after} 秒。")
+            self.rate_limiter.block_endpoint(endpoint, retry_after)
+
+    @staticmethod
+    def _retry_after(headers, default: float = 60.0) -> float:
+        try:
+            return float(headers.get('Retry-After', default))
+        except (TypeError, ValueError):
+            return default
+
+    def classify_error(self, error: Exception | None = None, code=None, status_code: int | None = None) -> ErrorClassification:
+        if isinstance(error, BinanceAPIException):
+            status_code = error.status_code
+            code = error.code
+        if status_code in (418, 429) or code == -1003:
+            headers = getattr(getattr(self.client, 'response', None), 'headers', None) or {}
+            return ErrorClassification(retryable=True, reason=f"币安限频 (HTTP {status_code}, code {code})",
+                                       retry_after=self._retry_after(headers), code=str(code) if code is not None else None)
+        if code in BINANCE_RETRYABLE_ERROR_CODES:
+            return ErrorClassification(retryable=True, reason=f"币安临时错误 (code {code})", code=str(code))
+        if code in BINANCE_AMBIGUOUS_ERROR_CODES:
+            return ErrorClassification(retryable=True, reason=f"币安结果未知 (code {code})", ambiguous=True, code=str(code))
+        return super().classify_error(error, code, status_code)
 
     def get_server_time_offset(self) -> int:
         """
@@ -29,7 +327,7 @@ class BinanceAPI(BaseExchangeAPI):
             self.logger.error("币安客户端未初始化，无法获取服务器时间偏移。")
             return 0 # 或者抛出异常，但返回0可以避免在 connect 早期阶段崩溃
         try:
-            server_time_response = self.client.get_server_time()
+            server_time_response = self._call('time', self.client.get_server_time)
             server_time_ms = int(server_time_response['serverTime'])
             local_time_ms = int(time.time() * 1000)
             offset = local_time_ms - server_time_ms
@@ -42,9 +340,16 @@ class BinanceAPI(BaseExchangeAPI):
             self.logger.error(f"获取币安服务器时间时发生未知错误: {e}", exc_info=True)
             return 0
 
+    def resync_time_offset(self) -> int:
+        """重新计算与服务器的时间偏移，并让SDK客户端签名时使用补偿后的时间戳。"""
+        self.time_offset = self.get_server_time_offset()
+        if self.client is not None:
+            self.client.timestamp_offset = -self.time_offset # python-binance: timestamp = 本地时间 + timestamp_offset
+        return self.time_offset
+
     def connect(self) -> tuple[bool, str]:
-        self.api_key = self.config.get('BINANCE', 'api_key', fallback=None)
-        self.api_secret = self.config.get('BINANCE', 'api_secret', fallback=None)
+        self.api_key = self.config.get(self.config_section, 'api_key', fallback=None)
+        self.api_secret = self.config.get(self.config_section, 'api_secret', fallback=None)
         self.timestamp_error_detected = False # 重置标志位
 
         if not self.api_key or not self.api_secret:
@@ -52,12 +357,18 @@ class BinanceAPI(BaseExchangeAPI):
             return False, "API Key 或 Secret 未配置"
 
         try:
-            self.client = Client(self.api_key, self.api_secret)
-            self.client.ping()
+            # 可选的 base_url 把请求发往本地模拟服务器，用于无密钥的测试和压测
+            base_url = self.config.get(self.config_section, 'base_url', fallback='').strip()
+            client_class = _client_class_for(base_url)
+            self.client = client_class(self.api_key, self.api_secret)
+            if base_url:
+                self.logger.warning(f"币安API请求将发往 {base_url} (base_url)，而不是币安服务器。")
+            self.metadata_store.invalidate() # 新客户端 (可能是新账户)，丢弃旧元数据
+            self._call('ping', self.client.ping)
             self.logger.info("成功 ping 通币安服务器。")
             
             # 获取并设置时间偏移
-            self.time_offset = self.get_server_time_offset() 
+            self.resync_time_offset()
             self.logger.info(f"成功连接到币安。计算出的时间偏移已设置为: {self.time_offset} ms (本地 - 服务器)")
             # 连接成功，确保时间戳错误标志是False (尽管前面已重置，双重保险)
             self.timestamp_error_detected = False 
@@ -88,14 +399,10 @@ class BinanceAPI(BaseExchangeAPI):
         # 在尝试API调用前，不应该重置timestamp_error_detected，因为它可能由connect()设置
         # self.timestamp_error_detected = False 
         try:
-            self.logger.debug("调用 self.client.get_all_coins_info() 获取币安所有币种信息...")
-            all_coins_info = self.client.get_all_coins_info()
-            
-            if not isinstance(all_coins_info, list):
-                self.logger.error(f"self.client.get_all_coins_info() 返回的不是列表，而是: {type(all_coins_info)}。内容: {str(all_coins_info)[:200]}...") # 记录类型和部分内容
-                return []
+            self.logger.debug("通过元数据缓存获取币安所有币种信息...")
+            all_coins_info = self.metadata_store.get_coins_info()
 
-            self.logger.info(f"self.client.get_all_coins_info() 返回了 {len(all_coins_info)} 条币种原始数据。")
+            self.logger.info(f"币安元数据缓存中共有 {len(all_coins_info)} 条币种原始数据。")
             if all_coins_info: # 如果列表不为空
                 self.logger.debug(f"币种原始数据示例 (前1条): {str(all_coins_info[0])[:500]}") # 记录第一条数据的部分内容
 
@@ -131,13 +438,13 @@ class BinanceAPI(BaseExchangeAPI):
             self.logger.warning("币安客户端未初始化。")
             return None
         try:
-            spot_balance_data = self.client.get_asset_balance(asset=asset.upper())
+            spot_balance_data = self._call('account', self.client.get_asset_balance, asset=asset.upper())
             self.logger.debug(f"Binance spot balance data for {asset}: {spot_balance_data}")
             spot_free = Decimal(spot_balance_data['free']) if spot_balance_data else Decimal(0)
 
             funding_free = Decimal(0)
             try:
-                funding_assets = self.client.get_funding_wallet()
+                funding_assets = self._call('funding_wallet', self.client.funding_wallet)
                 self.logger.debug(f"Binance funding wallet assets: {funding_assets}")
                 for fund_asset_info in funding_assets:
                     if fund_asset_info['asset'].upper() == asset.upper():
@@ -163,11 +470,8 @@ class BinanceAPI(BaseExchangeAPI):
             self.logger.warning("币安客户端未初始化。")
             return []
         try:
-            all_coins_info = self.client.get_all_coins_info() # Consider caching this if called frequently
-            for coin_info in all_coins_info:
-                if coin_info['coin'] == coin:
-                    return [network['network'] for network in coin_info['networkList'] if network.get('withdrawEnable')]
-            return []
+            coin_networks = self.metadata_store.get_coin_networks(coin) or []
+            return [net.network for net in coin_networks if net.withdraw_enable]
         except BinanceAPIException as e:
             self.logger.error(f"获取币安 {coin} 网络信息失败: {e}")
             return []
@@ -180,13 +484,10 @@ class BinanceAPI(BaseExchangeAPI):
             self.logger.warning("币安客户端未初始化。")
             return None
         try:
-            all_coins_info = self.client.get_all_coins_info()
-            for coin_info in all_coins_info:
-                if coin_info['coin'] == coin:
-                    for net_info in coin_info['networkList']:
-                        if net_info['network'] == network and net_info['withdrawEnable']:
-                            # Binance provides fee as a string, asset name is the coin itself
-                            return net_info['withdrawFee'] # This is just the fee amount as string
+            net = self.metadata_store.get_network(coin, network)
+            if net and net.withdraw_enable:
+                # Binance provides fee as a string, asset name is the coin itself
+                return net.withdraw_fee # This is just the fee amount as string
             return None # Not found or not enabled
         except BinanceAPIException as e:
             self.logger.error(f"获取币安 {coin} ({network}) 提现手续费失败: {e}")
@@ -195,65 +496,68 @@ class BinanceAPI(BaseExchangeAPI):
             self.logger.error(f"获取币安 {coin} ({network}) 提现手续费时发生未知错误: {e}", exc_info=True)
             return None
 
+    def get_cached_withdrawal_fee(self, coin: str, network: str) -> tuple[str | dict | None, bool]:
+        if not self.client:
+            self.logger.warning("币安客户端未初始化。")
+            return None, False
+        try:
+            net = self.metadata_store.get_network(coin, network, live=False)
+            fee = net.withdraw_fee if net and net.withdraw_enable else None
+            return fee, self.metadata_store.from_snapshot
+        except Exception as e:
+            self.logger.error(f"读取币安 {coin} ({network}) 缓存手续费失败: {e}")
+            return None, False
+
     def get_withdraw_precision(self, coin: str, network: str) -> int | None:
         """获取币安指定币种在特定网络上的提现精度（小数位数）。"""
         if not self.client:
             self.logger.warning("币安客户端未初始化，无法获取提现精度。")
             return None
         try:
-            # 尝试从缓存获取，减少API调用 (需要实现缓存机制，暂时不加)
-            # coin_network_key = f"{coin}_{network}"
-            # if coin_network_key in self._precision_cache:
-            #    return self._precision_cache[coin_network_key]
-
-            all_coins_info = self.client.get_all_coins_info()
-            for coin_info in all_coins_info:
-                if coin_info['coin'] == coin.upper():
-                    for net_info in coin_info.get('networkList', []):
-                        if net_info.get('network') == network.upper():
-                            # 币安API通常不直接提供小数位数，而是提供最小提现单位或倍数
-                            # 1. 尝试 'withdrawIntegerMultiple' 字段 (如果存在)
-                            multiple_str = net_info.get('withdrawIntegerMultiple')
-                            if multiple_str:
-                                try:
-                                    # 去掉尾随的0和小数点来计算精度
-                                    if '.' in multiple_str:
-                                        precision = len(multiple_str.split('.')[1].rstrip('0'))
-                                    else:
-                                        precision = 0 # 是整数倍
-                                    self.logger.debug(f"通过 withdrawIntegerMultiple '{multiple_str}' 确定 {coin}-{network} 精度为: {precision}")
-                                    # TODO: Add caching
-                                    return precision
-                                except Exception as e_mul:
-                                    self.logger.warning(f"解析 withdrawIntegerMultiple '{multiple_str}' 出错: {e_mul}，尝试其他方法。")
-
-                            # 2. 尝试根据 'withdrawMin' 或 'withdrawFee' 的小数位数推断 (不太可靠)
-                            # 找到包含小数点的字段来尝试推断
-                            field_to_infer = None
-                            if net_info.get('withdrawMin') and '.' in net_info['withdrawMin']:
-                                field_to_infer = net_info['withdrawMin']
-                            elif net_info.get('withdrawFee') and '.' in net_info['withdrawFee']:
-                                field_to_infer = net_info['withdrawFee']
-                               
-                            if field_to_infer:
-                                try:
-                                    # 计算小数位数 (去掉尾随0)
-                                    precision = len(field_to_infer.split('.')[1].rstrip('0'))
-                                    self.logger.debug(f"通过字段 '{field_to_infer}' 推断 {coin}-{network} 精度为: {precision}")
-                                    # TODO: Add caching
-                                    return precision
-                                except Exception as e_infer:
-                                    self.logger.warning(f"通过字段 '{field_to_infer}' 推断精度出错: {e_infer}")
-
-                            # 3. 如果以上都失败，返回一个通用默认值或None
-                            self.logger.warning(f"无法明确确定 {coin}-{network} 的提现精度，将返回默认值 None。")
-                            return None # 或者返回一个通用默认值，如 8，但None更安全
-                    # 如果找到币但没找到网络
-                    self.logger.warning(f"在币安 {coin} 的网络列表中未找到网络 {network}。")
-                    return None
-            # 如果没找到币
-            self.logger.warning(f"在币安所有币种信息中未找到币种 {coin}。")
-            return None
+            coin_networks = self.metadata_store.get_coin_networks(coin, live=True)
+            if coin_networks is None:
+                self.logger.warning(f"在币安所有币种信息中未找到币种 {coin}。")
+                return None
+            net = self.metadata_store.get_network(coin, network)
+            if net is None:
+                self.logger.warning(f"在币安 {coin} 的网络列表中未找到网络 {network}。")
+                return None
+
+            # 币安API通常不直接提供小数位数，而是提供最小提现单位或倍数
+            # 1. 尝试 'withdrawIntegerMultiple' 字段 (如果存在)
+            multiple_str = net.withdraw_integer_multiple
+            if multiple_str:
+                try:
+                    # 去掉尾随的0和小数点来计算精度
+                    if '.' in multiple_str:
+                        precision = len(multiple_str.split('.')[1].rstrip('0'))
+                    else:
+                        precision = 0 # 是整数倍
+                    self.logger.debug(f"通过 withdrawIntegerMultiple '{multiple_str}' 确定 {coin}-{network} 精度为: {precision}")
+                    return precision
+                except Exception as e_mul:
+                    self.logger.warning(f"解析 withdrawIntegerMultiple '{multiple_str}' 出错: {e_mul}，尝试其他方法。")
+
+            # 2. 尝试根据 'withdrawMin' 或 'withdrawFee' 的小数位数推断 (不太可靠)
+            # 找到包含小数点的字段来尝试推断
+            field_to_infer = None
+            if net.withdraw_min and '.' in net.withdraw_min:
+                field_to_infer = net.withdraw_min
+            elif net.withdraw_fee and '.' in net.withdraw_fee:
+                field_to_infer = net.withdraw_fee
+
+            if field_to_infer:
+                try:
+                    # 计算小数位数 (去掉尾随0)
+                    precision = len(field_to_infer.split('.')[1].rstrip('0'))
+                    self.logger.debug(f"通过字段 '{field_to_infer}' 推断 {coin}-{network} 精度为: {precision}")
+                    return precision
+                except Exception as e_infer:
+                    self.logger.warning(f"通过字段 '{field_to_infer}' 推断精度出错: {e_infer}")
+
+            # 3. 如果以上都失败，返回一个通用默认值或None
+            self.logger.warning(f"无法明确确定 {coin}-{network} 的提现精度，将返回默认值 None。")
+            return None # 或者返回一个通用默认值，如 8，但None更安全
         except BinanceAPIException as e:
             self.logger.error(f"获取币安币种信息以确定精度时出错: {e}")
             return None
@@ -261,11 +565,13 @@ class BinanceAPI(BaseExchangeAPI):
             self.logger.error(f"确定币安 {coin}-{network} 提现精度时发生未知错误: {e}", exc_info=True)
             return None
 
-    def withdraw(self, coin: str, network: str, address: str, amount: str, memo: str | None = None) -> tuple[bool, str]:
+    def withdraw(self, coin: str, network: str, address: str, amount: str, memo: str | None = None,
+                 client_id: str | None = None) -> tuple[bool, str]:
         if not self.client:
             self.logger.error("无法提币：币安客户端未初始化。")
             return False, "客户端未初始化"
-        
+        self.last_error_code = None
+
         try:
             # 确保 amount 是字符串类型，因为API对精度敏感
             params = {
@@ -276,9 +582,11 @@ class BinanceAPI(BaseExchangeAPI):
             }
             if memo and memo.strip():
                 params['addressTag'] = memo
+            if client_id:
+                params['withdrawOrderId'] = client_id
 
             self.logger.info(f"向币安发起提币请求 (使用精确字符串金额): {params}")
-            response = self.client.withdraw(**params)
+            response = self._call('withdraw_apply', self.client.withdraw, **params)
             self.logger.info(f"币安提币响应: {response}")
             if response and response.get('id'):
                 return True, response.get('id') # Return withdrawal ID
@@ -289,20 +597,32 @@ class BinanceAPI(BaseExchangeAPI):
 
         except BinanceAPIException as e:
             self.logger.error(f"币安提币API错误 (Coin: {coin}, Network: {network}, Amount: {amount}): {e}")
+            classification = self.classify_error(e)
+            if classification.retryable and classification.ambiguous:
+                raise WithdrawalUncertainError(f"API错误: {e.message}", classification) from e
+            if classification.retryable:
+                if e.code == BINANCE_TIMESTAMP_ERROR_CODE:
+                    # 时间戳超出 recvWindow，不重新同步的话重试只会得到同样的错误
+                    offset = self.resync_time_offset()
+                    self.logger.warning(f"币安时间戳错误，已重新同步时间偏移: {offset} ms (本地 - 服务器)")
+                raise RetryableExchangeError(f"API错误: {e.message}", classification) from e
+            self.last_error_code = classification.code
             return False, f"API错误: {e.message}"
         except BinanceOrderException as e:
             self.logger.error(f"币安提币订单错误 (Coin: {coin}, Network: {network}, Amount: {amount}): {e}")
+            self.last_error_code = str(e.code) if getattr(e, 'code', None) is not None else None
             return False, f"订单错误: {e.message}"
         except Exception as e:
+            # 网络超时等异常: 请求可能已到达币安，不能当作确定的失败
             self.logger.error(f"币安提币时发生未知错误 (Coin: {coin}, Network: {network}, Amount: {amount}): {e}", exc_info=True)
-            return False, f"未知错误: {e}"
+            raise WithdrawalUncertainError(f"未知错误: {e}", self.classify_error(e)) from e
 
     def get_symbol_ticker(self, symbol: str) -> str | None:
         if not self.client:
             self.logger.warning("币安客户端未初始化。")
             return None
         try:
-            ticker_info = self.client.get_symbol_ticker(symbol=symbol)
+            ticker_info = self._call('ticker_price', self.client.get_symbol_ticker, symbol=symbol)
             if ticker_info and 'price' in ticker_info:
                 return ticker_info['price']
             return None
@@ -319,11 +639,19 @@ class BinanceAPI(BaseExchangeAPI):
     def get_all_coins_info(self) -> list:
         if not self.client: return []
         try:
-            return self.client.get_all_coins_info()
+            return self.metadata_store.get_coins_info()
         except Exception as e:
             self.logger.error(f"获取币安所有币种详细信息失败: {e}")
             return []
 
+    def seed_coins_info(self, coins_info: list):
+        self.metadata_store.seed(coins_info)
+
+    def refresh_coins_info(self) -> list:
+        if not self.client: return []
+        self.metadata_store.refresh()
+        return self.metadata_store.get_coins_info()
+
     def get_symbol_price_ticker(self, symbol: str) -> float | None:
         price_str = self.get_symbol_ticker(symbol)
         if price_str:
@@ -340,11 +668,24 @@ class BinanceAPI(BaseExchangeAPI):
             params = {}
             if coin: params['coin'] = coin
             # Add other params like startTime, endTime if needed based on BaseExchangeAPI or usage
-            return self.client.get_withdraw_history(**params)
+            return self._call('withdraw_history', self.client.get_withdraw_history, **params)
         except Exception as e:
             self.logger.error(f"获取币安提现历史失败 (coin: {coin}): {e}")
             return []
 
+    def find_withdrawal_by_client_id(self, coin: str, client_id: str) -> dict | None:
+        if not self.client:
+            raise BinanceExchangeAPIException("币安客户端未初始化")
+        # 查询失败时让异常向上抛出，调用方据此区分"不存在"和"无法确认"
+        records = self._call('withdraw_history', self.client.get_withdraw_history,
+                             coin=coin.upper(), withdrawOrderId=client_id)
+        for record in records or []:
+            if record.get('withdrawOrderId') == client_id:
+                status = record.get('status')
+                return {'id': record.get('id'), 'client_id': client_id, 'status_code': status,
+                        'failed': status in BINANCE_WITHDRAW_FAILED_STATUSES}
+        return None
+
     # This method was in the old BaseExchangeAPI, ensure its logic is covered or adapted.
     # The new get_withdrawal_fee is simpler.
     def get_withdrawal_fee_and_min(self, coin: str, network: str) -> tuple[float | None, float | None]:
@@ -353,25 +694,22 @@ class BinanceAPI(BaseExchangeAPI):
 
         if not self.client: return None, None
         try:
-            all_coins_info = self.client.get_all_coins_info()
-            for coin_info_item in all_coins_info:
-                if coin_info_item['coin'] == coin:
-                    for net_info in coin_info_item['networkList']:
-                        if net_info['network'] == network and net_info['withdrawEnable']:
-                            min_withdraw_str = net_info.get('withdrawMin')
-                            if min_withdraw_str:
-                                try:
-                                    min_withdraw_val = float(min_withdraw_str)
-                                except ValueError:
-                                    self.logger.error(f"无法转换最小提现金额 '{min_withdraw_str}' 为浮点数 for {coin} on {network}")
-                            fee_val = None
-                            if fee_str:
-                                try:
-                                    fee_val = float(fee_str)
-                                except ValueError:
-                                     self.logger.error(f"无法转换手续费 '{fee_str}' 为浮点数 for {coin} on {network}")
-                            return fee_val, min_withdraw_val
-            return None, None # Fallback if not found
+            net = self.metadata_store.get_network(coin, network)
+            if not net or not net.withdraw_enable:
+                return None, None # Fallback if not found
+            min_withdraw_str = net.withdraw_min
+            if min_withdraw_str:
+                try:
+                    min_withdraw_val = float(min_withdraw_str)
+                except ValueError:
+                    self.logger.error(f"无法转换最小提现金额 '{min_withdraw_str}' 为浮点数 for {coin} on {network}")
+            fee_val = None
+            if fee_str:
+                try:
+                    fee_val = float(fee_str)
+                except ValueError:
+                     self.logger.error(f"无法转换手续费 '{fee_str}' 为浮点数 for {coin} on {network}")
+            return fee_val, min_withdraw_val
         except Exception as e:
             self.logger.error(f"获取币安 {coin} ({network}) 手续费和最小提现额时出错: {e}")
             return None, None
@@ -0,0 +1,99 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton,
+                             QHeaderView, QLabel, QFileDialog, QMessageBox, QAbstractItemView)
+from PyQt6.QtCore import Qt, QSize, QTimer
+
+from api_metrics import API_METRICS, KIND_ENDPOINT, KIND_METHOD, ApiMetrics
+
+KIND_TEXT = {KIND_METHOD: "方法", KIND_ENDPOINT: "SDK端点"}
+COLUMNS = ["类型", "交易所", "名称", "调用次数", "错误", "错误率", "平均(ms)", "p50(ms)", "p95(ms)", "p99(ms)", "最大(ms)", "总耗时(s)"]
+REFRESH_INTERVAL_MS = 2000
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+class DiagnosticsDialog(QDialog):
+    """显示各交易所API方法的调用次数、错误率和耗时分位数，按总耗时排序。"""
+
+    def __init__(self, metrics: ApiMetrics = API_METRICS, default_export_path: str = "", parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.default_export_path = default_export_path
+        self.setWindowTitle("API诊断")
+        self.setMinimumSize(QSize(900, 360))
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(8)
+
+        hint = QLabel("分位数基于每个方法最近的调用；\"方法\"包含SDK请求、解析和缓存，\"SDK端点\"只统计实际请求 (不含限频等待)。")
+        hint.setWordWrap(True)
+        layout.addWidget(hint)
+
+        self.table = QTableWidget(0, len(COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh)
+        reset_button = QPushButton("清零")
+        reset_button.clicked.connect(self._reset)
+        export_button = QPushButton("导出Prometheus")
+        export_button.clicked.connect(self._export)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(refresh_button)
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(export_button)
+        button_layout.addStretch(1)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        # 提币进行中时自动刷新
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_INTERVAL_MS)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start()
+        self.refresh()
+
+    def refresh(self):
+        rows = self.metrics.snapshot()
+        self.table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            values = [
+                KIND_TEXT.get(row.kind, row.kind), row.exchange, row.name, str(row.count), str(row.errors),
+                f"{row.error_rate:.1%}", _ms(row.mean_ms), _ms(row.p50_ms), _ms(row.p95_ms), _ms(row.p99_ms),
+                _ms(row.max_ms), f"{row.total_ms / 1000:.1f}",
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column >= 3:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.table.setItem(row_index, column, item)
+
+    def _reset(self):
+        self.metrics.reset()
+        self.refresh()
+
+    def _export(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出Prometheus指标", self.default_export_path or "api_metrics.prom",
+                                                   "Prometheus 文本 (*.prom);;所有文件 (*)")
+        if not file_path:
+            return
+        try:
+            self.metrics.write_prometheus(file_path)
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", f"写入 {file_path} 失败: {e}")
+            return
+        QMessageBox.information(self, "导出成功", f"已导出到: {file_path}")
+
+    def done(self, result):
+        self._timer.stop()
+        super().done(result)
@@ -1,7 +1,40 @@
 from abc import ABC, abstractmethod
 import time
+from dataclasses import dataclass
 from configparser import ConfigParser
 import logging
+from rate_limiter import RateLimiter, BucketSpec
+from api_metrics import API_METRICS, KIND_ENDPOINT, instrument_method
+
+
+@dataclass(frozen=True)
+class ErrorClassification:
+    """交易所错误的分类结果，由 BaseExchangeAPI.classify_error() 给出。"""
+    retryable: bool # 是否属于可以重试的临时错误 (网络、5xx、限频等)
+    reason: str
+    retry_after: float | None = None # 交易所要求的最短等待秒数
+    ambiguous: bool = False # 请求可能已被受理，重试前必须先按 client_id 对账
+    code: str | None = None # 交易所错误码 (例如币安 code、OKX code/sCode)，用于事件记录
+
+
+FATAL_ERROR = ErrorClassification(retryable=False, reason="不可重试的错误")
+
+
+class WithdrawalUncertainError(Exception):
+    """提币请求可能已被交易所受理，但没有得到明确结果 (例如网络超时)，需要按 client_id 对账。"""
+
+    def __init__(self, message: str, classification: ErrorClassification | None = None):
+        super().__init__(message)
+        self.classification = classification
+
+
+class RetryableExchangeError(Exception):
+    """交易所明确没有处理该请求的临时错误 (例如限频)，可以直接重试。"""
+
+    def __init__(self, message: str, classification: ErrorClassification):
+        super().__init__(message)
+        self.classification = classification
+
 
 class BaseExchangeAPI(ABC):
     """
@@ -9,11 +42,88 @@ class BaseExchangeAPI(ABC):
     定义了所有具体交易所API实现类必须提供的方法。
     """
 
-    def __init__(self, config: ConfigParser, logger: logging.Logger):
+    # 限频定义，由子类覆盖。桶: {桶名: BucketSpec}；端点: {端点名: [(桶名, 权重), ...]}
+    RATE_LIMIT_EXCHANGE: str = ""
+    RATE_LIMIT_BUCKETS: dict[str, BucketSpec] = {}
+    RATE_LIMIT_ENDPOINTS: dict[str, list[tuple[str, float]]] = {}
+    # 读取API凭证的配置节，子账户可以通过 config_section 参数指定其它节 (例如 "ACCOUNT:sub1")
+    DEFAULT_CONFIG_SECTION: str = ""
+    # 子类实现的这些方法会被自动包装，调用次数、错误次数和耗时记录到 api_metrics.API_METRICS
+    INSTRUMENTED_METHODS: tuple[str, ...] = (
+        'connect', 'get_server_time_offset', 'get_all_tradable_coins', 'get_balance', 'get_networks_for_coin',
+        'get_withdrawal_fee', 'get_withdraw_precision', 'withdraw', 'find_withdrawal_by_client_id',
+        'get_symbol_ticker', 'get_all_coins_info', 'refresh_coins_info', 'get_withdrawal_history',
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for method_name in cls.INSTRUMENTED_METHODS:
+            func = cls.__dict__.get(method_name)
+            if callable(func) and not getattr(func, '__instrumented__', False):
+                setattr(cls, method_name, instrument_method(method_name, func))
+
+    def __init__(self, config: ConfigParser, logger: logging.Logger, config_section: str | None = None):
         self.config = config
         self.logger = logger
+        self.config_section = config_section or self.DEFAULT_CONFIG_SECTION
         self.client = None # 具体交易所的SDK客户端实例
         self.time_offset = 0 # 与服务器的时间差
+        self.last_error_code: str | None = None # withdraw() 返回失败 (未抛出异常) 时的交易所错误码，由子类设置
+        self.rate_limiter = None
+        if self.RATE_LIMIT_ENDPOINTS:
+            self.rate_limiter = RateLimiter(self.RATE_LIMIT_EXCHANGE or self.__class__.__name__,
+                                            self.RATE_LIMIT_BUCKETS, self.RATE_LIMIT_ENDPOINTS)
+
+    @property
+    def metrics_exchange_name(self) -> str:
+        """统计数据中的交易所名称。"""
+        return self.RATE_LIMIT_EXCHANGE or self.__class__.__name__
+
+    def _call(self, endpoint: str, func, *args, **kwargs):
+        """
+        经过限频器调用SDK方法。
+
+        调用前按 endpoint 的权重阻塞等待令牌，调用后把结果 (或异常) 交给
+        _on_rate_limit_feedback，由子类根据响应头/错误码校正令牌桶。
+        请求耗时 (不含限频等待) 按端点记录到 API_METRICS。
+        """
+        if self.rate_limiter is not None:
+            waited = self.rate_limiter.acquire(endpoint)
+            if waited > 0.5:
+                self.logger.debug(f"{self.__class__.__name__}: 端点 {endpoint} 限频等待 {waited:.2f} 秒。")
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            API_METRICS.record(KIND_ENDPOINT, self.metrics_exchange_name, endpoint, time.perf_counter() - start, True)
+            self._on_rate_limit_feedback(endpoint, None, e)
+            raise
+        API_METRICS.record(KIND_ENDPOINT, self.metrics_exchange_name, endpoint, time.perf_counter() - start, False)
+        self._on_rate_limit_feedback(endpoint, result, None)
+        return result
+
+    def _on_rate_limit_feedback(self, endpoint: str, result, error: Exception | None):
+        """子类可覆盖: 根据交易所返回的已用权重或限频错误调整令牌桶。"""
+        pass
+
+    def classify_error(self, error: Exception | None = None, code: str | None = None,
+                       status_code: int | None = None) -> ErrorClassification:
+        """
+        判断一次失败是否可以重试。子类根据各自的错误码覆盖此方法。
+
+        Args:
+            error: SDK 抛出的异常 (如果有)。
+            code: 交易所业务错误码 (例如 OKX 响应中的 'code')。
+            status_code: HTTP 状态码。
+        """
+        if isinstance(error, OSError): # 包括超时、连接错误以及 requests 的异常
+            return ErrorClassification(retryable=True, reason=f"网络异常: {error}", ambiguous=True)
+        if status_code is not None and 500 <= status_code < 600:
+            return ErrorClassification(retryable=True, reason=f"交易所服务器错误 (HTTP {status_code})", ambiguous=True,
+                                       code=str(code) if code is not None else None)
+        if code is not None:
+            return ErrorClassification(retryable=False, reason=FATAL_ERROR.reason, code=str(code))
+        return FATAL_ERROR
 
     @abstractmethod
     def connect(self) -> tuple[bool, str]:
@@ -66,6 +176,14 @@ class BaseExchangeAPI(ABC):
         """获取提现手续费。可以返回格式化字符串 "fee asset" 或包含手续费信息的字典，或None."""
         pass
 
+    def get_cached_withdrawal_fee(self, coin: str, network: str) -> tuple[str | dict | None, bool]:
+        """
+        供界面显示的提现手续费: 直接读取已缓存的元数据 (可能来自磁盘快照)，不等待实时刷新。
+        返回 (手续费, 是否来自快照)。提币参数必须使用 get_withdrawal_fee() 获取实时数据。
+        默认直接调用 get_withdrawal_fee()；支持元数据缓存的子类覆盖此方法。
+        """
+        return self.get_withdrawal_fee(coin, network), False
+
     @abstractmethod
     def get_withdraw_precision(self, coin: str, network: str) -> int | None:
         """
@@ -81,8 +199,29 @@ class BaseExchangeAPI(ABC):
         pass
 
     @abstractmethod
-    def withdraw(self, coin: str, network: str, address: str, amount: str, memo: str | None = None) -> tuple[bool, str]:
-        """执行提币操作。返回 (success_bool, message_or_txid_str). amount 应为精确格式化的字符串。"""
+    def withdraw(self, coin: str, network: str, address: str, amount: str, memo: str | None = None,
+                 client_id: str | None = None) -> tuple[bool, str]:
+        """
+        执行提币操作。返回 (success_bool, message_or_txid_str). amount 应为精确格式化的字符串。
+
+        client_id 为客户端生成的提币标识，随请求提交给交易所，之后可以通过
+        find_withdrawal_by_client_id() 查询该笔提币是否已被受理。
+        无法确定请求是否已被受理时 (网络异常等) 抛出 WithdrawalUncertainError。
+        """
+        pass
+
+    @abstractmethod
+    def find_withdrawal_by_client_id(self, coin: str, client_id: str) -> dict | None:
+        """
+        按 client_id 查询提币记录，用于超时等情况下的对账。
+
+        Returns:
+            dict | None: 找到时返回 {'id', 'client_id', 'status_code', 'failed'}，
+                         failed=True 表示交易所已取消或拒绝该笔提币；确认不存在时返回None。
+
+        Raises:
+            Exception: 查询本身失败 (此时无法判断提币是否存在)。
+        """
         pass
 
     @abstractmethod
@@ -103,6 +242,17 @@ class BaseExchangeAPI(ABC):
         """
         pass
 
+    def seed_coins_info(self, coins_info: list):
+        """
+        用磁盘快照中的 get_all_coins_info() 数据预填充元数据缓存，可在 connect() 之前调用。
+        默认不做任何事；支持元数据缓存的子类覆盖此方法。
+        """
+        pass
+
+    def refresh_coins_info(self) -> list:
+        """强制从交易所重新获取币种信息，返回 get_all_coins_info() 格式的数据。"""
+        return self.get_all_coins_info()
+
     @abstractmethod
     def get_withdrawal_history(self, coin: str = None) -> list:
         """
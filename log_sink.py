@@ -0,0 +1,67 @@
+import threading
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtWidgets import QTextEdit
+
+
+class BatchedLogSink(QObject):
+    """
+    日志面板的批量写入器。
+
+    任意线程都可以调用 post() 把一行 HTML 放入队列 (不经过Qt信号)；
+    主线程上的 QTimer 每 interval_ms 毫秒把积压的所有行在一个编辑块中写入 QTextEdit，
+    整批只做一次布局和一次滚动。文档的最大块数限制为 max_blocks，最旧的行会被丢弃。
+    """
+
+    def __init__(self, text_edit: QTextEdit, interval_ms: int = 100, max_blocks: int = 5000, parent=None):
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self.max_blocks = max_blocks
+        self.text_edit.document().setMaximumBlockCount(max_blocks)
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._dropped = 0 # 单个周期内积压超过 max_blocks 时直接丢弃的行数
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def post(self, html: str):
+        """线程安全地追加一行日志 (HTML)。"""
+        with self._lock:
+            self._pending.append(html)
+            if len(self._pending) > self.max_blocks: # 这些行写入后也会立即被文档裁掉
+                self._pending.popleft()
+                self._dropped += 1
+
+    def flush(self):
+        """把队列中的所有行写入日志面板。只能在主线程调用 (由定时器触发)。"""
+        with self._lock:
+            if not self._pending:
+                return
+            entries = list(self._pending)
+            self._pending.clear()
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            entries.insert(0, f'<span style="color:#888888;">... 日志输出过快，已省略 {dropped} 行 ...</span>')
+
+        scrollbar = self.text_edit.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4 # 用户向上翻看时不强制滚动
+        document = self.text_edit.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for i, html in enumerate(entries):
+            if i > 0 or not document.isEmpty():
+                cursor.insertBlock()
+            cursor.insertHtml(html)
+        cursor.endEditBlock()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def stop(self):
+        """停止定时器并写入剩余的行 (关闭窗口时调用)。"""
+        self._timer.stop()
+        self.flush()
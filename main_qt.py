@@ -1,25 +1,24 @@
-# 文件内容由于长度限制无法在此显示，请使用本地文件import sys
+import sys
 import os
 import time
 import random
-import pandas as pd
 import threading
 from datetime import datetime, timedelta
 import csv
-import re
 from configparser import ConfigParser
 import configparser
 import shutil
 import logging
 from logging.handlers import RotatingFileHandler
-from decimal import Decimal, ROUND_DOWN
+from decimal import Decimal
 
 # PyQt6 组件导入
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                            QLabel, QComboBox, QLineEdit, QPushButton, QProgressBar,
                            QTextEdit, QFrame, QScrollArea, QGridLayout, QMessageBox,
                            QGroupBox, QTabWidget, QSplitter, QToolBar, QStatusBar,
-                           QFileDialog, QSizePolicy, QDialog, QCheckBox, QDialogButtonBox, QTextBrowser)
+                           QFileDialog, QSizePolicy, QDialog, QCheckBox, QDialogButtonBox, QTextBrowser,
+                           QListView, QStackedWidget, QProgressDialog)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QSize, QSettings, QLocale, QObject, QThread, QThreadPool, QUrl # <-- QUrl is needed
 from PyQt6.QtGui import QAction, QFont, QIcon, QColor, QPalette, QIntValidator, QDoubleValidator, QCloseEvent, QClipboard, QDesktopServices # <-- Add QDesktopServices
 
@@ -32,6 +31,23 @@ from okx_exchange import OKXAPI
 from settings_dialog import SettingsDialog
 from address_validator import AddressValidator
 from history_dialog import HistoryDialog
+from balance_ledger import BalanceLedger
+from withdrawal_engine import WithdrawalEngine, WithdrawalStats, reconcile_journal_state
+from retry_policy import RetryPolicy
+from withdrawal_failures import FailureSet, FAIL_PLAN_ERROR
+from withdrawal_events import EVENT_LOG_FILE, WithdrawalEventLog
+from api_metrics import API_METRICS, MetricsServer
+from diagnostics_dialog import DiagnosticsDialog
+from address_masker import mask_address, mask_addresses_in_text
+from log_sink import BatchedLogSink
+from async_logging import AsyncLogging
+from address_list_model import AddressListModel, ADDRESS_STATUS_USED, ADDRESS_STATUS_FAILED
+from multi_account_executor import AccountConfig, MultiAccountExecutor, load_account_sections
+from metadata_snapshot import MetadataSnapshotStore
+from withdrawal_journal import (WithdrawalJournal, JournalState, find_unfinished_batches, mark_abandoned,
+                                STATUS_COMPLETED, STATUS_STOPPED)
+from address_loader import (AddressBook, AddressFileError, STANDARD_ADDRESS_TYPE, file_signature, read_address_table,
+                            is_single_column_format, extract_single_column_addresses)
 
 # 添加打赏对话框类
 class DonationDialog(QDialog):
@@ -151,31 +167,85 @@ class DonationDialog(QDialog):
 
 # API初始化工作线程类
 class ApiInitWorker(QObject):
-    finished = pyqtSignal(bool, str, object, str)  # 成功标志, 消息, API实例, 交易所名称
+    finished = pyqtSignal(bool, str, object, str, object)  # 成功标志, 消息, API实例, 交易所名称, 预取的币种列表(或None)
+    metadata_refreshed = pyqtSignal(object, object)  # API实例, 新的可交易币种列表 (仅当实时数据与快照不同时发出)
+    metadata_confirmed = pyqtSignal(object)  # API实例 (实时数据与快照一致时发出)
     log_message = pyqtSignal(str, str)     # 消息, 级别
     
-    def __init__(self, exchange_name, api_class, config, logger):
+    def __init__(self, exchange_name, api_class, config, logger, prefetch_coins=True, snapshot_store=None):
         super().__init__()
         self.exchange_name = exchange_name
         self.api_class = api_class
         self.config = config
         self.logger = logger
+        self.prefetch_coins = prefetch_coins # 连接成功后在同一线程里顺便获取币种列表，省去主线程的一次串行请求
+        self.snapshot_store = snapshot_store # MetadataSnapshotStore，为None时不使用磁盘快照
         self.api_instance = None
         
     def run(self):
         try:
             self.log_message.emit(f"正在为交易所 {self.exchange_name} 初始化API...", "INFO")
             self.api_instance = self.api_class(config=self.config, logger=self.logger)
+
+            # 先载入快照再连接: 连接后的第一次界面读取直接命中快照，不必等待元数据下载
+            snapshot = None
+            if self.snapshot_store is not None:
+                snapshot = self._seed_from_snapshot()
+
             self.logger.info(f"已创建 {self.exchange_name} API 实例。正在尝试连接...")
             connected, message = self.api_instance.connect()
+
+            coins = None
+            if connected and self.prefetch_coins:
+                try:
+                    coins = self.api_instance.get_all_tradable_coins()
+                except Exception as e_coins:
+                    self.logger.warning(f"预取 {self.exchange_name} 币种列表失败，将在刷新界面时重试: {e_coins}")
             
             # 返回API对象和结果
-            self.finished.emit(connected, message, self.api_instance, self.exchange_name)
+            self.finished.emit(connected, message, self.api_instance, self.exchange_name, coins)
+
+            # 界面已经可以使用快照数据，再在后台向交易所确认快照是否仍然有效
+            if connected and self.snapshot_store is not None:
+                self._revalidate_snapshot(snapshot)
             
         except Exception as e:
             error_msg = f"初始化或连接 {self.exchange_name} API时发生严重错误: {e}"
             self.log_message.emit(error_msg, "CRITICAL")
-            self.finished.emit(False, str(e), None, self.exchange_name)
+            self.finished.emit(False, str(e), None, self.exchange_name, None)
+
+    def _seed_from_snapshot(self):
+        loaded = self.snapshot_store.load(self.exchange_name)
+        if not loaded:
+            return None
+        snapshot, saved_at = loaded
+        try:
+            self.api_instance.seed_coins_info(snapshot)
+        except Exception as e:
+            self.logger.warning(f"使用 {self.exchange_name} 元数据快照失败: {e}")
+            return None
+        saved_text = datetime.fromtimestamp(saved_at).strftime('%Y-%m-%d %H:%M:%S') if saved_at else "未知"
+        self.logger.info(f"已从磁盘快照载入 {self.exchange_name} 币种信息 (保存于 {saved_text})，后台将重新验证。")
+        return snapshot
+
+    def _revalidate_snapshot(self, snapshot):
+        try:
+            if snapshot is None:
+                live = self.api_instance.get_all_coins_info() # 刚才预取币种时已拉取，直接读缓存
+            else:
+                live = self.api_instance.refresh_coins_info()
+            if not live:
+                return
+            if snapshot is not None and not self.snapshot_store.differs(snapshot, live):
+                self.logger.debug(f"{self.exchange_name} 元数据快照与实时数据一致。")
+                self.metadata_confirmed.emit(self.api_instance)
+                return
+            self.snapshot_store.save(self.exchange_name, live)
+            if snapshot is not None:
+                self.logger.info(f"{self.exchange_name} 币种信息已变化，快照已更新。")
+                self.metadata_refreshed.emit(self.api_instance, self.api_instance.get_all_tradable_coins())
+        except Exception as e:
+            self.logger.warning(f"后台验证 {self.exchange_name} 元数据快照失败: {e}")
 
 # 余额查询工作线程类
 class BalanceWorker(QObject):
@@ -200,6 +270,41 @@ class BalanceWorker(QObject):
         except Exception as e:
             self.error.emit(str(e), self.coin)
 
+# 未完成批次检查工作线程类
+class BatchResumeWorker(QObject):
+    """读取提币日志并按 client_id 对账结果未知的地址 (网络请求 + 日志写入)，界面线程只负责询问用户。"""
+    finished = pyqtSignal(str, object)  # 交易所名称, 未完成批次列表 (JournalState)
+    log_message = pyqtSignal(str, str)  # 消息, 级别
+
+    def __init__(self, exchange_name, api, journal_dir, logger):
+        super().__init__()
+        self.exchange_name = exchange_name
+        self.api = api
+        self.journal_dir = journal_dir
+        self.logger = logger
+
+    def run(self):
+        unfinished = []
+        try:
+            unfinished = [state for state in find_unfinished_batches(self.journal_dir, self.logger)
+                          if state.header.get('exchange') == self.exchange_name]
+            for state in unfinished:
+                self.log_message.emit(f"发现未完成的提币{state.describe()}", "WARNING")
+                if state.uncertain:
+                    try:
+                        resolved = reconcile_journal_state(state, self.api, self.logger)
+                        if resolved:
+                            self.log_message.emit(f"已按 client_id 对账 {resolved} 个结果未知的地址: {state.describe()}", "INFO")
+                    except Exception as e:
+                        self.logger.error(f"批次 {state.batch_id} 对账时出错: {e}", exc_info=True)
+                        self.log_message.emit(f"批次 {state.batch_id} 对账时出错: {e}", "ERROR")
+                if not state.remaining_targets():
+                    mark_abandoned(state, self.logger)
+        except Exception as e:
+            self.logger.error(f"检查未完成的提币批次时出错: {e}", exc_info=True)
+            self.log_message.emit(f"检查未完成的提币批次时出错: {e}", "ERROR")
+        self.finished.emit(self.exchange_name, unfinished)
+
 # =============================================================================
 # 深色主题样式定义
 # =============================================================================
@@ -345,6 +450,11 @@ QStatusBar {
 """
 
 class WithdrawalHelper(QMainWindow):
+    WITHDRAWAL_THREAD_JOIN_TIMEOUT = 15 # 关闭窗口时等待提币线程结束的秒数
+    LOG_FLUSH_INTERVAL_MS = 100 # 日志面板批量刷新的间隔
+    LOG_PANEL_MAX_BLOCKS = 5000 # 日志面板最多保留的行数
+    IMPORT_PROGRESS_DELAY_MS = 500 # 读取地址文件超过该时长才显示进度对话框
+    IMPORT_PROGRESS_STEPS = 1000
     # 定义信号
     update_signal = pyqtSignal(str, str)
     progress_update_signal = pyqtSignal(int, str)
@@ -353,6 +463,7 @@ class WithdrawalHelper(QMainWindow):
     withdrawal_confirmation_result = pyqtSignal(bool, bool)
     validation_results_signal = pyqtSignal(str, list, int)
     withdrawal_finished_signal = pyqtSignal() # <-- 新增信号，通知提币流程结束
+    address_status_signal = pyqtSignal(str, str) # 地址, ADDRESS_STATUS_*；提币线程通过它更新地址列表颜色
     
     def __init__(self):
         super().__init__()
@@ -420,15 +531,27 @@ class WithdrawalHelper(QMainWindow):
         # 设置Qt线程池的最大线程数，避免创建过多线程
         QThreadPool.globalInstance().setMaxThreadCount(10)
 
+        # 币种/网络元数据的磁盘快照，用于启动时免去完整币种列表的下载
+        self.metadata_snapshot_store = MetadataSnapshotStore(self.app_data_dir, self.logger)
+
         self.address_validator = AddressValidator(self.logger)
         self.settings_dialog = SettingsDialog(self.logger, self.config_path, self)
 
         # Used addresses, current addresses for processing, last file path
         self.used_addresses = set()
         self.current_addresses = []
+        self.address_book = None # 多列地址文件的列式内容 (AddressBook)
         self.last_address_file_path = ""
         self.show_full_addresses = False
+        self.last_failures: FailureSet | None = None # 上一批次中被跳过或失败的地址
         
+        # 崩溃安全的提币日志目录，以及本次运行中已检查过未完成批次的交易所
+        self.journal_dir = os.path.join(self.app_data_dir, "journal")
+        # 每笔提币的结构化事件 (JSONL)，用于离线分析吞吐和延迟
+        self.event_log = WithdrawalEventLog(os.path.join(self.app_data_dir, EVENT_LOG_FILE))
+        self._resume_checked_exchanges = set()
+        self._closing = False
+
         # Thread synchronization for withdrawal confirmation
         self.withdrawal_confirm_event = threading.Event()
         self.user_agreed_to_this_withdrawal = False
@@ -482,7 +605,10 @@ class WithdrawalHelper(QMainWindow):
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         fh.setFormatter(formatter)
         
-        logger.addHandler(fh)
+        # 格式化和文件写入在后台线程完成，GUI线程和提币线程只把记录放入有界队列
+        if getattr(self, 'async_logging', None):
+            self.async_logging.stop()
+        self.async_logging = AsyncLogging(logger, [fh])
         return logger
 
     def _setup_toolbar_and_exchange_selector(self, main_layout):
@@ -506,6 +632,8 @@ class WithdrawalHelper(QMainWindow):
             ("开始提币", self.start_withdrawal),
             ("依次提币", self.start_sequential_withdrawal), # 新增按钮
             ("停止", self.stop_withdrawal),
+            ("失败地址", self.show_failed_addresses),
+            ("API诊断", self.show_diagnostics),
             ("导入地址", self.import_address_list),
             ("验证地址", self.validate_addresses),
             ("设置", self._open_settings_dialog),
@@ -523,6 +651,9 @@ class WithdrawalHelper(QMainWindow):
                 self.start_button = btn
             elif text == "依次提币": # 新增对依次提币按钮的引用
                 self.sequential_start_button = btn
+            elif text == "失败地址":
+                self.failures_button = btn
+                btn.setEnabled(False) # 批次结束且有失败地址时启用
             
             btn.clicked.connect(callback)
             toolbar_layout.addWidget(btn)
@@ -683,11 +814,23 @@ class WithdrawalHelper(QMainWindow):
         """)
         self.toggle_address_btn.setCheckable(True)
         self.toggle_address_btn.clicked.connect(self.toggle_address_display)
-        self.address_text = QTextEdit()
-        self.address_text.setReadOnly(True)
-        self.address_text.setFont(QFont("Monospace", 9))
-        self.address_text.setStyleSheet("background-color: #252525;")
-        address_layout.addWidget(self.address_text)
+        # 地址列表使用模型/视图: 只渲染可见行，行数不受限制
+        self.address_model = AddressListModel(mask=mask_address, parent=self)
+        self.address_list_view = QListView()
+        self.address_list_view.setModel(self.address_model)
+        self.address_list_view.setUniformItemSizes(True) # 行高一致，滚动和布局不需要逐行测量
+        self.address_list_view.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        self.address_list_view.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        self.address_list_view.setFont(QFont("Monospace", 9))
+        self.address_list_view.setStyleSheet("background-color: #252525;")
+        self.address_empty_label = QLabel("地址列表为空。请点击「导入地址」按钮导入。")
+        self.address_empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.address_empty_label.setStyleSheet("color:#CCCCCC; background-color: #252525;")
+        self.address_stack = QStackedWidget()
+        self.address_stack.addWidget(self.address_empty_label)
+        self.address_stack.addWidget(self.address_list_view)
+        address_layout.addWidget(self.address_stack)
+        self.address_status_signal.connect(self.address_model.set_status)
         address_container_layout.addWidget(address_group)
         self.toggle_address_btn.setParent(address_group)
         QTimer.singleShot(0, lambda: self._adjust_button_position(address_group))
@@ -703,6 +846,9 @@ class WithdrawalHelper(QMainWindow):
         self.log_text.setFont(QFont("Monospace", 9))
         self.log_text.setStyleSheet("background-color: #252525;")
         log_layout.addWidget(self.log_text)
+        # 各线程的日志先进入队列，由定时器批量写入面板
+        self.log_sink = BatchedLogSink(self.log_text, interval_ms=self.LOG_FLUSH_INTERVAL_MS,
+                                       max_blocks=self.LOG_PANEL_MAX_BLOCKS, parent=self)
         log_container_layout.addWidget(log_group)
         
         right_splitter.addWidget(address_container)
@@ -758,112 +904,90 @@ class WithdrawalHelper(QMainWindow):
         2. 多列地址格式: 包含多列，每列代表一种类型的地址(EVM、SUI、SOL等)
         """
         self.log_message(f"尝试从文件加载地址和标签: {file_path}", level="DEBUG")
+        progress_dialog, progress = self._create_import_progress(file_path)
         try:
-            if file_path.lower().endswith('.csv'):
-                # header=0 表示第一行是表头
-                # dtype=str 确保所有列都作为字符串读取，防止数字地址被错误解析
-                # keep_default_na=False 防止空字符串被解析为 NaN
-                df = pd.read_csv(file_path, dtype=str, header=0, keep_default_na=False)
-            elif file_path.lower().endswith('.xlsx'):
-                df = pd.read_excel(file_path, dtype=str, header=0, keep_default_na=False)
-            else:
-                return False, "不支持的文件格式。请选择 .csv 或 .xlsx 文件。"
-
-            # 检查文件是否为空
-            if df.empty:
-                return False, "文件为空，没有可导入的地址。"
-
-            # 规范化列名: 转小写，去首尾空格
-            df.columns = df.columns.str.strip().str.lower()
+            signature = file_signature(file_path)
+            table = read_address_table(file_path, progress=progress)
 
             # 检测文件格式: 单列地址格式 vs 多列地址格式
             # 如果含有'address'列，则视为单列地址格式；否则视为多列地址格式
-            if 'address' in df.columns:
+            if is_single_column_format(table.columns):
                 # 单列地址格式处理
-                return self._process_single_column_addresses(df)
+                return self._process_single_column_addresses(table)
             else:
                 # 多列地址格式处理
-                return self._process_multi_column_addresses(df)
+                return self._process_multi_column_addresses(AddressBook(file_path, signature, table))
 
+        except AddressFileError as e:
+            return False, str(e)
         except FileNotFoundError:
             self.logger.error(f"地址文件未找到: {file_path}")
             return False, "文件未找到。"
         except Exception as e:
             self.logger.error(f"读取地址文件时出错: {file_path} - {e}", exc_info=True)
             return False, f"读取文件时出错: {e}"
+        finally:
+            self._close_import_progress(progress_dialog)
+
+    def _create_import_progress(self, file_path):
+        """
+        读取地址文件时的进度对话框，读取时间较长时才会显示，可以取消。
+
+        Returns:
+            tuple: (对话框, 传给 read_address_table 的进度回调)
+        """
+        dialog = QProgressDialog(f"正在读取地址文件: {os.path.basename(file_path)}", "取消", 0,
+                                 self.IMPORT_PROGRESS_STEPS, self)
+        dialog.setWindowTitle("导入地址")
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(self.IMPORT_PROGRESS_DELAY_MS)
+        dialog.setValue(0)
+
+        def progress(done, total):
+            if total:
+                dialog.setValue(min(self.IMPORT_PROGRESS_STEPS - 1, int(done * self.IMPORT_PROGRESS_STEPS / total)))
+            elif dialog.maximum():
+                dialog.setRange(0, 0) # 总行数未知时显示忙碌状态
+            QApplication.processEvents() # 读取在主线程中进行，让对话框能够刷新和响应取消
+            if dialog.wasCanceled():
+                raise AddressFileError("已取消导入地址文件。")
+
+        return dialog, progress
+
+    def _close_import_progress(self, dialog):
+        dialog.reset() # 同时停止延迟显示的计时器
+        dialog.deleteLater()
     
-    def _process_single_column_addresses(self, df):
-        """处理单列地址格式的DataFrame."""
-        # 检查必需的 'address' 列是否存在
-        if 'address' not in df.columns:
-            return False, "文件中未找到名为 'address' 的列 (不区分大小写)。"
-            
-        # 检查可选的 'label' 列是否存在
-        has_label_column = 'label' in df.columns
-        if not has_label_column:
+    def _process_single_column_addresses(self, table):
+        """处理单列地址格式的地址表."""
+        if 'label' not in table.columns:
             self.log_message("文件中未找到 'label' 列，将不使用地址标签。", level="INFO")
 
-        # 提取数据并构建字典列表
-        addresses_data = []
-        for index, row in df.iterrows():
-            addr = row['address'].strip()
-            label = row['label'].strip() if has_label_column and row['label'] else None
-            
-            if addr: # 只添加地址不为空的行
-                addresses_data.append({'address': addr, 'label': label})
-        
+        addresses_data = extract_single_column_addresses(table)
         if not addresses_data:
             return False, "文件中未能提取到有效的地址行。"
 
         self.current_addresses = addresses_data # 更新为字典列表
         self.used_addresses = set() # 清除已用地址记录
+        self.address_book = None
         
         # 设置当前正在使用的地址类型
-        self.current_address_type = 'standard'
+        self.current_address_type = STANDARD_ADDRESS_TYPE
         
         self.log_message(f"成功从单列格式文件加载 {len(self.current_addresses)} 条地址记录。", level="INFO")
         return True, f"成功加载 {len(self.current_addresses)} 条地址记录。"
 
-    def _process_multi_column_addresses(self, df):
-        """处理多列地址格式的DataFrame，每列代表一种类型的地址."""
-        # 检查是否至少有一列
-        if len(df.columns) == 0:
-            return False, "文件中没有列可供导入。"
-            
-        # 检测可用的地址类型列
-        available_types = []
-        address_types_map = {
-            'evm': ['evm', 'eth', 'ethereum', 'bsc', 'polygon', 'avax', 'avalanche', 'arb', 'arbitrum'],
-            'sui': ['sui'],
-            'sol': ['sol', 'solana']
-        }
-        
-        # 创建一个字典，用于存储每种类型对应的列名
-        self.address_type_columns = {}
-        
-        # 检查每一列，判断是否为地址类型列
-        for col in df.columns:
-            col_lower = col.lower()
-            # 跳过包含'label'的列
-            if 'label' in col_lower:
-                continue
-                
-            for addr_type, keywords in address_types_map.items():
-                if col_lower in keywords or any(keyword in col_lower for keyword in keywords):
-                    available_types.append(addr_type)
-                    self.address_type_columns[addr_type] = col
-                    break
-            
-            # 如果列名不在预定义的类型中，且不包含'label'，视为自定义类型
-            if col not in self.address_type_columns.values() and 'label' not in col_lower:
-                # 使用列名本身作为类型标识符
-                custom_type = col_lower
-                available_types.append(custom_type)
-                self.address_type_columns[custom_type] = col
+    def _process_multi_column_addresses(self, book):
+        """处理多列地址格式，每列代表一种类型的地址."""
+        available_types = book.address_types
         
         if not available_types:
             return False, "文件中未能识别出任何地址类型列。请确保列名包含EVM、SUI、SOL等关键词，或者使用单列'address'格式。"
         
+        # 各类型的地址列保留在内存中，切换地址类型时不再重新读取文件
+        self.address_book = book
+        self.address_type_columns = book.type_columns # {地址类型: 列名}
+        
         # 存储所有可用的地址类型
         self.available_address_types = available_types
         
@@ -871,47 +995,43 @@ class WithdrawalHelper(QMainWindow):
         self.current_address_type = available_types[0]
         
         # 提取当前选定类型的地址
-        self._load_addresses_for_current_type(df)
+        self._load_addresses_for_current_type()
         
         return True, f"成功加载多列地址文件，可用类型: {', '.join(available_types)}。当前使用: {self.current_address_type}。"
     
-    def _load_addresses_for_current_type(self, df=None):
-        """根据当前选定的地址类型，从DataFrame中加载相应列的地址."""
+    def _load_addresses_for_current_type(self):
+        """根据当前选定的地址类型，从内存中的地址表取出相应列的地址."""
         if not hasattr(self, 'current_address_type') or not hasattr(self, 'address_type_columns'):
             self.log_message("无法加载地址：未设置当前地址类型或类型映射。", level="ERROR")
             return
         
-        # 如果没有提供DataFrame，则使用last_address_file_path再次加载
-        if df is None and hasattr(self, 'last_address_file_path') and self.last_address_file_path:
+        # 没有地址表或文件在导入后被修改时，重新读取文件
+        book = self.address_book
+        if book is None or book.is_stale():
+            file_path = book.file_path if book is not None else self.last_address_file_path
+            if not file_path:
+                self.log_message("无法加载地址：没有已导入的多列地址文件。", level="ERROR")
+                return
+            if book is not None:
+                self.log_message("地址文件在导入后已被修改，重新读取。", level="INFO")
+            progress_dialog, progress = self._create_import_progress(file_path)
             try:
-                if self.last_address_file_path.lower().endswith('.csv'):
-                    df = pd.read_csv(self.last_address_file_path, dtype=str, header=0, keep_default_na=False)
-                elif self.last_address_file_path.lower().endswith('.xlsx'):
-                    df = pd.read_excel(self.last_address_file_path, dtype=str, header=0, keep_default_na=False)
-                else:
-                    self.log_message("无法重新加载地址：不支持的文件格式。", level="ERROR")
-                    return
+                book = AddressBook.load(file_path, progress=progress)
             except Exception as e:
                 self.log_message(f"重新加载地址文件时出错: {e}", level="ERROR")
                 return
+            finally:
+                self._close_import_progress(progress_dialog)
+            self.address_book = book
+            self.address_type_columns = book.type_columns
+            self.available_address_types = book.address_types
         
-        if df is None:
-            self.log_message("无法加载地址：DataFrame为None且无法重新加载文件。", level="ERROR")
-            return
-        
-        # 获取当前类型对应的列名
-        column = self.address_type_columns.get(self.current_address_type)
-        if not column or column not in df.columns:
-            self.log_message(f"无法找到当前类型 {self.current_address_type} 对应的列 {column}。", level="ERROR")
+        try:
+            addresses_data = book.addresses(self.current_address_type)
+        except KeyError:
+            self.log_message(f"无法找到当前类型 {self.current_address_type} 对应的地址列。", level="ERROR")
             return
         
-        # 提取地址并构建字典列表
-        addresses_data = []
-        for index, row in df.iterrows():
-            addr = str(row[column]).strip()
-            if addr:  # 只添加地址不为空的行
-                addresses_data.append({'address': addr, 'label': None})  # 多列格式暂不支持label
-        
         self.current_addresses = addresses_data
         self.used_addresses = set()  # 清除已用地址记录
         self.log_message(f"已加载 {len(addresses_data)} 条 {self.current_address_type} 类型的地址。", level="INFO")
@@ -929,53 +1049,18 @@ class WithdrawalHelper(QMainWindow):
         self._load_addresses_for_current_type()
 
     def refresh_address_list(self):
-        """刷新界面上的地址列表显示 (处理字典列表)."""
-        if not hasattr(self, 'address_text'):
+        """刷新界面上的地址列表显示 (处理字典列表)。文本在模型的 data() 中按需生成。"""
+        if not hasattr(self, 'address_model'):
             return # UI not ready
-            
+
+        self.address_model.set_show_full(self.show_full_addresses)
+        self.address_model.set_addresses(self.current_addresses, used=self.used_addresses)
         if not self.current_addresses:
-            self.address_text.setHtml( 
-                "<div style='text-align:center; margin-top:50px;'>"
-                "<span style='color:#CCCCCC;'>地址列表为空。请点击「导入地址」按钮导入。</span>"
-                "</div>"
-            )
+            self.address_stack.setCurrentWidget(self.address_empty_label)
             return
-                
-        html_lines = [] 
-        line_count = 0
-        for i, item in enumerate(self.current_addresses):
-            line_count += 1
-            index_str = f"{i + 1:>4}: "
-            
-            addr = item.get('address', '[地址缺失]')
-            label = item.get('label')
-            
-            display_addr = addr
-            if not self.show_full_addresses:
-                display_addr = self._mask_addresses_in_text(addr) # 地址打码
-
-            # 构造显示行: 如果有标签，显示 "标签 (地址)"，否则只显示地址
-            display_line = f"{index_str}"
-            if label:
-                # 对标签也进行简单的HTML转义
-                label_escaped = label.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                display_line += f"{label_escaped} ({display_addr})"
-            else:
-                display_line += display_addr
-            
-            html_lines.append(display_line)
-
-            if line_count > 2000: # 限制显示行数
-                 html_lines.append("... (列表过长，仅显示前2000条)")
-                 self.logger.warning("地址列表过长，仅在UI中显示前2000条。")
-                 break
-                
-        # 使用 <pre> 标签保留格式和对齐
-        display_html = "<pre>" + "\n".join(html_lines) + "</pre>" 
-        
-        self.address_text.setHtml(display_html)
-        self.address_text.verticalScrollBar().setValue(0) # 滚动到顶部
-        self.log_message(f"地址列表UI已刷新，显示 {line_count} 条记录。", level="DEBUG")
+        self.address_stack.setCurrentWidget(self.address_list_view)
+        self.address_list_view.scrollToTop()
+        self.log_message(f"地址列表UI已刷新，共 {len(self.current_addresses)} 条记录。", level="DEBUG")
         
     def load_address_from_last_file(self):
         """尝试从配置文件中记录的上次使用的文件路径加载地址。"""
@@ -1032,9 +1117,7 @@ class WithdrawalHelper(QMainWindow):
 
     def _update_log_display(self, action, data):
         if action == "log":
-            self.log_text.append(data)
-            scrollbar = self.log_text.verticalScrollBar()
-            scrollbar.setValue(scrollbar.maximum())
+            self.log_sink.post(data)
         elif action == "stop_withdrawal":
             self.stop_withdrawal()
 
@@ -1061,44 +1144,14 @@ class WithdrawalHelper(QMainWindow):
         if hasattr(self, 'show_full_addresses') and not self.show_full_addresses:
             log_entry = self._mask_addresses_in_text(log_entry)
         colored_entry = f'<span style="color:{color};">{log_entry}</span>'
-        if hasattr(self, 'update_signal'):
+        if hasattr(self, 'log_sink'):
             # Only update UI if the level is not DEBUG
             if level.strip().upper() != "DEBUG": # Use strip().upper() for robust check
-                try:
-                    # Corrected: Emit 'log' action and the HTML formatted colored_entry
-                    self.update_signal.emit("log", colored_entry)
-                except RuntimeError as e:
-                    self.logger.error(f"Failed to update UI with log message: {e}", exc_info=True)
+                # 线程安全的队列，不再为每一行发射信号；由定时器在主线程批量写入
+                self.log_sink.post(colored_entry)
         
     def _mask_addresses_in_text(self, text):
-        address_patterns = [
-            r'(0x[a-fA-F0-9]{40})',
-            r'([13][a-zA-Z0-9]{25,34}|bc1[a-zA-Z0-9]{25,90})',
-            r'(T[a-zA-Z0-9]{33})',
-            r'([1-9A-HJ-NP-Za-km-z]{32,44})'
-        ]
-        original_text = text
-        for pattern in address_patterns:
-            matches = list(re.finditer(pattern, original_text))
-            temp_text = list(original_text)
-            
-            current_offset = 0
-            for match in matches:
-                original_addr = match.group(1)
-                if '...' in original_addr:
-                    continue
-                    
-                prefix = original_addr[:8]
-                suffix = original_addr[-6:]
-                masked_addr = f"{prefix}...{suffix}"
-                
-                start = match.start(1) + current_offset
-                end = match.end(1) + current_offset
-                
-                temp_text[start:end] = list(masked_addr)
-                current_offset += len(masked_addr) - len(original_addr)
-            original_text = "".join(temp_text)
-        return original_text
+        return mask_addresses_in_text(text)
 
     def _load_config_and_initialize_api(self):
         """加载应用配置, 设置上次选择的交易所, 初始化主API连接, 并尝试初始化Binance作为价格数据源."""
@@ -1120,20 +1173,8 @@ class WithdrawalHelper(QMainWindow):
             self.log_message("配置文件加载/解析成功。", level="INFO")
             self._load_general_app_settings_from_config()
 
-            # 尝试初始化 Binance API 作为价格数据源
-            self.logger.info("尝试初始化Binance API作为价格数据源...")
-            try:
-                price_api_candidate = BinanceAPI(self.config, self.logger)
-                connected, message = price_api_candidate.connect() # connect()应该返回 (bool, str)
-                if connected:
-                    self.price_provider_api = price_api_candidate
-                    self.binance_api_for_prices_connected = True
-                    self.logger.info(f"成功连接到Binance作为价格数据源: {message}")
-                else:
-                    self.logger.warning(f"无法连接到Binance作为价格数据源: {message}. USD估值可能不可用。")
-            except Exception as e_price_api: # Catch any exception during Binance price API init
-                self.logger.error(f"初始化Binance价格数据源时发生错误: {e_price_api}", exc_info=True)
-                # self.binance_api_for_prices_connected remains False
+            # Binance 价格数据源与主交易所API在各自的线程中并发连接，谁先完成谁先更新界面
+            self._start_price_provider_init()
 
             # 设置和初始化当前选择的交易所 (主操作API)
             default_exchange = list(self.EXCHANGES.keys())[0]
@@ -1169,6 +1210,33 @@ class WithdrawalHelper(QMainWindow):
         self.load_addresses_after_ui_ready() # Address loading doesn't depend on API state
         return False # Indicate failure of this overall method
 
+    def _start_price_provider_init(self):
+        """在后台线程中连接作为价格数据源的Binance API (不预取币种)。"""
+        self.logger.info("尝试初始化Binance API作为价格数据源...")
+        self.price_api_thread = QThread()
+        if hasattr(self, 'thread_references'): self.thread_references.append(self.price_api_thread)
+        self.price_api_worker = ApiInitWorker("Binance(价格)", BinanceAPI, self.config, self.logger, prefetch_coins=False)
+        self.price_api_worker.moveToThread(self.price_api_thread)
+        self.price_api_thread.started.connect(self.price_api_worker.run)
+        self.price_api_worker.finished.connect(self._handle_price_provider_init_result)
+        self.price_api_worker.finished.connect(self.price_api_thread.quit)
+        self.price_api_thread.finished.connect(self.price_api_worker.deleteLater)
+        self.price_api_thread.finished.connect(self.price_api_thread.deleteLater)
+        self.price_api_thread.start()
+
+    def _handle_price_provider_init_result(self, connected, message, api_instance, exchange_name, _coins):
+        """价格数据源连接完成。主交易所可能已经先连接并显示了币种，此时补上USD估值。"""
+        self.price_api_thread = None
+        self.price_api_worker = None
+        if connected:
+            self.price_provider_api = api_instance
+            self.binance_api_for_prices_connected = True
+            self.logger.info(f"成功连接到Binance作为价格数据源: {message}")
+            if hasattr(self, 'coin_combo') and self.coin_combo.currentText():
+                self.update_usd_values(force_update=True)
+        else:
+            self.logger.warning(f"无法连接到Binance作为价格数据源: {message}. USD估值可能不可用。")
+
     def _create_default_config(self):
         """创建一份默认的配置文件."""
         self.logger.info(f"正在创建默认配置文件于: {self.config_path}")
@@ -1195,6 +1263,14 @@ class WithdrawalHelper(QMainWindow):
         default_cfg.set('WITHDRAWAL', 'max_interval', '600')
         default_cfg.set('WITHDRAWAL', 'warning_threshold', '1000')
         default_cfg.set('WITHDRAWAL', 'enable_warning', 'True')
+        default_cfg.set('WITHDRAWAL', 'balance_resync_every', str(BalanceLedger.DEFAULT_RESYNC_EVERY))
+        default_cfg.set('WITHDRAWAL', 'multi_account_enabled', 'False') # 为True时 [ACCOUNT:名称] 子账户并发参与提币
+        RetryPolicy().write_defaults(default_cfg, 'WITHDRAWAL') # 临时错误的重试次数、退避和批次重试预算
+
+        # API耗时统计的 Prometheus 导出: export_file 为空、port 为0时不导出
+        default_cfg.add_section('METRICS')
+        default_cfg.set('METRICS', 'export_file', '')
+        default_cfg.set('METRICS', 'port', '0')
         try:
             with open(self.config_path, 'w', encoding='utf-8') as f:
                 default_cfg.write(f)
@@ -1214,12 +1290,20 @@ class WithdrawalHelper(QMainWindow):
             self.max_interval = self.config.getint(wp_section, 'max_interval', fallback=600)
             self.warning_threshold = self.config.getfloat(wp_section, 'warning_threshold', fallback=1000.0)
             self.enable_warning = self.config.getboolean(wp_section, 'enable_warning', fallback=True)
+            self.balance_resync_every = self.config.getint(wp_section, 'balance_resync_every', fallback=BalanceLedger.DEFAULT_RESYNC_EVERY)
+            self.multi_account_enabled = self.config.getboolean(wp_section, 'multi_account_enabled', fallback=False)
+            self.retry_policy = RetryPolicy.from_config(self.config, wp_section)
         else:
             self.logger.info(f"配置文件中未找到 '{wp_section}' 部分，将使用默认提现参数。")
             self.min_interval = 60
             self.max_interval = 600
             self.warning_threshold = 1000.0
             self.enable_warning = True
+            self.balance_resync_every = BalanceLedger.DEFAULT_RESYNC_EVERY
+            self.multi_account_enabled = False
+            self.retry_policy = RetryPolicy()
+        self.metrics_export_file = self.config.get('METRICS', 'export_file', fallback='').strip()
+        self._apply_metrics_port(self.config.getint('METRICS', 'port', fallback=0))
         self.logger.debug("常规应用配置已加载。")
         self.logger.info(f"加载后的提现间隔: min={self.min_interval}, max={self.max_interval}") # <--- 新增日志
 
@@ -1304,12 +1388,15 @@ class WithdrawalHelper(QMainWindow):
         # 将线程添加到引用存储列表 (可能不再需要，但暂时保留)
         if hasattr(self, 'thread_references'): self.thread_references.append(self.api_thread)
         
-        self.api_worker = ApiInitWorker(exchange_name, api_class, self.config, self.logger)
+        self.api_worker = ApiInitWorker(exchange_name, api_class, self.config, self.logger,
+                                        snapshot_store=self.metadata_snapshot_store)
         self.api_worker.moveToThread(self.api_thread)
         
         # 连接信号
         self.api_thread.started.connect(self.api_worker.run)
         self.api_worker.finished.connect(self._handle_api_init_result)
+        self.api_worker.metadata_refreshed.connect(self._handle_metadata_refreshed)
+        self.api_worker.metadata_confirmed.connect(self._handle_metadata_confirmed)
         self.api_worker.log_message.connect(lambda msg, level: self.log_message(msg, level=level))
         
         # --- 改进的清理连接 ---
@@ -1323,14 +1410,15 @@ class WithdrawalHelper(QMainWindow):
         # 启动线程
         self.api_thread.start()
         
-    def _handle_api_init_result(self, connected, message, api_instance, exchange_name):
+    def _handle_api_init_result(self, connected, message, api_instance, exchange_name, prefetched_coins=None):
         """处理API初始化结果"""
         if connected:
             self.current_exchange_api = api_instance
             self.log_message(f"成功连接到 {exchange_name}: {message}", level="SUCCESS")
             self.update_api_status_indicator(True)
             if hasattr(self, 'status_label'): self.status_label.setText(f"{exchange_name} - 已连接")
-            self._perform_full_ui_refresh() 
+            self._perform_full_ui_refresh(prefetched_coins)
+            self._offer_batch_resume()
         else:
             self.log_message(f"连接到 {exchange_name} 失败: {message}", level="ERROR")
             self.update_api_status_indicator(False)
@@ -1354,6 +1442,31 @@ class WithdrawalHelper(QMainWindow):
                  if hasattr(api_instance, 'timestamp_error_detected'): # 重置标志，避免重复提示
                      setattr(api_instance, 'timestamp_error_detected', False) # Use setattr for safety
 
+    def _handle_metadata_refreshed(self, api_instance, coins):
+        """后台验证发现快照已过期：用实时数据原地刷新界面，尽量保留当前选择。"""
+        if api_instance is not self.current_exchange_api:
+            return # 期间已切换交易所
+        if self.running:
+            self.log_message("币种信息已更新，提币进行中，界面将在下次切换币种时使用新数据。", level="DEBUG")
+            return
+        previous_coin = self.coin_combo.currentText() if hasattr(self, 'coin_combo') else ''
+        previous_network = self.network_combo.currentText() if hasattr(self, 'network_combo') else ''
+        self.log_message(f"{self.current_exchange_name} 币种信息有更新，正在刷新界面...", level="INFO")
+        self._perform_full_ui_refresh(coins, preferred_coin=previous_coin)
+        if previous_network and hasattr(self, 'network_combo'):
+            index = self.network_combo.findText(previous_network)
+            if index > 0:
+                self.network_combo.setCurrentIndex(index)
+
+    def _handle_metadata_confirmed(self, api_instance):
+        """后台验证确认快照仍然有效：手续费标签去掉"缓存"标记。"""
+        if api_instance is not self.current_exchange_api:
+            return
+        if hasattr(self, 'coin_combo') and hasattr(self, 'network_combo'):
+            coin, network = self.coin_combo.currentText(), self.network_combo.currentText()
+            if coin and network:
+                self._update_fee_display(coin, network)
+
     def _clear_exchange_specific_ui_elements(self):
         """清除UI上依赖于特定交易所API数据的内容 (币种, 网络, 余额等)."""
         self.logger.debug("正在清除交易所特定的UI元素...")
@@ -1380,9 +1493,11 @@ class WithdrawalHelper(QMainWindow):
         # Clear any displayed API error messages related to coin/network data in status bar or log if needed here.
         self.log_message("交易所特定UI元素已清除。", level="DEBUG")
 
-    def _perform_full_ui_refresh(self):
+    def _perform_full_ui_refresh(self, prefetched_coins=None, preferred_coin=None):
         """在成功连接到API后, 全面刷新和填充UI元素.
            币种 -> (触发) 网络 -> 余额 -> 价格 -> 手续费.
+           prefetched_coins 为 ApiInitWorker 在连接线程中预取的币种列表，提供时不再请求API。
+           preferred_coin 在列表中时保持选中该币种，否则选中第一个。
         """
         if not self.current_exchange_api:
             self.log_message("UI刷新失败: 当前交易所API未设置。", level="WARNING")
@@ -1400,7 +1515,10 @@ class WithdrawalHelper(QMainWindow):
                 self.log_message("UI控件 (coin_combo) 未初始化，无法填充币种。", level="ERROR")
                 return
                 
-            all_tradable_coins = self.current_exchange_api.get_all_tradable_coins()
+            if prefetched_coins is not None:
+                all_tradable_coins = prefetched_coins
+            else:
+                all_tradable_coins = self.current_exchange_api.get_all_tradable_coins()
             
             # Ensure all_tradable_coins is a list to prevent errors during iteration/filtering
             if not isinstance(all_tradable_coins, list):
@@ -1420,7 +1538,8 @@ class WithdrawalHelper(QMainWindow):
                 self.coin_combo.setEnabled(True)
                 self.log_message(f"为 {self.current_exchange_name} 加载了 {original_coin_count} 个币种，筛选后得到 {len(self.supported_coins_for_current_exchange)} 个支持的币种: {', '.join(self.supported_coins_for_current_exchange)}。", level="INFO")
                 if self.coin_combo.count() > 0:
-                    self.coin_combo.setCurrentIndex(0) 
+                    preferred_index = self.coin_combo.findText(preferred_coin) if preferred_coin else -1
+                    self.coin_combo.setCurrentIndex(max(preferred_index, 0))
             else:
                 if original_coin_count == 0:
                     self.log_message(f"{self.current_exchange_name} API 未返回任何可交易币种。这可能由API错误或无可用数据导致。请检查API侧的详细日志。", level="WARNING")
@@ -1533,6 +1652,36 @@ class WithdrawalHelper(QMainWindow):
                  self.update_api_status_indicator(False)
         self.logger.info("config_updated_and_reconnect 方法执行完毕。") # <-- 新增日志
 
+    def _apply_metrics_port(self, port: int):
+        """按配置启动、停止或更换 /metrics HTTP端口 (只监听 127.0.0.1)。"""
+        current = getattr(self, 'metrics_server', None)
+        if current is not None and current.port == port:
+            return
+        if current is not None:
+            current.close()
+            self.metrics_server = None
+        if port > 0:
+            try:
+                self.metrics_server = MetricsServer(port)
+                self.log_message(f"API统计: http://127.0.0.1:{port}/metrics", level="INFO")
+            except OSError as e:
+                self.log_message(f"无法在端口 {port} 提供API统计: {e}", level="WARNING")
+
+    def _export_api_metrics(self):
+        """配置了 export_file 时写入 Prometheus 文本文件。"""
+        if not getattr(self, 'metrics_export_file', ''):
+            return
+        try:
+            API_METRICS.write_prometheus(self.metrics_export_file)
+        except OSError as e:
+            self.logger.warning(f"写入API统计文件 {self.metrics_export_file} 失败: {e}")
+
+    def show_diagnostics(self):
+        """处理工具栏 "API诊断" 按钮: 显示各API方法的调用次数、错误率和耗时分位数。"""
+        default_path = getattr(self, 'metrics_export_file', '') or os.path.join(self.app_data_dir, "api_metrics.prom")
+        dialog = DiagnosticsDialog(API_METRICS, default_export_path=default_path, parent=self)
+        dialog.exec()
+
     def show_history(self):
         """处理工具栏 "历史记录" 按钮点击事件. \n           获取历史记录并通过富文本格式在可滚动的自定义对话框中显示。
         """        
@@ -1964,8 +2113,9 @@ class WithdrawalHelper(QMainWindow):
         if hasattr(self, 'toggle_address_btn'):
             self.toggle_address_btn.setText("隐藏" if self.show_full_addresses else "显示")
             self.toggle_address_btn.setChecked(self.show_full_addresses)
-            
-        self.refresh_address_list() # 重新加载并根据新的显示模式格式化地址
+
+        if hasattr(self, 'address_model'):
+            self.address_model.set_show_full(self.show_full_addresses) # 只重绘可见行
 
     def show_validation_results(self, summary_message: str, invalid_details: list, total_processed: int):
         """显示地址验证结果。
@@ -2101,230 +2251,360 @@ class WithdrawalHelper(QMainWindow):
 
     def _process_withdrawals(self, coin, network, min_amount, max_amount, 
                              target_addresses: list, # <--- 新增参数
-                             min_interval, max_interval):
-        """后台提币处理线程 (处理带标签地址)."""
+                             min_interval, max_interval, resume_state: JournalState | None = None):
+        """后台提币处理线程 (处理带标签地址)。实际执行逻辑在 WithdrawalEngine 中。
+
+        resume_state 不为None时继续向该批次的日志追加，而不是新建批次。
+        """
         self.log_message(f"提币线程开始: 将处理 {len(target_addresses)} 个随机顺序的地址 ({coin} on {network})", level="INFO")
-        total_addresses_in_range = len(target_addresses) # 新计算
-        processed_count = 0
-        
-        # --- 获取手续费和精度 --- 
-        fee_decimal = Decimal('0')
-        actual_precision = 8 # 先设置一个默认精度
-        self.log_message(f"获取 {coin}-{network} 的提现手续费和精度...", level="DEBUG")
+        journal = None
+        batch_status = STATUS_STOPPED
+        failures = FailureSet(self.current_exchange_name, coin, network, min_amount, max_amount,
+                              source_path=self.last_address_file_path or None)
         try:
-            # 获取手续费
-            fee_info = self.current_exchange_api.get_withdrawal_fee(coin, network)
-            if fee_info is not None:
-                if isinstance(fee_info, dict):
-                    fee_str = fee_info.get('fee')
-                elif isinstance(fee_info, (str, float, int)):
-                    fee_str = str(fee_info)
-                else:
-                    fee_str = None
-                
-                if fee_str: # Example check if fee_str was derived
-                    fee_decimal = Decimal(fee_str)
-                    self.log_message(f"获取到提币手续费: {fee_decimal} {coin}", level="INFO")
-                else:
-                     self.log_message(f"无法解析或获取 {coin}-{network} 的手续费信息，将使用 0。", level="WARNING")
-
-            # 获取实际提现精度
-            precision_from_api = self.current_exchange_api.get_withdraw_precision(coin, network)
-            if precision_from_api is not None:
-                actual_precision = precision_from_api
-                self.log_message(f"获取到 {coin}-{network} 的实际提现精度: {actual_precision} 位小数", level="INFO")
+            # --- 崩溃安全的批次日志 ---
+            if resume_state is not None:
+                journal = WithdrawalJournal.reopen(resume_state, self.logger)
             else:
-                # 如果API未返回精度, 使用默认值并警告
-                actual_precision = 6 # 改为更保守的默认值 6
-                self.log_message(f"无法从API获取 {coin}-{network} 的提现精度，将使用默认值: {actual_precision} 位小数", level="WARNING")
-
-        except Exception as e_fee_prec:
-            self.log_message(f"获取手续费或精度时出错: {e_fee_prec}，将使用默认手续费0和默认精度{actual_precision}。", level="ERROR")
-            fee_decimal = Decimal('0') # Ensure fee is 0 on error
-            # actual_precision remains the default set earlier (or 6 if set above)
-            
-        # --- 预获取USD价格用于大额检查 (如果需要) ---
-        usd_price = None
-        if self.enable_warning and self.price_provider_api and self.binance_api_for_prices_connected:
-            try:
-                binance_symbol = f"{coin.upper()}USDT"
-                price_str = self.price_provider_api.get_symbol_ticker(symbol=binance_symbol)
-                if price_str:
-                    usd_price = Decimal(price_str)
-                    self.log_message(f"获取到 {coin} 的USD价格: {usd_price} (用于大额检查)", level="DEBUG")
-            except Exception as e_price:
-                self.log_message(f"无法获取 {coin} 的USD价格进行大额检查: {e_price}", level="WARNING")
-
-        # --- 开始循环处理地址 ---
-        try:
-            for i, current_address_info in enumerate(target_addresses): # 新循环，使用 enumerate
-                if not self.running: 
-                    self.log_message("提币线程收到停止信号，正在退出...", level="INFO")
-                    break
-                
-                # 获取当前地址信息 (字典)
-                addr = current_address_info.get('address')
-                label = current_address_info.get('label') # 可能为 None
-                
-                if not addr: # 如果地址为空，则跳过
-                    self.log_message(f"当前处理的随机地址列表中第 {i+1} 个条目地址为空，跳过。", level="WARNING")
-                    processed_count += 1
-                    continue
-                
-                # 使用 enumerate 返回的 i (0-based) 作为当前处理的序号
-                address_display_index_in_shuffled_list = i + 1 
-                
-                self.log_message(f"[{address_display_index_in_shuffled_list}/{total_addresses_in_range} (随机顺序)] 处理地址: {label + ' (' + self._mask_addresses_in_text(addr) + ')' if label else self._mask_addresses_in_text(addr)}...", level="DEBUG")
-                
-                # --- 1. 生成随机数量并处理精度 ---
+                journal = WithdrawalJournal.create(
+                    self.journal_dir, self.logger, self.current_exchange_name, coin, network, target_addresses,
+                    params={'min_amount': str(min_amount), 'max_amount': str(max_amount),
+                            'min_interval': min_interval, 'max_interval': max_interval})
+            self.log_message(f"提币日志: {journal.path}", level="DEBUG")
+
+            # --- 预获取USD价格用于大额检查 (如果需要) ---
+            usd_price = None
+            if self.enable_warning and self.price_provider_api and self.binance_api_for_prices_connected:
                 try:
-                    random_amount_raw = Decimal(random.uniform(float(min_amount), float(max_amount)))
-                    # 根据 *实际获取或默认的* 精度进行截断 (向下取整)
-                    quantizer = Decimal('1e-' + str(actual_precision))
-                    random_amount_quantized = random_amount_raw.quantize(quantizer, rounding=ROUND_DOWN)
-                    self.log_message(f"  -> 计划提币数量 (原始): {random_amount_raw:.18f} {coin}", level="DEBUG")
-                    self.log_message(f"  -> 计划提币数量 (量化到 {actual_precision} 位小数): {random_amount_quantized} {coin}", level="DEBUG")
-                    
-                    if random_amount_quantized <= 0:
-                         self.log_message(f"  -> 生成的提币数量过小 ({random_amount_quantized})，跳过此地址。", level="WARNING")
-                         processed_count += 1 # 算作处理过
-                         continue
-                except Exception as e_amount:
-                    self.log_message(f"生成或处理提币数量时出错: {e_amount}，跳过此地址 (随机列表中的第 {address_display_index_in_shuffled_list} 个)", level="ERROR")
-                    processed_count += 1
-                    continue
-
-                # --- 2. 大额提币检查 (应在余额检查之前) ---
-                if self.enable_warning and usd_price is not None:
-                    try:
-                        usd_value = random_amount_quantized * usd_price
-                        if usd_value >= Decimal(str(self.warning_threshold)):
-                            self.log_message(f"警告：地址 {address_display_index_in_shuffled_list} 的提币金额 ${usd_value:.2f} 达到或超过阈值 ${self.warning_threshold:.2f}", level="WARNING")
-                            
-                            # 发出信号请求用户确认
-                            self.confirm_withdrawal_signal.emit(coin, network, random_amount_quantized, addr, None, True)
-                            
-                            # 清除事件标志并等待
-                            self.withdrawal_confirm_event.clear()
-                            self.log_message(f"  -> 等待用户确认大额提币 (地址: {self._mask_addresses_in_text(addr)}, 金额: {random_amount_quantized} {coin})...", level="INFO")
-                            self.withdrawal_confirm_event.wait() # 线程在此阻塞直到事件被设置
-
-                            if not self.user_agreed_to_this_withdrawal:
-                                self.log_message(f"  -> 用户未确认或取消了大额提币，跳过地址 {self._mask_addresses_in_text(addr)} (随机列表中的第 {address_display_index_in_shuffled_list} 个)", level="WARNING")
-                                processed_count += 1
-                                continue # 跳到下一个地址
-                            else:
-                                self.log_message(f"  -> 用户已确认大额提币，继续执行对地址 {self._mask_addresses_in_text(addr)} 的提币操作。", level="INFO")
-                    except Exception as e_large_check:
-                         self.log_message(f"大额提币检查计算时出错: {e_large_check}", level="WARNING")
-
-                # --- 3. 检查余额 (考虑手续费) ---
-                try:
-                    balance_str = self.current_exchange_api.get_balance(coin)
-                    if balance_str is None:
-                        self.log_message(f"无法获取 {coin} 余额，跳过地址 {self._mask_addresses_in_text(addr)} (随机列表中的第 {address_display_index_in_shuffled_list} 个)", level="WARNING")
-                        processed_count += 1
-                        continue
-                    
-                    balance_decimal = Decimal(balance_str)
-                    required_amount = random_amount_quantized + fee_decimal
-                    
-                    if balance_decimal < required_amount:
-                        self.log_message(f"余额不足 (需要: {required_amount}, 可用: {balance_decimal})，跳过地址 {self._mask_addresses_in_text(addr)} (随机列表中的第 {address_display_index_in_shuffled_list} 个)", level="WARNING")
-                        processed_count += 1
-                        continue # 跳到下一个地址
-                    else:
-                         self.log_message(f"  -> 余额检查通过 (可用: {balance_decimal}, 需要: {required_amount})", level="DEBUG")
-                except Exception as e_balance:
-                     self.log_message(f"检查余额时出错: {e_balance}，跳过此地址 {self._mask_addresses_in_text(addr)} (随机列表中的第 {address_display_index_in_shuffled_list} 个)", level="ERROR")
-                     processed_count += 1
-                     continue
-
-                # --- 4. 构造API地址参数并执行实际提币API调用 ---
-                address_for_api = addr
-                if self.current_exchange_name == 'OKX':
-                    # 检查地址类型
-                    is_evm_address = addr.startswith('0x') and len(addr) == 42
-                    is_sol_address = not is_evm_address and len(addr) >= 32 and len(addr) <= 44
-                    
-                    if is_evm_address:
-                        # 对于EVM地址，OKX API可能期望纯地址，忽略Excel中的label
-                        self.log_message(f"  -> OKX EVM地址: 使用原始地址 {self._mask_addresses_in_text(addr)} (忽略Excel label: {label})", level="DEBUG")
-                        address_for_api = addr 
-                    elif is_sol_address and label:
-                        # 对于SOL地址，如果有label，使用 address:label 格式
-                        address_for_api = f"{addr}:{label}"
-                        self.log_message(f"  -> OKX SOL地址: 使用地址:label格式: {self._mask_addresses_in_text(address_for_api)}", level="DEBUG")
-                    elif label: # 其他非EVM地址，且Excel中提供了label
-                        address_for_api = f"{addr}:{label}"
-                        self.log_message(f"  -> OKX 非EVM地址: 使用地址:label格式: {self._mask_addresses_in_text(address_for_api)}", level="DEBUG")
-                    # else: 非EVM地址且无label，address_for_api 保持原始 addr
-                
-                success = False
-                message = "未知错误"
+                    binance_symbol = f"{coin.upper()}USDT"
+                    price_str = self.price_provider_api.get_symbol_ticker(symbol=binance_symbol)
+                    if price_str:
+                        usd_price = Decimal(price_str)
+                        self.log_message(f"获取到 {coin} 的USD价格: {usd_price} (用于大额检查)", level="DEBUG")
+                except Exception as e_price:
+                    self.log_message(f"无法获取 {coin} 的USD价格进行大额检查: {e_price}", level="WARNING")
+            warning_threshold = self.warning_threshold if self.enable_warning else None
+
+            sub_accounts = self._connect_sub_accounts() if self.multi_account_enabled else []
+            if sub_accounts:
+                self._run_multi_account_batch(sub_accounts, coin, network, min_amount, max_amount, target_addresses,
+                                              min_interval, max_interval, usd_price, warning_threshold, journal, failures)
+            else:
+                engine = self._create_withdrawal_engine(self.current_exchange_api, on_wait=self.wait_update_signal.emit,
+                                                        journal=journal, failures=failures)
                 try:
-                    # 格式化提币数量为字符串
-                    amount_str_for_api = f"{random_amount_quantized:.{actual_precision}f}"
-                    self.log_message(f"  -> 准备调用API提币: {amount_str_for_api} {coin} 到 {self._mask_addresses_in_text(address_for_api)}...", level="INFO")
-                    
-                    memo = None # TODO: 如果需要支持memo，从 address_info['label'] 或其他地方获取?
-                    
-                    success, message = self.current_exchange_api.withdraw(
-                        coin=coin, 
-                        network=network, 
-                        address=address_for_api, 
-                        amount=amount_str_for_api, # <--- 传递格式化后的字符串
-                        memo=memo
-                    )
-                except Exception as e_withdraw:
-                    success = False
-                    message = f"API调用异常: {e_withdraw}"
-                    self.log_message(f"提币API调用时发生异常: {e_withdraw}", level="ERROR", exc_info=True)
-
-                # --- 5. 处理提币结果 ---
-                if success:
-                    self.used_addresses.add(addr) # 记录原始地址为已使用
-                    withdraw_id = message # API成功时 message 通常是提币ID
-                    self.log_message(f"地址 {self._mask_addresses_in_text(addr)} (随机列表中的第 {address_display_index_in_shuffled_list} 个) 提币成功: {withdraw_id}", level="SUCCESS")
-                else:
-                    error_msg = message # API失败时 message 通常是错误信息
-                    self.log_message(f"地址 {self._mask_addresses_in_text(address_for_api)} (随机列表中的第 {address_display_index_in_shuffled_list} 个) 提币失败: {error_msg}", level="ERROR")
-                    # 可选：如果提币失败是否重试？或添加到失败列表？暂时只记录日志。
-
-                processed_count += 1
-
-                # --- 6. 更新进度条 ---
-                progress_percentage = int((processed_count / total_addresses_in_range) * 100)
-                progress_text = f"进度: {progress_percentage}%"
-                self.progress_update_signal.emit(progress_percentage, progress_text)
-
-                # --- 7. 随机等待 (如果不是最后一个地址) ---
-                if address_display_index_in_shuffled_list < total_addresses_in_range: # 新的判断条件
-                    wait_time = random.randint(min_interval, max_interval)
-                    self.log_message(f"下一次提币前等待 {wait_time} 秒...", level="DEBUG")
-                    wait_start = time.time()
-                    while time.time() - wait_start < wait_time:
-                        if not self.running: 
-                            self.log_message("在等待期间收到停止信号，退出...", level="INFO")
-                            break 
-                        remaining_wait = int(wait_time - (time.time() - wait_start))
-                        wait_percentage = int(((time.time() - wait_start) / wait_time) * 100) if wait_time > 0 else 100
-                        wait_text = f"等待: {remaining_wait}秒"
-                        self.wait_update_signal.emit(wait_percentage, wait_text)
-                        time.sleep(0.5) 
-                    if not self.running: break 
-               
-                self.wait_update_signal.emit(0, "等待: 0秒") 
-
+                    plan = engine.prepare(coin, network, target_addresses, min_amount, max_amount,
+                                          usd_price=usd_price, warning_threshold=warning_threshold)
+                except Exception as e_plan:
+                    self.log_message(f"生成提币计划时出错: {e_plan}，提币流程终止。", level="ERROR", exc_info=True)
+                    for address_info in target_addresses:
+                        failures.add(address_info.get('address', ''), address_info.get('label'), FAIL_PLAN_ERROR, str(e_plan))
+                    return
+                self._export_withdrawal_plan(plan)
+                stats = engine.execute(plan, min_interval, max_interval)
+                self._log_withdrawal_summary(stats, engine.retry_budget)
+            if self.running:
+                batch_status = STATUS_COMPLETED
         except Exception as e_thread:
             self.log_message(f"提币线程主循环发生意外错误: {e_thread}", level="CRITICAL", exc_info=True)
         finally:
-            # --- 8. 线程结束，发射完成信号 --- 
+            if journal is not None:
+                try:
+                    if batch_status == STATUS_COMPLETED and not self._closing:
+                        journal.finish(batch_status)
+                    else:
+                        journal.close() # 被停止、出错或应用关闭导致中断的批次不写结束记录，下次启动时可以恢复
+                except Exception as e_journal:
+                    self.logger.error(f"关闭提币日志时出错: {e_journal}")
+            self.last_failures = failures # 在发射完成信号之前设置，_on_withdrawal_finished 中读取
+            # --- 线程结束，发射完成信号 --- 
             self.log_message("提币流程正常结束或已停止。", level="INFO")
             # self.running 在 _on_withdrawal_finished 中设置为 False
             self.withdrawal_finished_signal.emit() # 发射信号，由主线程更新UI
             self.logger.debug("_process_withdrawals finally block executed.")
 
+    def _offer_batch_resume(self):
+        """
+        API连接成功后检查当前交易所是否有未完成的批次 (上次崩溃或关闭时中断)。
+        读取日志和对账在 BatchResumeWorker 中进行，完成后由 _handle_unfinished_batches 询问是否继续。
+        """
+        if self.current_exchange_name in self._resume_checked_exchanges or self.running:
+            return
+        self._resume_checked_exchanges.add(self.current_exchange_name)
+
+        self.resume_thread = QThread()
+        if hasattr(self, 'thread_references'): self.thread_references.append(self.resume_thread)
+
+        self.resume_worker = BatchResumeWorker(self.current_exchange_name, self.current_exchange_api,
+                                               self.journal_dir, self.logger)
+        self.resume_worker.moveToThread(self.resume_thread)
+
+        self.resume_thread.started.connect(self.resume_worker.run)
+        self.resume_worker.finished.connect(self._handle_unfinished_batches)
+        self.resume_worker.log_message.connect(lambda msg, level: self.log_message(msg, level=level))
+
+        self.resume_worker.finished.connect(self.resume_thread.quit)
+        self.resume_thread.finished.connect(self.resume_worker.deleteLater)
+        self.resume_thread.finished.connect(self.resume_thread.deleteLater)
+
+        self.resume_thread.start()
+
+    def _handle_unfinished_batches(self, exchange_name, unfinished):
+        """在界面线程上标记已完成的地址，并逐个询问是否恢复未完成的批次。"""
+        if exchange_name != self.current_exchange_name:
+            # 检查期间已切换交易所，下次连接该交易所时重新检查
+            self._resume_checked_exchanges.discard(exchange_name)
+            return
+        abandoned = []
+        for state in unfinished:
+            self.used_addresses.update(state.completed)
+            for address in state.completed:
+                self.address_model.set_status(address, ADDRESS_STATUS_USED)
+            if not state.remaining_targets():
+                continue # 已由 BatchResumeWorker 写入结束记录
+            if self.running:
+                abandoned.append(state)
+                continue
+            details = state.describe()
+            if state.uncertain:
+                details += (f"\n\n注意: 有 {len(state.uncertain)} 个地址已发出提币请求但结果未知，"
+                            f"恢复时不会重复提币，请在提现历史中手动核对。")
+            reply = QMessageBox.question(self, "恢复未完成的提币",
+                                         f"{details}\n\n是否继续处理剩余的 {len(state.remaining_targets())} 个地址？",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                         QMessageBox.StandardButton.No)
+            if reply == QMessageBox.StandardButton.Yes:
+                self._resume_batch(state)
+            else:
+                abandoned.append(state)
+                self.log_message(f"已放弃批次 {state.batch_id}。", level="INFO")
+        if abandoned:
+            # 写结束记录需要 fsync，放到后台线程；非守护线程，保证退出前写完
+            threading.Thread(target=self._mark_batches_abandoned, args=(abandoned,)).start()
+
+    def _mark_batches_abandoned(self, states: list):
+        for state in states:
+            try:
+                mark_abandoned(state, self.logger)
+            except Exception as e:
+                self.logger.error(f"为批次 {state.batch_id} 写入结束记录失败: {e}", exc_info=True)
+
+    def _resume_batch(self, state: JournalState):
+        """按日志中的参数继续处理批次中尚未完成的地址。"""
+        header = state.header
+        params = header.get('params', {})
+        try:
+            min_amount = Decimal(params['min_amount'])
+            max_amount = Decimal(params['max_amount'])
+            min_interval = int(params.get('min_interval', self.min_interval))
+            max_interval = int(params.get('max_interval', self.max_interval))
+        except (KeyError, ValueError, ArithmeticError) as e:
+            self.log_message(f"批次 {state.batch_id} 的参数无效，无法恢复: {e}", level="ERROR")
+            return
+        remaining = state.remaining_targets()
+        self.log_message(f"恢复批次 {state.batch_id}: 继续处理 {len(remaining)} 个地址。", level="SUCCESS")
+        self._launch_withdrawal_thread(header.get('coin'), header.get('network'), min_amount, max_amount, remaining,
+                                       min_interval, max_interval, resume_state=state)
+
+    def _launch_withdrawal_thread(self, coin, network, min_amount, max_amount, targets: list,
+                                  min_interval, max_interval, resume_state: JournalState | None = None):
+        """更新按钮状态并在后台线程中处理给定的地址列表 (恢复批次、重新提币失败地址时使用)。"""
+        self.running = True
+        if hasattr(self, 'start_button'): self.start_button.setEnabled(False)
+        if hasattr(self, 'sequential_start_button'): self.sequential_start_button.setEnabled(False)
+        if hasattr(self, 'stop_button'): self.stop_button.setEnabled(True)
+        if hasattr(self, 'failures_button'): self.failures_button.setEnabled(False)
+        self.total_rows = len(targets)
+        self.withdrawal_thread = threading.Thread(
+            target=self._process_withdrawals,
+            args=(coin, network, min_amount, max_amount, targets, min_interval, max_interval),
+            kwargs={'resume_state': resume_state},
+            daemon=True
+        )
+        self.withdrawal_thread.start()
+
+    def show_failed_addresses(self):
+        """处理工具栏 "失败地址" 按钮: 显示上一批次的失败汇总，可保存为CSV或重新提币。"""
+        failures = self.last_failures
+        if not failures:
+            QMessageBox.information(self, "失败地址", "上一批次没有被跳过或失败的地址。")
+            return
+        rerun_targets = failures.rerun_targets()
+        details = "\n".join(f"  {reason}: {count}" for reason, count in failures.counts_by_reason().items())
+        box = QMessageBox(self)
+        box.setWindowTitle("失败地址")
+        box.setIcon(QMessageBox.Icon.Information)
+        box.setText(f"{failures.exchange_name} {failures.coin} ({failures.network})，共 {len(failures)} 个地址未成功:\n{details}\n\n"
+                    f"其中 {len(rerun_targets)} 个可以重新提币 (结果未知和空地址除外)。")
+        save_button = box.addButton("保存CSV", QMessageBox.ButtonRole.ActionRole)
+        rerun_button = box.addButton("重新提币", QMessageBox.ButtonRole.AcceptRole)
+        rerun_button.setEnabled(bool(rerun_targets))
+        box.addButton("关闭", QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        if box.clickedButton() is save_button:
+            self._save_failed_addresses(failures)
+        elif box.clickedButton() is rerun_button:
+            self._rerun_failed_addresses(failures)
+
+    def _save_failed_addresses(self, failures: FailureSet):
+        file_path, _ = QFileDialog.getSaveFileName(self, "保存失败地址", failures.default_csv_path(), "CSV 文件 (*.csv)")
+        if not file_path:
+            return
+        try:
+            saved_path = failures.save_csv(file_path)
+            self.log_message(f"失败地址已保存: {saved_path} (可以直接作为地址文件导入)", level="SUCCESS")
+        except OSError as e:
+            self.log_message(f"保存失败地址出错: {e}", level="ERROR")
+            QMessageBox.warning(self, "保存失败", f"无法保存文件: {e}")
+
+    def _rerun_failed_addresses(self, failures: FailureSet):
+        """用相同的币种、网络和数量范围，把失败地址作为新批次重新提币。"""
+        if self.running:
+            QMessageBox.information(self, "提示", "提币流程已经在运行中。")
+            return
+        if not self.current_exchange_api or failures.exchange_name != self.current_exchange_name:
+            QMessageBox.warning(self, "API错误", f"请先连接 {failures.exchange_name} 后再重新提币。")
+            return
+        targets = failures.rerun_targets()
+        reply = QMessageBox.question(self, "重新提币",
+                                     f"将以 {failures.min_amount} ~ {failures.max_amount} {failures.coin} ({failures.network}) "
+                                     f"重新向 {len(targets)} 个地址提币，是否继续？",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self.log_message(f"重新提币: {len(targets)} 个失败地址 ({failures.coin} on {failures.network})。", level="SUCCESS")
+        self._launch_withdrawal_thread(failures.coin, failures.network, failures.min_amount, failures.max_amount,
+                                       targets, self.min_interval, self.max_interval)
+
+    def _create_withdrawal_engine(self, exchange_api, on_wait=None, name=None, journal=None,
+                                  failures: FailureSet | None = None) -> WithdrawalEngine:
+        """创建连接到界面回调的提币执行器。"""
+        return WithdrawalEngine(
+            exchange_api, self.current_exchange_name, self.logger,
+            log=self.log_message,
+            on_progress=self._emit_withdrawal_progress,
+            on_wait=on_wait,
+            confirm_large=self._confirm_large_withdrawal_blocking,
+            on_result=self._on_withdrawal_result,
+            should_stop=lambda: not self.running,
+            mask=mask_address,
+            resync_every=self.balance_resync_every,
+            name=name,
+            journal=journal,
+            retry_policy=self.retry_policy,
+            on_retry=self._on_withdrawal_retry,
+            failures=failures,
+            events=self.event_log,
+        )
+
+    def _on_withdrawal_retry(self, planned, attempt: int, delay: float, reason: str, budget_remaining: int):
+        """在等待进度条上显示重试状态和剩余的批次重试预算。"""
+        self.wait_update_signal.emit(0, f"第{planned.index}个地址重试{attempt}: {delay:.0f}秒后 (剩余预算 {budget_remaining})")
+
+    def _log_withdrawal_summary(self, stats: WithdrawalStats, retry_budget=None):
+        summary = f"本批次: 成功 {stats.succeeded} 笔，失败 {stats.failed} 笔，跳过 {stats.skipped} 笔，重试 {stats.retries} 次"
+        if retry_budget is not None:
+            summary += f" (重试预算剩余 {retry_budget.remaining}/{retry_budget.total})"
+        if stats.retry_exhausted:
+            summary += f"，{stats.retry_exhausted} 笔因重试用尽而失败"
+        self.log_message(summary + "。", level="INFO")
+
+    def _emit_withdrawal_progress(self, processed: int, total: int):
+        progress_percentage = int((processed / total) * 100) if total else 100
+        self.progress_update_signal.emit(progress_percentage, f"进度: {progress_percentage}%")
+
+    def _on_withdrawal_result(self, planned, success: bool, message: str):
+        if success:
+            self.used_addresses.add(planned.address) # 记录原始地址为已使用
+        # 在提币线程中调用，通过信号让主线程更新地址列表
+        self.address_status_signal.emit(planned.address, ADDRESS_STATUS_USED if success else ADDRESS_STATUS_FAILED)
+
+    def _confirm_large_withdrawal_blocking(self, coin: str, network: str, planned) -> bool:
+        """在提币线程中调用: 请求主线程弹出大额确认对话框并阻塞等待结果。"""
+        self.withdrawal_confirm_event.clear()
+        self.confirm_withdrawal_signal.emit(coin, network, planned.amount, planned.address, None, True)
+        self.log_message(f"  -> 等待用户确认大额提币 (地址: {self._mask_addresses_in_text(planned.address)}, 金额: {planned.amount} {coin})...", level="INFO")
+        self.withdrawal_confirm_event.wait() # 线程在此阻塞直到事件被设置
+        return self.user_agreed_to_this_withdrawal
+
+    def _connect_sub_accounts(self) -> list[AccountConfig]:
+        """
+        连接配置文件中当前交易所的 [ACCOUNT:名称] 子账户 (在提币线程中调用)。
+
+        当前主账户始终作为第一个账户参与；连接失败的子账户会被跳过。
+        只有主账户可用时返回空列表，调用方按单账户流程执行。
+        """
+        sections = load_account_sections(self.config, self.current_exchange_name)
+        if not sections:
+            return []
+        api_class = self.EXCHANGES[self.current_exchange_name]
+        accounts = [AccountConfig("主账户", self.current_exchange_name, self.current_exchange_api)]
+        for account_name, section in sections:
+            try:
+                api = api_class(self.config, self.logger, config_section=section)
+                connected, message = api.connect()
+            except Exception as e:
+                connected, message = False, str(e)
+            if not connected:
+                self.log_message(f"子账户 {account_name} 连接失败，将不参与本批次: {message}", level="WARNING")
+                continue
+            min_interval = self.config.getint(section, 'min_interval', fallback=None)
+            max_interval = self.config.getint(section, 'max_interval', fallback=None)
+            accounts.append(AccountConfig(account_name, self.current_exchange_name, api, min_interval, max_interval))
+            self.log_message(f"子账户 {account_name} 已连接。", level="INFO")
+        return accounts if len(accounts) > 1 else []
+
+    def _run_multi_account_batch(self, accounts: list[AccountConfig], coin, network, min_amount, max_amount,
+                                 target_addresses, min_interval, max_interval, usd_price, warning_threshold, journal=None,
+                                 failures: FailureSet | None = None):
+        """多账户并发提币：地址轮流分配给各账户，每个账户在独立线程中按自己的随机间隔执行。"""
+        self.log_message(f"多账户模式: {len(accounts)} 个账户并发处理 {len(target_addresses)} 个地址。", level="INFO")
+        executor = MultiAccountExecutor(
+            accounts, self.logger,
+            log=self.log_message,
+            on_progress=self._emit_withdrawal_progress,
+            confirm_large=self._confirm_large_withdrawal_blocking,
+            on_result=self._on_withdrawal_result,
+            should_stop=lambda: not self.running,
+            mask=mask_address,
+            resync_every=self.balance_resync_every,
+            journal=journal,
+            retry_policy=self.retry_policy,
+            on_retry=self._on_withdrawal_retry,
+            failures=failures,
+            events=self.event_log,
+            on_plan=self._export_withdrawal_plan,
+        )
+        results = executor.run(coin, network, target_addresses, min_amount, max_amount,
+                               min_interval, max_interval, usd_price=usd_price, warning_threshold=warning_threshold)
+        for account_name, stats in results.items():
+            self.log_message(f"账户 {account_name}: 成功 {stats.succeeded} 笔，失败 {stats.failed} 笔，跳过 {stats.skipped} 笔，"
+                             f"重试 {stats.retries} 次。", level="INFO")
+        total = WithdrawalStats()
+        for stats in results.values():
+            for field_name in ('succeeded', 'failed', 'skipped', 'retries', 'retry_exhausted'):
+                setattr(total, field_name, getattr(total, field_name) + getattr(stats, field_name))
+        self._log_withdrawal_summary(total, executor.retry_budget)
+        for account in accounts[1:]:
+            try:
+                account.api.close()
+            except Exception as e:
+                self.logger.debug(f"关闭子账户 {account.name} 连接时出错: {e}")
+
+    def _export_withdrawal_plan(self, plan, account_name: str | None = None):
+        """把提币计划导出到应用数据目录，便于执行前核对。多账户模式下每个账户一个文件。"""
+        try:
+            plans_dir = os.path.join(self.app_data_dir, "plans")
+            os.makedirs(plans_dir, exist_ok=True)
+            account_part = "_" + "".join(c if c.isalnum() or c in "-_" else "_" for c in account_name) if account_name else ""
+            file_name = f"plan_{plan.exchange_name}_{plan.coin}{account_part}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            file_path = os.path.join(plans_dir, file_name)
+            plan.export_csv(file_path)
+            self.log_message(f"提币计划已导出: {file_path}", level="INFO")
+        except Exception as e:
+            self.log_message(f"导出提币计划失败: {e}", level="WARNING")
+
     def _on_withdrawal_finished(self):
         """处理提币线程完成信号的槽函数."""
         self.logger.info("收到提币完成信号，更新UI状态。")
@@ -2335,6 +2615,13 @@ class WithdrawalHelper(QMainWindow):
         # 重置进度条和等待条 (虽然线程finally里也做了，这里再做一次确保UI更新)
         self.update_progress(0)  # Reset progress
         self.wait_update_signal.emit(0, "等待: 0秒")
+        failures = self.last_failures
+        if hasattr(self, 'failures_button'): self.failures_button.setEnabled(bool(failures))
+        if failures:
+            for item in failures.items:
+                self.address_model.set_status(item.address, ADDRESS_STATUS_FAILED)
+            self.log_message(f"{failures.summary()}。可通过「失败地址」保存列表或重新提币。", level="WARNING")
+        self._export_api_metrics()
 
     def show_donation_dialog(self):
         """显示捐赠对话框，包含支持作者的信息和捐赠地址。"""
@@ -2345,19 +2632,26 @@ class WithdrawalHelper(QMainWindow):
         self.logger.info("应用程序正在关闭...")
         
         # 在应用关闭前停止所有可能运行的提币操作
+        self._closing = True
         if hasattr(self, 'running') and self.running:
             self.running = False
             self.log_message("应用程序关闭：提币流程已停止", level="INFO")
+        # 提币线程可能阻塞在大额确认上，释放它 (视为未确认)
+        self.user_agreed_to_this_withdrawal = False
+        self.withdrawal_confirm_event.set()
         
         # --- 开始改进的线程清理 ---
         threads_to_clean = []
         # 使用 getattr 获取引用，避免 AttributeError
         api_thread = getattr(self, 'api_thread', None)
         api_worker = getattr(self, 'api_worker', None)
+        price_api_thread = getattr(self, 'price_api_thread', None)
+        price_api_worker = getattr(self, 'price_api_worker', None)
         balance_thread = getattr(self, 'balance_thread', None)
         balance_worker = getattr(self, 'balance_worker', None)
         
         if api_thread is not None: threads_to_clean.append(("API", api_thread, api_worker))
+        if price_api_thread is not None: threads_to_clean.append(("价格API", price_api_thread, price_api_worker))
         if balance_thread is not None: threads_to_clean.append(("余额", balance_thread, balance_worker))
         
         for name, thread, worker in threads_to_clean:
@@ -2379,8 +2673,12 @@ class WithdrawalHelper(QMainWindow):
         # 清理Python原生提币线程 (无法强制停止，只能等待)
         withdrawal_thread = getattr(self, 'withdrawal_thread', None)
         if withdrawal_thread and withdrawal_thread.is_alive():
-            self.log_message("等待提币线程自然结束... (已设置停止标志)", level="INFO")
-            # withdrawal_thread.join(5) # 可以选择等待几秒，但不阻塞关闭太久
+            self.log_message("等待提币线程结束... (已设置停止标志)", level="INFO")
+            # 等待间隔每0.5秒检查一次停止标志；进行中的API调用最多等到超时。
+            # 即使超时，提币日志也已落盘，下次启动可以恢复。
+            withdrawal_thread.join(self.WITHDRAWAL_THREAD_JOIN_TIMEOUT)
+            if withdrawal_thread.is_alive():
+                self.logger.warning("提币线程未能在超时内结束，未完成的批次将在下次启动时提示恢复。")
         # --- 结束改进的线程清理 ---
         
         # 关闭API连接
@@ -2390,6 +2688,15 @@ class WithdrawalHelper(QMainWindow):
                 self.log_message(f"已关闭 {self.current_exchange_name} API 连接。", level="INFO")
             except Exception as e:
                 self.log_message(f"关闭 {self.current_exchange_name} API 时出错: {e}", level="ERROR", exc_info=True)
+
+        self.event_log.close()
+        self._export_api_metrics()
+        if getattr(self, 'metrics_server', None) is not None:
+            self.metrics_server.close()
+
+        # 停止日志定时器，写入队列中剩余的日志
+        if hasattr(self, 'log_sink'):
+            self.log_sink.stop()
         
         # 保存窗口状态
         try:
@@ -2409,7 +2716,11 @@ class WithdrawalHelper(QMainWindow):
             self.status_bar_timer.stop()
             self.logger.debug("状态栏定时器已停止。")
         
-        # 在调用父类closeEvent之前刷新剩余的日志
+        # 在调用父类closeEvent之前刷新剩余的日志 (等待后台日志线程写完队列)
+        if getattr(self, 'async_logging', None):
+            if self.async_logging.dropped_total:
+                self.logger.warning(f"本次运行共丢弃 {self.async_logging.dropped_total} 条文件日志 (日志队列已满)")
+            self.async_logging.stop()
         logging.shutdown()
         
         # 确保所有Qt事件处理完毕
@@ -2539,7 +2850,11 @@ class WithdrawalHelper(QMainWindow):
         self._update_fee_display(selected_coin, network_text)
         
     def _update_fee_display(self, coin: str, network: str):
-        """根据当前选择的币种和网络，获取并更新提现手续费的UI显示。"""
+        """
+        根据当前选择的币种和网络，更新提现手续费的UI显示。
+        只读取已缓存的元数据 (可能来自快照，标记为"缓存")，不在界面线程上等待实时刷新；
+        提币时引擎会重新获取实时手续费。
+        """
         if not hasattr(self, 'fee_label') or not self.current_exchange_api:
             self.logger.debug("_update_fee_display: fee_label 未找到或API未连接，跳过手续费更新。")
             return
@@ -2547,21 +2862,22 @@ class WithdrawalHelper(QMainWindow):
         self.fee_label.setText("手续费: 正在加载...")
         try:
             self.logger.debug(f"为币种 {coin} ({network}) 请求手续费...")
-            # 注意：get_withdrawal_fee 可能返回字符串 "fee asset" 或字典，或None
-            fee_data = self.current_exchange_api.get_withdrawal_fee(coin=coin, network=network)
+            # 注意：手续费可能是字符串 "fee asset" 或字典，或None
+            fee_data, from_snapshot = self.current_exchange_api.get_cached_withdrawal_fee(coin, network)
+            cached_suffix = " (缓存)" if from_snapshot else ""
             
             if fee_data is not None:
                 if isinstance(fee_data, str): # 例如直接返回 "0.001 BTC"
                     # 如果API返回的是 "fee asset" 格式，并且我们希望只显示 "fee asset"
                     # 或者，如果API只返回费率数字字符串，我们需要加上币种
                     # 假设BaseExchangeAPI的实现会返回一个可以直接显示的字符串或一个包含fee和asset的字典
-                    self.fee_label.setText(f"手续费: {fee_data}") 
+                    self.fee_label.setText(f"手续费: {fee_data}{cached_suffix}")
                     self.logger.info(f"更新手续费 for {coin} on {network}: {fee_data}")
                 elif isinstance(fee_data, dict):
                     fee_amount = fee_data.get('fee')
                     fee_asset = fee_data.get('asset', coin) # 如果字典没提供asset，默认用当前币种
                     if fee_amount is not None:
-                        self.fee_label.setText(f"手续费: {fee_amount} {fee_asset}")
+                        self.fee_label.setText(f"手续费: {fee_amount} {fee_asset}{cached_suffix}")
                         self.logger.info(f"更新手续费 for {coin} on {network}: {fee_amount} {fee_asset}")
                     else: # else for 'if fee_amount is not None:'
                         self.fee_label.setText("手续费: N/A (数据格式错误)")
@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import threading
+import time
+
+SNAPSHOT_VERSION = 1
+# 快照中保留的网络字段 (get_all_coins_info 的归一化输出中实际被用到的部分)
+SNAPSHOT_NETWORK_FIELDS = ('network', 'originalChain', 'withdrawEnable', 'withdrawFee', 'withdrawMin', 'withdrawIntegerMultiple')
+
+
+def compact_coins_info(coins_info: list) -> list:
+    """去掉提币用不到的字段 (描述、提示文本等)，只保留币种和网络参数。"""
+    compact = []
+    for coin_info in coins_info or []:
+        if not isinstance(coin_info, dict) or 'coin' not in coin_info:
+            continue
+        networks = []
+        for net_info in coin_info.get('networkList') or []:
+            if isinstance(net_info, dict) and net_info.get('network'):
+                networks.append({key: net_info[key] for key in SNAPSHOT_NETWORK_FIELDS if key in net_info})
+        compact.append({'coin': coin_info['coin'], 'networkList': networks})
+    return compact
+
+
+class MetadataSnapshotStore:
+    """
+    币种/网络元数据的磁盘快照，每个交易所一个 JSON 文件。
+
+    启动时先用快照填充API实例的元数据缓存，界面无需等待完整的币种列表下载；
+    随后在后台向交易所重新获取，数据有变化时覆盖快照。
+    写入使用临时文件 + os.replace，进程中途退出也不会留下损坏的快照。
+    """
+
+    FILE_TEMPLATE = "metadata_{exchange}.json"
+
+    def __init__(self, directory: str, logger: logging.Logger):
+        self.directory = directory
+        self.logger = logger
+        self._lock = threading.Lock()
+
+    def _path(self, exchange_name: str) -> str:
+        return os.path.join(self.directory, self.FILE_TEMPLATE.format(exchange=exchange_name.lower()))
+
+    def load(self, exchange_name: str) -> tuple[list, float] | None:
+        """读取快照。返回 (coins_info, 保存时间戳)，不存在或损坏时返回None。"""
+        path = self._path(exchange_name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"读取 {exchange_name} 元数据快照失败，将忽略快照: {e}")
+            return None
+        if not isinstance(payload, dict) or payload.get('version') != SNAPSHOT_VERSION or not isinstance(payload.get('coins'), list):
+            self.logger.info(f"{exchange_name} 元数据快照格式不兼容，将忽略。")
+            return None
+        return payload['coins'], float(payload.get('saved_at', 0))
+
+    def save(self, exchange_name: str, coins_info: list) -> bool:
+        """保存快照 (会先压缩字段)。返回是否写入成功。"""
+        payload = {
+            'version': SNAPSHOT_VERSION,
+            'exchange': exchange_name,
+            'saved_at': time.time(),
+            'coins': compact_coins_info(coins_info),
+        }
+        path = self._path(exchange_name)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                self.logger.warning(f"保存 {exchange_name} 元数据快照失败: {e}")
+                return False
+        self.logger.debug(f"{exchange_name} 元数据快照已保存: {len(payload['coins'])} 个币种。")
+        return True
+
+    @staticmethod
+    def differs(snapshot_coins: list, live_coins_info: list) -> bool:
+        """比较快照与实时数据 (按压缩后的字段)。"""
+        return compact_coins_info(snapshot_coins) != compact_coins_info(live_coins_info)
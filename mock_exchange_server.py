@@ -0,0 +1,451 @@
+"""
+本地模拟交易所服务器 (Binance 和 OKX 提币相关端点)。
+
+在同一个端口上同时提供 python-binance 和 python-okx 会调用的REST端点，
+可配置延迟、错误注入和限频，用于在没有真实密钥和网络的环境下测试和压测提币流程。
+只校验请求头中是否带有API Key，不校验签名。
+
+用法:
+    python mock_exchange_server.py --port 8765 --latency-ms 80 --jitter-ms 40 --error-rate 0.02 --rate-limit 10
+
+然后在 config.ini 中把SDK指向它:
+    [BINANCE]
+    base_url = http://127.0.0.1:8765
+    [OKX]
+    base_url = http://127.0.0.1:8765
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+BINANCE = "Binance"
+OKX = "OKX"
+
+# 币种 -> [(币安网络名, OKX链名, 手续费, 最小提币量)]
+DEFAULT_NETWORKS = {
+    'USDT': [("TRX", "USDT-TRC20", "1", "10"), ("ETH", "USDT-ERC20", "3", "10"), ("BSC", "USDT-BSC", "0.1", "1")],
+    'USDC': [("ETH", "USDC-ERC20", "3", "10"), ("SOL", "USDC-Solana", "0.5", "1")],
+    'ETH': [("ETH", "ETH-ERC20", "0.0008", "0.001"), ("ARBITRUM", "ETH-Arbitrum One", "0.0001", "0.0001")],
+    'SOL': [("SOL", "SOL-Solana", "0.008", "0.01")],
+}
+DEFAULT_PRICES = {'ETH': "3000", 'SOL': "150", 'USDC': "1", 'BTC': "60000"}
+WITHDRAW_PRECISION = "0.000001" # withdrawIntegerMultiple / wdTickSz 对应6位小数
+
+BINANCE_STATUS_COMPLETED = 6
+OKX_STATE_SUCCESS = "2"
+
+
+@dataclass
+class MockExchangeConfig:
+    """延迟、错误注入和限频参数。概率取 0~1。"""
+    latency_ms: float = 0.0 # 每个请求的固定延迟
+    jitter_ms: float = 0.0 # 在固定延迟上增加 uniform(0, jitter_ms)
+    error_rate: float = 0.0 # 返回 503 的概率 (请求未被处理)
+    ambiguous_rate: float = 0.0 # 提币请求已受理但返回 504 的概率 (用于测试按 client_id 对账)
+    rate_limit: float = 0.0 # 每个交易所每秒允许的请求数，0为不限
+    rate_burst: float = 0.0 # 令牌桶容量，0表示等于 rate_limit
+    balance: Decimal = Decimal('1000000') # 每个币种的初始余额
+    networks: dict = field(default_factory=lambda: dict(DEFAULT_NETWORKS))
+    prices: dict = field(default_factory=lambda: dict(DEFAULT_PRICES))
+    seed: int | None = None
+
+
+class MockRejection(Exception):
+    """以指定的HTTP状态码和响应体结束请求。"""
+
+    def __init__(self, status: int, body, headers: dict | None = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class MockExchangeState:
+    """余额和提币记录 (线程安全)。两个交易所各自独立。"""
+
+    def __init__(self, config: MockExchangeConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.rng = random.Random(config.seed)
+        self.balances = {exchange: {coin: config.balance for coin in config.networks} for exchange in (BINANCE, OKX)}
+        self.withdrawals: dict[str, list[dict]] = {BINANCE: [], OKX: []}
+        self.request_counts: dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._buckets = {exchange: _TokenBucket(config.rate_limit, config.rate_burst)
+                         for exchange in (BINANCE, OKX)} if config.rate_limit > 0 else {}
+
+    def next_id(self) -> str:
+        return f"mock{next(self._ids):08d}"
+
+    def count_request(self, route: str):
+        with self.lock:
+            self.request_counts[route] = self.request_counts.get(route, 0) + 1
+
+    def allow(self, exchange: str) -> bool:
+        bucket = self._buckets.get(exchange)
+        if bucket is None:
+            return True
+        with self.lock:
+            return bucket.try_acquire()
+
+    def chance(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self.lock:
+            return self.rng.random() < probability
+
+    def delay(self) -> float:
+        with self.lock:
+            jitter = self.rng.uniform(0, self.config.jitter_ms) if self.config.jitter_ms > 0 else 0.0
+        return (self.config.latency_ms + jitter) / 1000
+
+    def find_network(self, coin: str, network: str, exchange: str):
+        for binance_network, okx_chain, fee, min_wd in self.config.networks.get(coin.upper(), []):
+            if (exchange == BINANCE and binance_network == network.upper()) or (exchange == OKX and okx_chain == network):
+                return binance_network, okx_chain, fee, min_wd
+        return None
+
+    def apply_withdrawal(self, exchange: str, coin: str, network: str, address: str, amount: str,
+                         client_id: str | None) -> dict:
+        """扣减余额并记录提币。失败时抛出 ValueError (原因)。"""
+        coin = coin.upper()
+        entry = self.find_network(coin, network, exchange)
+        if entry is None:
+            raise ValueError("network")
+        _, _, fee, min_wd = entry
+        amount_decimal = Decimal(amount)
+        if amount_decimal < Decimal(min_wd):
+            raise ValueError("min")
+        with self.lock:
+            if client_id and any(w['client_id'] == client_id for w in self.withdrawals[exchange]):
+                raise ValueError("duplicate")
+            total = amount_decimal + Decimal(fee)
+            if self.balances[exchange].get(coin, Decimal('0')) < total:
+                raise ValueError("balance")
+            self.balances[exchange][coin] -= total
+            record = {'id': self.next_id(), 'coin': coin, 'network': network, 'address': address,
+                      'amount': amount, 'fee': fee, 'client_id': client_id or None, 'time': int(time.time() * 1000)}
+            self.withdrawals[exchange].append(record)
+            return record
+
+    def history(self, exchange: str, coin: str | None = None, client_id: str | None = None) -> list[dict]:
+        with self.lock:
+            return [dict(w) for w in self.withdrawals[exchange]
+                    if (not coin or w['coin'] == coin.upper()) and (not client_id or w['client_id'] == client_id)]
+
+
+# --- Binance ---
+
+def _binance_error(status: int, code: int, msg: str, headers: dict | None = None) -> MockRejection:
+    return MockRejection(status, {'code': code, 'msg': msg}, headers)
+
+
+def _binance_coins_info(state: MockExchangeState, params: dict):
+    coins = []
+    for coin, networks in state.config.networks.items():
+        coins.append({
+            'coin': coin, 'name': coin, 'free': str(state.balances[BINANCE].get(coin, 0)),
+            'depositAllEnable': True, 'withdrawAllEnable': True, 'trading': True,
+            'networkList': [{
+                'coin': coin, 'network': network, 'name': network, 'isDefault': i == 0,
+                'depositEnable': True, 'withdrawEnable': True, 'withdrawFee': fee, 'withdrawMin': min_wd,
+                'withdrawMax': "10000000", 'withdrawIntegerMultiple': WITHDRAW_PRECISION,
+            } for i, (network, _chain, fee, min_wd) in enumerate(networks)],
+        })
+    return coins
+
+
+def _binance_account(state: MockExchangeState, params: dict):
+    with state.lock:
+        balances = [{'asset': coin, 'free': str(amount), 'locked': "0"} for coin, amount in state.balances[BINANCE].items()]
+    return {'makerCommission': 10, 'canWithdraw': True, 'accountType': "SPOT", 'balances': balances}
+
+
+def _binance_withdraw(state: MockExchangeState, params: dict):
+    try:
+        record = state.apply_withdrawal(BINANCE, params.get('coin', ''), params.get('network', ''),
+                                        params.get('address', ''), params.get('amount', '0'), params.get('withdrawOrderId'))
+    except ValueError as e:
+        messages = {'network': (-4019, "The current currency is not open for withdrawal."),
+                    'min': (-4022, "The withdrawal amount is below the minimum."),
+                    'duplicate': (-4101, "Duplicate withdrawOrderId."),
+                    'balance': (-4026, "User has insufficient balance")}
+        code, msg = messages.get(str(e), (-1102, "Mandatory parameter was not sent."))
+        raise _binance_error(400, code, msg)
+    if state.chance(state.config.ambiguous_rate):
+        raise MockRejection(504, "Gateway Time-out")
+    return {'id': record['id']}
+
+
+def _binance_history(state: MockExchangeState, params: dict):
+    return [{
+        'id': w['id'], 'amount': w['amount'], 'transactionFee': w['fee'], 'coin': w['coin'],
+        'status': BINANCE_STATUS_COMPLETED, 'address': w['address'], 'txId': f"0x{w['id']}",
+        'applyTime': time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(w['time'] / 1000)),
+        'network': w['network'], 'transferType': 0, 'withdrawOrderId': w['client_id'] or "",
+    } for w in state.history(BINANCE, params.get('coin'), params.get('withdrawOrderId'))]
+
+
+def _binance_ticker(state: MockExchangeState, params: dict):
+    symbol = params.get('symbol', '').upper()
+    if not symbol.endswith("USDT") or symbol[:-4] not in state.config.prices:
+        raise _binance_error(400, -1121, "Invalid symbol.")
+    return {'symbol': symbol, 'price': state.config.prices[symbol[:-4]]}
+
+
+BINANCE_ROUTES = { # (方法, 路径) -> (处理函数, 是否需要API Key)
+    ('GET', '/api/v3/ping'): (lambda state, params: {}, False),
+    ('GET', '/api/v3/time'): (lambda state, params: {'serverTime': int(time.time() * 1000)}, False),
+    ('GET', '/api/v3/ticker/price'): (_binance_ticker, False),
+    ('GET', '/api/v3/account'): (_binance_account, True),
+    ('GET', '/sapi/v1/capital/config/getall'): (_binance_coins_info, True),
+    ('POST', '/sapi/v1/asset/get-funding-asset'): (lambda state, params: [], True), # 余额全部在现货账户
+    ('POST', '/sapi/v1/capital/withdraw/apply'): (_binance_withdraw, True),
+    ('GET', '/sapi/v1/capital/withdraw/history'): (_binance_history, True),
+}
+
+
+# --- OKX ---
+
+def _okx_ok(data: list) -> dict:
+    return {'code': "0", 'msg': "", 'data': data}
+
+
+def _okx_error(code: str, msg: str, status: int = 200) -> MockRejection:
+    return MockRejection(status, {'code': code, 'msg': msg, 'data': []})
+
+
+def _okx_currencies(state: MockExchangeState, params: dict):
+    ccy = params.get('ccy', '').upper()
+    return _okx_ok([{
+        'ccy': coin, 'name': coin, 'chain': chain, 'canDep': True, 'canWd': True, 'canInternal': True,
+        'minFee': fee, 'maxFee': fee, 'minWd': str(Decimal(min_wd).quantize(Decimal(WITHDRAW_PRECISION))),
+        'maxWd': "10000000", 'wdTickSz': "6", 'mainNet': i == 0,
+    } for coin, networks in state.config.networks.items() if not ccy or coin in ccy.split(',')
+        for i, (_network, chain, fee, min_wd) in enumerate(networks)])
+
+
+def _okx_balances(state: MockExchangeState, params: dict):
+    ccy = params.get('ccy', '').upper()
+    with state.lock:
+        items = [(coin, amount) for coin, amount in state.balances[OKX].items() if not ccy or coin in ccy.split(',')]
+    return _okx_ok([{'ccy': coin, 'bal': str(amount), 'availBal': str(amount), 'frozenBal': "0"} for coin, amount in items])
+
+
+def _okx_account_balance(state: MockExchangeState, params: dict):
+    with state.lock:
+        details = [{'ccy': coin, 'cashBal': str(amount), 'availBal': str(amount)} for coin, amount in state.balances[OKX].items()]
+    return _okx_ok([{'totalEq': "0", 'uTime': str(int(time.time() * 1000)), 'details': details}])
+
+
+def _okx_withdrawal(state: MockExchangeState, params: dict):
+    client_id = params.get('clientId') or None
+    try:
+        record = state.apply_withdrawal(OKX, params.get('ccy', ''), params.get('chain', ''), params.get('toAddr', ''),
+                                        params.get('amt', '0'), client_id)
+    except ValueError as e:
+        messages = {'network': ("58207", "Withdrawal address is not whitelisted or chain is invalid"),
+                    'min': ("58213", "Withdrawal amount is lower than the lower limit"),
+                    'duplicate': ("58129", "Duplicate clientId"),
+                    'balance': ("58350", "Insufficient balance")}
+        code, msg = messages.get(str(e), ("51000", "Parameter error"))
+        raise _okx_error(code, msg)
+    if state.chance(state.config.ambiguous_rate):
+        raise MockRejection(504, "Gateway Time-out")
+    return _okx_ok([{'wdId': record['id'], 'ccy': record['coin'], 'chain': record['network'],
+                     'amt': record['amount'], 'clientId': client_id or ""}])
+
+
+def _okx_history(state: MockExchangeState, params: dict):
+    return _okx_ok([{
+        'wdId': w['id'], 'ccy': w['coin'], 'chain': w['network'], 'amt': w['amount'], 'fee': w['fee'],
+        'to': w['address'], 'toAddr': w['address'], 'txId': f"0x{w['id']}", 'state': OKX_STATE_SUCCESS,
+        'clientId': w['client_id'] or "", 'ts': str(w['time']),
+    } for w in reversed(state.history(OKX, params.get('ccy'), params.get('clientId')))])
+
+
+def _okx_ticker(state: MockExchangeState, params: dict):
+    inst_id = params.get('instId', '').upper()
+    base = inst_id.split('-')[0]
+    if base not in state.config.prices:
+        raise _okx_error("51001", "Instrument ID does not exist")
+    return _okx_ok([{'instId': inst_id, 'last': state.config.prices[base], 'ts': str(int(time.time() * 1000))}])
+
+
+OKX_ROUTES = {
+    ('GET', '/api/v5/public/time'): (lambda state, params: _okx_ok([{'ts': str(int(time.time() * 1000))}]), False),
+    ('GET', '/api/v5/market/ticker'): (_okx_ticker, False),
+    ('GET', '/api/v5/account/balance'): (_okx_account_balance, True),
+    ('GET', '/api/v5/asset/currencies'): (_okx_currencies, True),
+    ('GET', '/api/v5/asset/balances'): (_okx_balances, True),
+    ('POST', '/api/v5/asset/withdrawal'): (_okx_withdrawal, True),
+    ('GET', '/api/v5/asset/withdrawal-history'): (_okx_history, True),
+}
+
+
+class _MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # 支持 keep-alive，SDK的连接池可以复用连接
+    disable_nagle_algorithm = True # 响应头和响应体分两次写入，否则与客户端的延迟ACK叠加，每个请求多等约40ms
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _read_params(self, query: str) -> dict:
+        params = dict(parse_qsl(query))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length).decode('utf-8')
+            if body.lstrip().startswith('{'):
+                try:
+                    params.update({k: str(v) if not isinstance(v, str) else v for k, v in json.loads(body).items()})
+                except ValueError:
+                    pass
+            else:
+                params.update(dict(parse_qsl(body)))
+        return params
+
+    def _dispatch(self, method: str):
+        state: MockExchangeState = self.server.state
+        url = urlsplit(self.path)
+        params = self._read_params(url.query)
+        route = (method, url.path)
+        if route in BINANCE_ROUTES:
+            exchange, (handler, private) = BINANCE, BINANCE_ROUTES[route]
+        elif route in OKX_ROUTES:
+            exchange, (handler, private) = OKX, OKX_ROUTES[route]
+        else:
+            self._send(404, {'code': -1, 'msg': f"Unknown endpoint {method} {url.path}"})
+            return
+        state.count_request(f"{exchange} {method} {url.path}")
+
+        delay = state.delay()
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            if not state.allow(exchange):
+                if exchange == BINANCE:
+                    raise _binance_error(429, -1003, "Too many requests; current limit is exceeded.", {'Retry-After': "1"})
+                raise _okx_error("50011", "Too Many Requests", status=429)
+            if private and not (self.headers.get('X-MBX-APIKEY') or self.headers.get('OK-ACCESS-KEY')):
+                if exchange == BINANCE:
+                    raise _binance_error(401, -2014, "API-key format invalid.")
+                raise _okx_error("50103", "Request header OK-ACCESS-KEY cannot be blank", status=401)
+            if state.chance(state.config.error_rate):
+                if exchange == BINANCE:
+                    raise _binance_error(503, -1008, "Service Unavailable.")
+                raise _okx_error("50001", "Service temporarily unavailable", status=503)
+            self._send(200, handler(state, params))
+        except MockRejection as rejection:
+            self._send(rejection.status, rejection.body, rejection.headers)
+
+    def _send(self, status: int, body, headers: dict | None = None):
+        payload = (json.dumps(body) if not isinstance(body, str) else body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json" if not isinstance(body, str) else "text/plain")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args): # 不为每个请求输出访问日志
+        pass
+
+
+class MockExchangeServer:
+    """在后台线程中运行的模拟交易所。port=0 时自动选择空闲端口。"""
+
+    def __init__(self, config: MockExchangeConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockExchangeConfig()
+        self.state = MockExchangeState(self.config)
+        self._server = ThreadingHTTPServer((host, port), _MockRequestHandler)
+        self._server.daemon_threads = True
+        self._server.state = self.state
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockExchangeServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-exchange", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回503的概率")
+    parser.add_argument("--ambiguous-rate", type=float, default=0.0, help="提币已受理但返回504的概率")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="每个交易所每秒允许的请求数 (0为不限)")
+    parser.add_argument("--rate-burst", type=float, default=0.0)
+    parser.add_argument("--balance", type=Decimal, default=Decimal('1000000'), help="每个币种的初始余额")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    config = MockExchangeConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                                ambiguous_rate=args.ambiguous_rate, rate_limit=args.rate_limit,
+                                rate_burst=args.rate_burst, balance=args.balance, seed=args.seed)
+    server = MockExchangeServer(config, args.host, args.port)
+    print(f"模拟交易所已启动: {server.base_url} (Ctrl+C 退出)")
+    print(f"在 config.ini 的 [BINANCE] / [OKX] 中设置 base_url = {server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        for route, count in sorted(server.state.request_counts.items()):
+            print(f"{count:>8}  {route}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+from dataclasses import dataclass
+from decimal import Decimal
+
+from exchange_api_base import BaseExchangeAPI
+from retry_policy import RetryBudget, RetryPolicy
+from withdrawal_engine import WithdrawalEngine, WithdrawalStats
+from withdrawal_failures import FailureSet, FAIL_PLAN_ERROR
+
+ACCOUNT_SECTION_PREFIX = "ACCOUNT:" # 配置文件中子账户的节名前缀，例如 [ACCOUNT:sub1]
+
+
+@dataclass
+class AccountConfig:
+    """一个参与批量提币的账户。api 为已连接的交易所API实例。"""
+    name: str
+    exchange_name: str
+    api: BaseExchangeAPI
+    min_interval: int | None = None # 为None时使用批次的默认间隔
+    max_interval: int | None = None
+
+
+def load_account_sections(config: ConfigParser, exchange_name: str) -> list[tuple[str, str]]:
+    """
+    读取配置文件中属于 exchange_name 的子账户节。
+
+    节格式:
+        [ACCOUNT:sub1]
+        exchange = Binance
+        api_key = ...
+        api_secret = ...
+        passphrase = ...        (仅OKX)
+        min_interval = 10       (可选)
+        max_interval = 30       (可选)
+
+    Returns:
+        list[tuple[str, str]]: [(账户名, 节名), ...]，按配置文件中的顺序。
+    """
+    accounts = []
+    for section in config.sections():
+        if not section.startswith(ACCOUNT_SECTION_PREFIX):
+            continue
+        if config.get(section, 'exchange', fallback='').strip().lower() != exchange_name.lower():
+            continue
+        if config.getboolean(section, 'enabled', fallback=True):
+            accounts.append((section[len(ACCOUNT_SECTION_PREFIX):].strip(), section))
+    return accounts
+
+
+def split_round_robin(items: list, parts: int) -> list[list]:
+    """把 items 轮流分配为 parts 份，保持每份内部的相对顺序。"""
+    buckets = [[] for _ in range(max(1, parts))]
+    for i, item in enumerate(items):
+        buckets[i % len(buckets)].append(item)
+    return buckets
+
+
+class MultiAccountExecutor:
+    """
+    多账户并发提币执行器。
+
+    地址列表轮流分配给各账户，每个账户在线程池中运行一个独立的 WithdrawalEngine:
+    各自的随机间隔、余额账本和账户级限频桶 (IP级限频桶仍在同一交易所的实例间共享)。
+    进度在锁内汇总后通过 on_progress(processed, total) 回调。
+    """
+
+    def __init__(self, accounts: list[AccountConfig], logger: logging.Logger,
+                 log=None, on_progress=None, confirm_large=None, on_result=None,
+                 should_stop=None, mask=None, resync_every: int | None = None, journal=None,
+                 retry_policy: RetryPolicy | None = None, on_retry=None, failures: FailureSet | None = None,
+                 events=None, on_plan=None):
+        if not accounts:
+            raise ValueError("至少需要一个账户")
+        self.accounts = accounts
+        self.logger = logger
+        self._log = log
+        self._on_progress = on_progress
+        self._confirm_large = confirm_large
+        self._on_result = on_result
+        self._should_stop = should_stop
+        self._mask = mask
+        self.resync_every = resync_every
+        self.journal = journal # 所有账户共用一个批次日志 (WithdrawalJournal 内部加锁)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_budget = RetryBudget(self.retry_policy.budget) # 所有账户共享批次重试预算
+        self._on_retry = on_retry
+        self.failures = failures # 所有账户共用，run() 时未提供则创建
+        self.events = events # WithdrawalEventLog，所有账户共用 (内部加锁)
+        self._on_plan = on_plan # on_plan(plan, 账户名)，每个账户生成计划后、执行前调用 (在该账户的线程中)
+        self._progress_lock = threading.Lock()
+        self._confirm_lock = threading.Lock() # 大额确认弹窗一次只能有一个
+        self._processed = 0
+        self._total = 0
+
+    def _report_progress(self, _processed: int, _total: int):
+        with self._progress_lock:
+            self._processed += 1
+            processed, total = self._processed, self._total
+        if self._on_progress is not None:
+            self._on_progress(processed, total)
+
+    def _serialized_confirm(self, coin: str, network: str, planned) -> bool:
+        with self._confirm_lock:
+            return self._confirm_large(coin, network, planned)
+
+    def _make_engine(self, account: AccountConfig) -> WithdrawalEngine:
+        kwargs = {}
+        if self.resync_every is not None:
+            kwargs['resync_every'] = self.resync_every
+        return WithdrawalEngine(
+            account.api, account.exchange_name, self.logger,
+            log=self._log,
+            on_progress=self._report_progress,
+            confirm_large=self._serialized_confirm if self._confirm_large is not None else None,
+            on_result=self._on_result,
+            should_stop=self._should_stop,
+            mask=self._mask,
+            name=account.name,
+            journal=self.journal,
+            retry_policy=self.retry_policy,
+            retry_budget=self.retry_budget,
+            on_retry=self._on_retry,
+            failures=self.failures,
+            events=self.events,
+            **kwargs,
+        )
+
+    def _run_account(self, account: AccountConfig, addresses: list, coin: str, network: str,
+                     min_amount: Decimal, max_amount: Decimal, min_interval: int, max_interval: int,
+                     usd_price: Decimal | None, warning_threshold: float | None) -> WithdrawalStats:
+        engine = self._make_engine(account)
+        try:
+            plan = engine.prepare(coin, network, addresses, min_amount, max_amount,
+                                  usd_price=usd_price, warning_threshold=warning_threshold)
+        except Exception as e:
+            engine.log_message(f"生成提币计划时出错: {e}，该账户跳过 {len(addresses)} 个地址。", level="ERROR", exc_info=True)
+            for address_info in addresses:
+                self.failures.add(address_info.get('address', ''), address_info.get('label'), FAIL_PLAN_ERROR, str(e),
+                                  account=account.name)
+            for _ in addresses:
+                self._report_progress(0, 0)
+            return WithdrawalStats(total=len(addresses), processed=len(addresses), skipped=len(addresses))
+        if self._on_plan is not None:
+            try:
+                self._on_plan(plan, account.name)
+            except Exception as e:
+                engine.log_message(f"处理提币计划回调时出错: {e}", level="WARNING")
+        interval_min = account.min_interval if account.min_interval is not None else min_interval
+        interval_max = account.max_interval if account.max_interval is not None else max_interval
+        return engine.execute(plan, interval_min, interval_max)
+
+    def run(self, coin: str, network: str, target_addresses: list, min_amount: Decimal, max_amount: Decimal,
+            min_interval: int, max_interval: int, usd_price: Decimal | None = None,
+            warning_threshold: float | None = None) -> dict[str, WithdrawalStats]:
+        """
+        阻塞执行整批提币，返回 {账户名: 统计}。
+
+        某个账户抛出的意外异常不会影响其它账户，对应账户的统计为空。
+        """
+        if self.failures is None:
+            self.failures = FailureSet(self.accounts[0].exchange_name, coin, network, min_amount, max_amount)
+        shares = split_round_robin(target_addresses, len(self.accounts))
+        with self._progress_lock:
+            self._processed = 0
+            self._total = len(target_addresses)
+        for account, share in zip(self.accounts, shares):
+            self.logger.info(f"多账户提币: 账户 {account.name} 分配到 {len(share)} 个地址。")
+
+        results: dict[str, WithdrawalStats] = {}
+        with ThreadPoolExecutor(max_workers=len(self.accounts), thread_name_prefix="withdraw-account") as pool:
+            futures = {
+                pool.submit(self._run_account, account, share, coin, network, min_amount, max_amount,
+                            min_interval, max_interval, usd_price, warning_threshold): account
+                for account, share in zip(self.accounts, shares) if share
+            }
+            for future, account in futures.items():
+                try:
+                    results[account.name] = future.result()
+                except Exception as e:
+                    self.logger.error(f"账户 {account.name} 提币线程异常退出: {e}", exc_info=True)
+                    results[account.name] = WithdrawalStats()
+        return results
@@ -1,23 +1,277 @@
 import time
-import okx.Account as Account # OKX SDK 的账户模块
-import okx.Funding as Funding # OKX SDK 的资金模块
-import okx.PublicData as PublicData # OKX SDK 的公共数据模块
-# 可能还需要其他模块，例如 Trade
-
-from exchange_api_base import BaseExchangeAPI
+import threading
+from exchange_api_base import (BaseExchangeAPI, ErrorClassification, RetryableExchangeError,
+                               WithdrawalUncertainError)
+from rate_limiter import BucketSpec, SCOPE_ACCOUNT, SCOPE_IP
 from decimal import Decimal
 import logging # Added
 from configparser import ConfigParser # Added
 
+# OKX SDK 在 OKXAPI.connect() 时才导入 (见 _load_okx_sdk)，未使用OKX时不承担其导入开销
+Account = None # OKX SDK 的账户模块
+Funding = None # OKX SDK 的资金模块
+PublicData = None # OKX SDK 的公共数据模块
+MarketData = None # OKX SDK 的行情模块 (get_ticker)
+# 可能还需要其他模块，例如 Trade
+
+
+def _load_okx_sdk():
+    global Account, Funding, PublicData, MarketData
+    if Account is None:
+        import okx.Account as _Account
+        import okx.Funding as _Funding
+        import okx.MarketData as _MarketData
+        import okx.PublicData as _PublicData
+        Funding, PublicData, MarketData = _Funding, _PublicData, _MarketData
+        Account = _Account
+
+
 # 自定义OKX特定的异常
 class OKXExchangeAPIException(Exception):
-    pass
+    def __init__(self, message: str, code: str | None = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+def normalize_okx_network(ccy: str, chain: str) -> str:
+    """把OKX的链名归一化为网络名, e.g. "USDT-TRC20" -> "TRC20"."""
+    prefix = f"{ccy.upper()}-"
+    if prefix in chain:
+        return chain.split(prefix, 1)[-1]
+    return chain
+
+
+class OKXCurrencyCache:
+    """
+    OKX get_currencies 结果的缓存。
+
+    以 (ccy, 归一化网络名) 为键保存每条链的记录 (chain/canWd/minFee/minWd)，支持
+    按币种刷新 (get_currencies(ccy=...)) 和全量刷新 (get_currencies())。
+    同一个键在同一时刻只会有一个线程真正去请求 (single-flight)，其他线程等待
+    该请求完成后直接读取结果，避免批量提币时多个线程同时打满 OKX 的限频。
+    seed_items() 载入的磁盘快照只供界面读取；get_record() (提币参数) 只使用实时数据。
+    """
+
+    DEFAULT_TTL_SECONDS = 300
+    INFLIGHT_WAIT_SECONDS = 30 # 等待其它线程进行中的刷新的最长时间
+    _ALL_KEY = '*'
+
+    def __init__(self, fetch_func, logger: logging.Logger, ttl: float = DEFAULT_TTL_SECONDS):
+        self._fetch_func = fetch_func # fetch_func(ccy: str | None) -> OKX原始响应字典
+        self.logger = logger
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._records: dict[tuple[str, str], dict] = {}
+        self._by_ccy: dict[str, list[dict]] = {}
+        self._all_items: list = []
+        self._loaded_at: dict[str, float] = {} # ccy 或 '*' -> monotonic 时间
+        self._inflight: dict[str, threading.Event] = {}
+        self._last_errors: dict[str, Exception] = {} # 最近一次刷新失败的原因 (API错误或网络异常)
+        self._seeded: set[str] = set() # 数据仍来自磁盘快照的币种 (全量快照时包括 '*')
+
+    def invalidate(self, ccy: str | None = None):
+        """使某个币种 (或全部) 的缓存失效。"""
+        with self._lock:
+            if ccy is None:
+                self._loaded_at.clear()
+            else:
+                self._loaded_at.pop(ccy.upper(), None)
+                self._loaded_at.pop(self._ALL_KEY, None)
+
+    def _is_fresh(self, key: str) -> bool:
+        loaded_at = self._loaded_at.get(key)
+        return loaded_at is not None and (time.monotonic() - loaded_at) < self.ttl
+
+    def _ccy_is_fresh(self, ccy: str) -> bool:
+        return self._is_fresh(ccy) or self._is_fresh(self._ALL_KEY)
+
+    def _has_data(self, key: str, live: bool = False) -> bool:
+        """是否已有可用数据。live=True 时快照数据不算。调用方需持有 self._lock。"""
+        if live and key in self._seeded:
+            return False
+        return bool(self._all_items) if key == self._ALL_KEY else key in self._by_ccy
+
+    def _store_items(self, items: list, ccy: str | None, seeded: bool = False):
+        """
+        把原始 data 列表归一化后写入索引。调用方需持有 self._lock。
+        seeded=True 表示数据来自快照: 不记录刷新时间 (视为已过期)。
+        """
+        grouped: dict[str, list[dict]] = {}
+        for item in items:
+            item_ccy = str(item.get('ccy') or '').upper()
+            if not item_ccy:
+                continue
+            chain = item.get('chain') or ''
+            record = {
+                'ccy': item_ccy,
+                'chain': chain,
+                'network': normalize_okx_network(item_ccy, chain) if chain else '',
+                'canWd': bool(item.get('canWd')),
+                'minFee': item.get('minFee'),
+                'minWd': item.get('minWd'),
+            }
+            grouped.setdefault(item_ccy, []).append(record)
+        if ccy is not None:
+            grouped.setdefault(ccy.upper(), [])
+            if self._all_items:
+                # 按币种刷新的结果合并进全量列表 (替换该币种原有的条目)，get_all_items() 和快照才不会停留在旧数据
+                merged = []
+                inserted = False
+                for item in self._all_items:
+                    if str(item.get('ccy') or '').upper() in grouped:
+                        if not inserted:
+                            merged.extend(items)
+                            inserted = True
+                        continue
+                    merged.append(item)
+                if not inserted:
+                    merged.extend(items)
+                self._all_items = merged
+        else:
+            # 全量刷新时，已下架的币种也要从索引里清掉
+            self._records.clear()
+            self._by_ccy.clear()
+            self._all_items = items
+        if seeded:
+            self._loaded_at.clear()
+            self._seeded = set(grouped) | {self._ALL_KEY}
+            now = None
+        else:
+            if ccy is None:
+                self._seeded.clear()
+            else:
+                self._seeded.difference_update(grouped)
+            now = time.monotonic()
+        for item_ccy, records in grouped.items():
+            for old in self._by_ccy.get(item_ccy, []):
+                self._records.pop((item_ccy, old['network'].upper()), None)
+            self._by_ccy[item_ccy] = records
+            for record in records:
+                if record['network']:
+                    self._records[(item_ccy, record['network'].upper())] = record
+            if ccy is not None:
+                self._loaded_at[item_ccy] = now
+        if ccy is None and now is not None:
+            self._loaded_at[self._ALL_KEY] = now
+
+    def _refresh(self, ccy: str | None, force: bool = False, live: bool = False):
+        """
+        single-flight 刷新。没有可用的旧数据时，API返回错误抛出 OKXExchangeAPIException，
+        请求异常原样抛出；等待其它线程的刷新超时也抛出 OKXExchangeAPIException。
+        live=False 时快照数据直接可用；live=True 时快照数据不算旧数据，刷新失败即抛出异常。
+        """
+        key = ccy.upper() if ccy else self._ALL_KEY
+        with self._lock:
+            fresh = self._is_fresh(key) if ccy is None else self._ccy_is_fresh(key)
+            if not force and (fresh or (not live and key in self._seeded)):
+                return
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = threading.Event()
+                self._inflight[key] = event
+        if not leader:
+            self.logger.debug(f"OKX币种缓存: 等待进行中的 {key} 刷新请求。")
+            finished = event.wait(self.INFLIGHT_WAIT_SECONDS)
+            with self._lock:
+                error = self._last_errors.get(key)
+                has_data = self._has_data(key, live)
+            if has_data:
+                return
+            if not finished:
+                raise OKXExchangeAPIException(f"等待OKX币种信息 {key} 刷新超时 ({self.INFLIGHT_WAIT_SECONDS} 秒)")
+            if error is not None:
+                raise error
+            raise OKXExchangeAPIException(f"未能获取OKX币种信息 {key}")
+        try:
+            try:
+                result = self._fetch_func(ccy)
+            except Exception as e:
+                # 记录下来，让等待同一次刷新的其它线程也能得到失败原因
+                with self._lock:
+                    self._last_errors[key] = e
+                    has_data = self._has_data(key, live)
+                if not has_data:
+                    raise
+                self.logger.warning(f"刷新OKX币种缓存 {key} 出错，继续使用旧缓存: {e}")
+                return
+            if result and result.get('code') == '0' and result.get('data') is not None:
+                with self._lock:
+                    self._store_items(result['data'], ccy)
+                    self._last_errors.pop(key, None)
+                self.logger.debug(f"OKX币种缓存: 已刷新 {key}, 共 {len(result['data'])} 条链记录。")
+                return
+            result = result or {}
+            error = OKXExchangeAPIException(result.get('msg', '未能获取币种信息'), result.get('code'))
+            with self._lock:
+                self._last_errors[key] = error
+                has_data = self._has_data(key, live)
+            if not has_data:
+                raise error
+            self.logger.warning(f"刷新OKX币种缓存 {key} 失败，继续使用旧缓存: {error} (Code: {error.code})")
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def seed_items(self, items: list):
+        """用快照数据 (get_currencies 原始格式) 填充缓存。快照视为已过期，只供界面读取。"""
+        with self._lock:
+            self._store_items(items, None, seeded=True)
+        self.logger.info(f"OKX币种缓存已从快照载入: {len(items)} 条链记录。")
+
+    def get_all_items(self, force_refresh: bool = False) -> list:
+        """返回全量 get_currencies() 的原始 data 列表。"""
+        self._refresh(None, force=force_refresh)
+        return self._all_items
+
+    def get_records(self, ccy: str, force_refresh: bool = False) -> list[dict]:
+        """返回币种的全部链记录 (包括不可提现的)。"""
+        self._refresh(ccy, force=force_refresh)
+        return self._by_ccy.get(ccy.upper(), [])
+
+    def get_record(self, ccy: str, network: str, live: bool = True) -> dict | None:
+        """查询提币参数 (链名、手续费、最小额)。默认只使用实时数据；live=False 仅供界面显示，接受快照数据。"""
+        self._refresh(ccy, live=live)
+        return self._records.get((ccy.upper(), network.upper()))
+
+    def is_seeded(self, ccy: str) -> bool:
+        """币种的数据是否仍来自磁盘快照。"""
+        with self._lock:
+            return ccy.upper() in self._seeded
+
+
+# OKX 提币时返回这些错误码 (链不可用/手续费/最小提现额不符等)，说明本地缓存的链信息可能已过期
+OKX_CURRENCY_STALE_ERROR_CODES = {'58200', '58206', '58210', '58212', '58214'}
+# 可以直接重试的错误码 (请求未被处理): 50001 服务暂时不可用, 50011 限频, 50013 系统繁忙, 50100
+OKX_RETRYABLE_ERROR_CODES = {'50001', '50011', '50013', '50100'}
+# 结果未知的错误码 (请求可能已被处理): 50004 接口请求超时, 50026 系统错误
+OKX_AMBIGUOUS_ERROR_CODES = {'50004', '50026'}
+# 提现记录中表示已取消/失败的状态 (-2: 已取消, -1: 失败)
+OKX_WITHDRAW_FAILED_STATES = ('-2', '-1')
 
 class OKXAPI(BaseExchangeAPI):
     """OKX交易所API实现"""
 
-    def __init__(self, config: ConfigParser, logger: logging.Logger):
-        super().__init__(config, logger)
+    DEFAULT_CONFIG_SECTION = "OKX"
+
+    # OKX 按端点限频 (私有端点按UserID，公共端点按IP)，数值取自OKX API文档
+    RATE_LIMIT_EXCHANGE = "OKX"
+    RATE_LIMIT_BUCKETS = {
+        'currencies': BucketSpec(6, 1, SCOPE_ACCOUNT),
+        'balances': BucketSpec(6, 1, SCOPE_ACCOUNT),
+        'withdrawal': BucketSpec(6, 1, SCOPE_ACCOUNT),
+        'withdrawal_history': BucketSpec(6, 1, SCOPE_ACCOUNT),
+        'account_balance': BucketSpec(10, 2, SCOPE_ACCOUNT),
+        'ticker': BucketSpec(20, 2, SCOPE_IP),
+        'system_time': BucketSpec(10, 2, SCOPE_IP),
+    }
+    RATE_LIMIT_ENDPOINTS = {name: [(name, 1)] for name in RATE_LIMIT_BUCKETS}
+    RATE_LIMITED_ERROR_CODE = '50011' # Too Many Requests
+
+    def __init__(self, config: ConfigParser, logger: logging.Logger, config_section: str | None = None):
+        super().__init__(config, logger, config_section)
         self.api_key = ""
         self.api_secret = ""
         self.passphrase = ""
@@ -28,13 +282,48 @@ class OKXAPI(BaseExchangeAPI):
         self.accountAPI = None
         self.fundingAPI = None
         self.publicDataAPI = None
+        self.marketDataAPI = None
         # self.tradeAPI = None
 
+        # 币种/链信息缓存，查询网络、手续费、精度以及提币时共用
+        self.currency_cache = OKXCurrencyCache(self._fetch_currencies, logger)
+
+    def _fetch_currencies(self, ccy: str | None) -> dict:
+        if ccy:
+            return self._call('currencies', self.fundingAPI.get_currencies, ccy=ccy)
+        return self._call('currencies', self.fundingAPI.get_currencies)
+
+    def _on_rate_limit_feedback(self, endpoint: str, result, error: Exception | None):
+        """OKX SDK 不暴露响应头，只能根据 50011 (Too Many Requests) 暂停对应端点。"""
+        if self.rate_limiter is None:
+            return
+        code = result.get('code') if isinstance(result, dict) else None
+        if code == self.RATE_LIMITED_ERROR_CODE or (error is not None and '429' in str(error)):
+            self.logger.warning(f"OKX限频，端点 {endpoint} 暂停 1 秒。")
+            self.rate_limiter.block_endpoint(endpoint, 1.0)
+
+    def classify_error(self, error: Exception | None = None, code=None, status_code: int | None = None) -> ErrorClassification:
+        if error is not None:
+            # OkxAPIException 带有 code / status_code；httpx 的传输层异常不是 OSError 的子类
+            code = code or getattr(error, 'code', None)
+            status_code = status_code or getattr(error, 'status_code', None)
+            if type(error).__module__.split('.')[0] == 'httpx':
+                return ErrorClassification(retryable=True, reason=f"网络异常: {error}", ambiguous=True)
+        code = str(code) if code is not None else None
+        if status_code == 429 or code == self.RATE_LIMITED_ERROR_CODE:
+            return ErrorClassification(retryable=True, reason=f"OKX限频 (code {code})", retry_after=1.0, code=code)
+        if code in OKX_RETRYABLE_ERROR_CODES:
+            return ErrorClassification(retryable=True, reason=f"OKX临时错误 (code {code})", code=code)
+        if code in OKX_AMBIGUOUS_ERROR_CODES:
+            return ErrorClassification(retryable=True, reason=f"OKX结果未知 (code {code})", ambiguous=True, code=code)
+        return super().classify_error(error, code, status_code)
+
     def connect(self) -> tuple[bool, str]:
-        self.api_key = self.config.get('OKX', 'api_key', fallback='')
-        self.api_secret = self.config.get('OKX', 'api_secret', fallback='')
-        self.passphrase = self.config.get('OKX', 'passphrase', fallback='')
-        simulated_str = self.config.get('GENERAL', 'okx_simulated', fallback='False')
+        self.api_key = self.config.get(self.config_section, 'api_key', fallback='')
+        self.api_secret = self.config.get(self.config_section, 'api_secret', fallback='')
+        self.passphrase = self.config.get(self.config_section, 'passphrase', fallback='')
+        simulated_str = self.config.get(self.config_section, 'simulated',
+                                        fallback=self.config.get('GENERAL', 'okx_simulated', fallback='False'))
         self.simulated = True if simulated_str.lower() == 'true' else False
         self.timestamp_error_detected = False # 重置标志位
         
@@ -45,13 +334,21 @@ class OKXAPI(BaseExchangeAPI):
             return False, "API Key, Secret, 或 Passphrase 未配置"
 
         try:
+            _load_okx_sdk()
+            # 可选的 base_url 把请求发往本地模拟服务器，用于无密钥的测试和压测
+            base_url = self.config.get(self.config_section, 'base_url', fallback='').strip()
+            sdk_kwargs = {'domain': base_url.rstrip('/')} if base_url else {}
+            if base_url:
+                self.logger.warning(f"OKX API请求将发往 {base_url} (base_url)，而不是OKX服务器。")
             # Initialize APIs
-            self.accountAPI = Account.AccountAPI(self.api_key, self.api_secret, self.passphrase, False, flag)
-            self.fundingAPI = Funding.FundingAPI(self.api_key, self.api_secret, self.passphrase, False, flag)
-            self.publicDataAPI = PublicData.PublicAPI(flag=flag) # debug=False is default
+            self.accountAPI = Account.AccountAPI(self.api_key, self.api_secret, self.passphrase, False, flag, **sdk_kwargs)
+            self.fundingAPI = Funding.FundingAPI(self.api_key, self.api_secret, self.passphrase, False, flag, **sdk_kwargs)
+            self.publicDataAPI = PublicData.PublicAPI(flag=flag, **sdk_kwargs) # debug=False is default
+            self.marketDataAPI = MarketData.MarketAPI(flag=flag, **sdk_kwargs) # get_ticker 属于行情模块
+            self.currency_cache.invalidate()
             # self.tradeAPI = Trade.TradeAPI(self.api_key, self.api_secret, self.passphrase, False, flag)
 
-            test_call = self.accountAPI.get_account_balance() # Use a call that requires auth
+            test_call = self._call('account_balance', self.accountAPI.get_account_balance) # Use a call that requires auth
             if test_call and test_call.get('code') == '0': # '0' indicates success for OKX
                 self.logger.info(f"成功连接到 OKX ({'模拟盘' if self.simulated else '实盘'})。")
                 # 计算并存储时间偏移，确保 get_server_time_offset 已正确实现
@@ -92,6 +389,7 @@ class OKXAPI(BaseExchangeAPI):
         self.accountAPI = None
         self.fundingAPI = None
         self.publicDataAPI = None
+        self.marketDataAPI = None
         pass
 
     def get_all_tradable_coins(self) -> list[str]:
@@ -99,28 +397,27 @@ class OKXAPI(BaseExchangeAPI):
             self.logger.warning("OKX FundingAPI 未初始化 (get_all_tradable_coins)。")
             return []
         try:
-            result = self.fundingAPI.get_currencies() 
-            if result and result.get('code') == '0' and result.get('data'):
-                tradable_coins = [
-                    item['ccy'] for item in result['data'] 
-                    if item.get('canWd') # Ensure it can be withdrawn
-                ]
-                unique_coins = sorted(list(set(tradable_coins)))
-                self.logger.info(f"OKX: 获取到 {len(unique_coins)} 个可提币种。")
-                self.timestamp_error_detected = False # 获取成功，重置标志 (如果之前被其他错误调用设为True)
-                return unique_coins
-            else:
-                error_msg = result.get('msg', '未能获取币种信息')
-                error_code = result.get('code')
-                self.logger.error(f"获取OKX币种列表失败: {error_msg} (Code: {error_code})")
-                # 检查时间戳相关错误
-                l_error_msg = error_msg.lower()
-                if error_code == '50100' or error_code == '50101' or \
-                   ("timestamp" in l_error_msg or "expired" in l_error_msg or "time" in l_error_msg or "date" in l_error_msg) or \
-                   (error_code == '50011' and ("timestamp" in l_error_msg or "time" in l_error_msg)):
-                    self.timestamp_error_detected = True
-                    self.logger.error("检测到OKX API时间戳错误或相关问题 (获取币种列表时)。请检查系统时间。")
-                return []
+            items = self.currency_cache.get_all_items()
+            tradable_coins = [
+                item['ccy'] for item in items
+                if item.get('canWd') # Ensure it can be withdrawn
+            ]
+            unique_coins = sorted(list(set(tradable_coins)))
+            self.logger.info(f"OKX: 获取到 {len(unique_coins)} 个可提币种。")
+            self.timestamp_error_detected = False # 获取成功，重置标志 (如果之前被其他错误调用设为True)
+            return unique_coins
+        except OKXExchangeAPIException as e:
+            error_msg = e.message
+            error_code = e.code
+            self.logger.error(f"获取OKX币种列表失败: {error_msg} (Code: {error_code})")
+            # 检查时间戳相关错误
+            l_error_msg = error_msg.lower()
+            if error_code == '50100' or error_code == '50101' or \
+               ("timestamp" in l_error_msg or "expired" in l_error_msg or "time" in l_error_msg or "date" in l_error_msg) or \
+               (error_code == '50011' and ("timestamp" in l_error_msg or "time" in l_error_msg)):
+                self.timestamp_error_detected = True
+                self.logger.error("检测到OKX API时间戳错误或相关问题 (获取币种列表时)。请检查系统时间。")
+            return []
         except Exception as e:
             self.logger.error(f"获取OKX币种列表时发生未知错误: {e}", exc_info=True)
             l_e_str = str(e).lower()
@@ -135,7 +432,7 @@ class OKXAPI(BaseExchangeAPI):
             self.logger.error("OKX FundingAPI not initialized.")
             return None
         try:
-            result = self.fundingAPI.get_balances(ccy=asset.upper())
+            result = self._call('balances', self.fundingAPI.get_balances, ccy=asset.upper())
             self.logger.debug(f"OKX get_balances response for {asset}: {result}")
 
             if result and result.get('code') == '0' and result.get('data'):
@@ -167,42 +464,26 @@ class OKXAPI(BaseExchangeAPI):
             self.logger.warning("OKX FundingAPI 未初始化 (get_networks_for_coin)。")
             return []
         try:
-            result = self.fundingAPI.get_currencies(ccy=coin)
+            records = self.currency_cache.get_records(coin)
             networks = []
-            self.logger.debug(f"OKX raw currency info for {coin}: {result}") # Log raw response
-            if result and result.get('code') == '0' and result.get('data'):
-                for item in result['data']:
-                    # Log each item being processed for the specific coin
-                    if item.get('ccy') == coin:
-                        raw_chain_name = item.get('chain')
-                        can_withdraw = item.get('canWd')
-                        self.logger.debug(f"  Processing item for {coin}: chain='{raw_chain_name}', canWd={can_withdraw}")
-
-                        # Only proceed if withdraw is enabled and chain name exists
-                        if can_withdraw and raw_chain_name:
-                            # Normalization logic
-                            normalized_network = raw_chain_name # Default to raw name
-                            if f"{coin}-" in raw_chain_name: 
-                                normalized_network = raw_chain_name.split(f"{coin}-", 1)[-1]
-                                self.logger.debug(f"    Normalized '{raw_chain_name}' to '{normalized_network}'")
-                            else:
-                                self.logger.debug(f"    Using raw chain name '{normalized_network}' as network.")
-                            
-                            # Log before adding
-                            self.logger.debug(f"    Adding network '{normalized_network}' to list for {coin}.")
-                            networks.append(normalized_network)
-                        elif raw_chain_name: # Log why it was skipped if chain name exists but canWd is false
-                             self.logger.debug(f"  Skipping chain '{raw_chain_name}' for {coin} because canWd is {can_withdraw}.")
-                        else:
-                             self.logger.debug(f"  Skipping item for {coin} due to missing chain name.")
-                       
-                unique_networks = sorted(list(set(networks)))
-                self.logger.info(f"OKX: 为币种 {coin} 获取到网络: {unique_networks}")
-                return unique_networks
-            else:
-                error_msg = result.get('msg', f'未能获取 {coin} 的网络信息')
-                self.logger.error(f"获取OKX {coin} 网络信息失败: {error_msg} (Code: {result.get('code')})")
-                return []
+            for record in records:
+                raw_chain_name = record['chain']
+                can_withdraw = record['canWd']
+                # Only proceed if withdraw is enabled and chain name exists
+                if can_withdraw and raw_chain_name:
+                    self.logger.debug(f"    Adding network '{record['network']}' (chain '{raw_chain_name}') to list for {coin}.")
+                    networks.append(record['network'])
+                elif raw_chain_name: # Log why it was skipped if chain name exists but canWd is false
+                     self.logger.debug(f"  Skipping chain '{raw_chain_name}' for {coin} because canWd is {can_withdraw}.")
+                else:
+                     self.logger.debug(f"  Skipping item for {coin} due to missing chain name.")
+
+            unique_networks = sorted(list(set(networks)))
+            self.logger.info(f"OKX: 为币种 {coin} 获取到网络: {unique_networks}")
+            return unique_networks
+        except OKXExchangeAPIException as e:
+            self.logger.error(f"获取OKX {coin} 网络信息失败: {e.message} (Code: {e.code})")
+            return []
         except Exception as e:
             self.logger.error(f"获取OKX {coin} 网络信息时发生未知错误: {e}", exc_info=True)
             return []
@@ -212,105 +493,87 @@ class OKXAPI(BaseExchangeAPI):
             self.logger.warning("OKX FundingAPI 未初始化 (get_withdrawal_fee)。")
             return None
         try:
-            currencies_info = self.fundingAPI.get_currencies(ccy=coin)
-            if currencies_info and currencies_info.get('code') == '0' and currencies_info.get('data'):
-                for item in currencies_info['data']:
-                    if item.get('ccy') == coin and item.get('canWd'):
-                        normalized_chain_name = item['chain']
-                        if f"{coin}-" in normalized_chain_name:
-                            normalized_chain_name = normalized_chain_name.split(f"{coin}-", 1)[-1]
-
-                        if normalized_chain_name == network:
-                            fee_amount = item.get('minFee') 
-                            if fee_amount is not None:
-                                self.logger.info(f"OKX: {coin} 在网络 {network} (原始链: {item['chain']}) 的手续费: {fee_amount}")
-                                return str(Decimal(fee_amount)) 
-                            else:
-                                self.logger.warning(f"OKX: 未找到 {coin} ({network}) 的手续费信息 (minFee is None)。")
-                                return None
-                self.logger.warning(f"OKX: 未找到币种 {coin} 对应的网络 {network} 或该网络不可提现。")
-                return None
-            else:
-                error_msg = currencies_info.get('msg', '获取币种/手续费信息失败')
-                self.logger.error(f"获取OKX {coin} ({network}) 提现手续费失败 (API): {error_msg}")
+            record = self.currency_cache.get_record(coin, network)
+            if record and record['canWd']:
+                fee_amount = record['minFee']
+                if fee_amount is not None:
+                    self.logger.info(f"OKX: {coin} 在网络 {network} (原始链: {record['chain']}) 的手续费: {fee_amount}")
+                    return str(Decimal(fee_amount))
+                self.logger.warning(f"OKX: 未找到 {coin} ({network}) 的手续费信息 (minFee is None)。")
                 return None
+            self.logger.warning(f"OKX: 未找到币种 {coin} 对应的网络 {network} 或该网络不可提现。")
+            return None
+        except OKXExchangeAPIException as e:
+            self.logger.error(f"获取OKX {coin} ({network}) 提现手续费失败 (API): {e.message}")
+            return None
         except Exception as e:
             self.logger.error(f"获取OKX {coin} ({network}) 提现手续费时发生未知错误: {e}", exc_info=True)
             return None
 
+    def get_cached_withdrawal_fee(self, coin: str, network: str) -> tuple[str | dict | None, bool]:
+        if not self.fundingAPI:
+            self.logger.warning("OKX FundingAPI 未初始化 (get_cached_withdrawal_fee)。")
+            return None, False
+        try:
+            record = self.currency_cache.get_record(coin, network, live=False)
+            fee = str(Decimal(record['minFee'])) if record and record['canWd'] and record['minFee'] is not None else None
+            return fee, self.currency_cache.is_seeded(coin)
+        except Exception as e:
+            self.logger.error(f"读取OKX {coin} ({network}) 缓存手续费失败: {e}")
+            return None, False
+
     def get_withdraw_precision(self, coin: str, network: str) -> int | None:
         """获取OKX指定币种在特定网络上的提现精度（小数位数）。"""
         if not self.fundingAPI:
             self.logger.warning("OKX FundingAPI 未初始化 (get_withdraw_precision)。")
             return None
         try:
-            result = self.fundingAPI.get_currencies(ccy=coin)
-            if result and result.get('code') == '0' and result.get('data'):
-                for item in result['data']:
-                    if item.get('ccy') == coin.upper() and item.get('canWd'): # Check if withdraw is enabled
-                        # Normalize the chain name from OKX API
-                        raw_chain_name = item.get('chain', '')
-                        normalized_network = raw_chain_name
-                        if f"{coin.upper()}-" in raw_chain_name:
-                            normalized_network = raw_chain_name.split(f"{coin.upper()}-", 1)[-1]
-                        
-                        if normalized_network.upper() == network.upper():
-                            # Found the matching coin and network
-                            min_wd_str = item.get('minWd') # Minimum withdrawal amount string
-                            if min_wd_str and isinstance(min_wd_str, str):
-                                try:
-                                    if '.' in min_wd_str:
-                                        # Precision is the number of digits after the decimal point
-                                        precision = len(min_wd_str.split('.', 1)[1])
-                                        self.logger.debug(f"根据 minWd '{min_wd_str}' 确定 OKX {coin}-{network} 精度为: {precision}")
-                                        return precision
-                                    else:
-                                        # If minWd is an integer string, precision is 0
-                                        self.logger.debug(f"根据 minWd '{min_wd_str}' 确定 OKX {coin}-{network} 精度为: 0")
-                                        return 0
-                                except Exception as e_prec:
-                                    self.logger.warning(f"解析 minWd '{min_wd_str}' 以获取精度时出错: {e_prec}")
-                            else:
-                                self.logger.warning(f"未在 OKX {coin}-{network} 的信息中找到 minWd 字段。")
-                            
-                            # Fallback if minWd parsing fails or is missing
-                            break # Found the network, stop searching item list
-                        
-                # If loop finished without finding the network or precision
-                self.logger.warning(f"无法确定 OKX {coin}-{network} 的提现精度 (未找到匹配网络或minWd信息)。")
-                return None # Or return a default like 8?
-            else:
-                error_msg = result.get('msg', '获取币种信息失败')
-                self.logger.error(f"获取OKX币种信息以确定精度失败: {error_msg} (Code: {result.get('code')})")
-                return None
+            record = self.currency_cache.get_record(coin, network)
+            if record and record['canWd']: # Check if withdraw is enabled
+                min_wd_str = record['minWd'] # Minimum withdrawal amount string
+                if min_wd_str and isinstance(min_wd_str, str):
+                    try:
+                        if '.' in min_wd_str:
+                            # Precision is the number of digits after the decimal point
+                            precision = len(min_wd_str.split('.', 1)[1])
+                            self.logger.debug(f"根据 minWd '{min_wd_str}' 确定 OKX {coin}-{network} 精度为: {precision}")
+                            return precision
+                        else:
+                            # If minWd is an integer string, precision is 0
+                            self.logger.debug(f"根据 minWd '{min_wd_str}' 确定 OKX {coin}-{network} 精度为: 0")
+                            return 0
+                    except Exception as e_prec:
+                        self.logger.warning(f"解析 minWd '{min_wd_str}' 以获取精度时出错: {e_prec}")
+                else:
+                    self.logger.warning(f"未在 OKX {coin}-{network} 的信息中找到 minWd 字段。")
+
+            # If the network was not found or precision could not be determined
+            self.logger.warning(f"无法确定 OKX {coin}-{network} 的提现精度 (未找到匹配网络或minWd信息)。")
+            return None # Or return a default like 8?
+        except OKXExchangeAPIException as e:
+            self.logger.error(f"获取OKX币种信息以确定精度失败: {e.message} (Code: {e.code})")
+            return None
         except Exception as e:
             self.logger.error(f"确定OKX {coin}-{network} 提现精度时发生未知错误: {e}", exc_info=True)
             return None
 
-    def withdraw(self, coin: str, network: str, address: str, amount: str, memo: str | None = None) -> tuple[bool, str]: # amount type hint is str
+    def withdraw(self, coin: str, network: str, address: str, amount: str, memo: str | None = None,
+                 client_id: str | None = None) -> tuple[bool, str]: # amount type hint is str
         if not self.fundingAPI:
             self.logger.error("无法提币：OKX FundingAPI 未初始化。")
             return False, "客户端未初始化"
+        self.last_error_code = None
 
         # --- (Keep existing logic to find chain_to_use and actual_fee_for_chain_str) ---
         chain_to_use = None
         actual_fee_for_chain_str = None # Initialize
         try:
-            # Find the correct chain name (e.g., ETH-ERC20) and fee
-            currencies_info = self.fundingAPI.get_currencies(ccy=coin)
-            if currencies_info and currencies_info.get('code') == '0' and currencies_info.get('data'):
-                for item in currencies_info['data']:
-                    if item.get('ccy') == coin.upper() and item.get('canWd'):
-                        raw_chain_name = item.get('chain', '')
-                        normalized_network = raw_chain_name
-                        if f"{coin.upper()}-" in raw_chain_name:
-                            normalized_network = raw_chain_name.split(f"{coin.upper()}-", 1)[-1]
-                        
-                        if normalized_network.upper() == network.upper():
-                            chain_to_use = item['chain']
-                            actual_fee_for_chain_str = item.get('minFee') # Assuming minFee is the fee to use
-                            break # Found the network
-            
+            # Find the correct chain name (e.g., ETH-ERC20) and fee from the currency cache
+            record = self.currency_cache.get_record(coin, network)
+            if record and record['canWd']:
+                chain_to_use = record['chain']
+                actual_fee_for_chain_str = record['minFee'] # Assuming minFee is the fee to use
+
             if not chain_to_use:
                 self.logger.error(f"OKX提币失败：无法确定币种 {coin} 在网络 {network} 上的有效链名称({chain_to_use})。")
                 return False, f"无效网络/币种组合: {coin}-{network}"
@@ -333,12 +596,13 @@ class OKXAPI(BaseExchangeAPI):
             # fee: Use the fee obtained earlier.
             # toAddr: The address, potentially with memo included based on OKX rules for the coin.
             
-            result = self.fundingAPI.withdrawal(
+            result = self._call('withdrawal', self.fundingAPI.withdrawal,
                 ccy=coin.upper(),
                 amt=amount, # Pass the formatted string amount
                 dest='4', # 4: Digital currency address (external on-chain withdrawal)
                 toAddr=address, # Address might include memo/tag (e.g., addr:tag)
-                chain=chain_to_use # Pass the specific chain name found
+                chain=chain_to_use, # Pass the specific chain name found
+                clientId=client_id or '', # 客户端提币标识，用于超时后对账
                 # If memo/tag is separate for this coin/network on OKX API, pass it as **kwargs if SDK allows
                 # memo=memo, # Example if SDK had a memo kwarg
                 # tag=memo, # Example if SDK had a tag kwarg
@@ -356,23 +620,51 @@ class OKXAPI(BaseExchangeAPI):
                     return True, "请求已提交，但未返回提币ID" # Or False? Let's be optimistic
             else:
                 error_msg = result.get('msg', '未知API错误')
-                error_code = result.get('code', 'N/A')
+                # 批量风格的错误 (code 为 '1') 把具体错误码放在 data[0].sCode
+                items = result.get('data') or []
+                item = items[0] if isinstance(items, list) and items and isinstance(items[0], dict) else {}
+                if item.get('sCode') not in (None, '', '0'):
+                    error_code = str(item['sCode'])
+                    error_msg = item.get('sMsg') or error_msg
+                else:
+                    error_code = result.get('code', 'N/A')
                 self.logger.error(f"OKX提币API错误 (Code: {error_code}): {error_msg}")
-                return False, f"OKX错误 (Code: {error_code}): {error_msg}"
-
+                l_error_msg = error_msg.lower()
+                if error_code in OKX_CURRENCY_STALE_ERROR_CODES or "chain" in l_error_msg or "fee" in l_error_msg:
+                    # 链/手续费信息可能已变化，强制刷新该币种的缓存，供下一次提币使用
+                    self.logger.warning(f"OKX返回链或手续费相关错误，强制刷新 {coin} 的币种缓存。")
+                    try:
+                        self.currency_cache.get_records(coin, force_refresh=True)
+                    except Exception as e_refresh:
+                        self.logger.error(f"强制刷新 OKX {coin} 币种缓存失败: {e_refresh}")
+                message = f"OKX错误 (Code: {error_code}): {error_msg}"
+                classification = self.classify_error(code=error_code)
+                if classification.retryable and classification.ambiguous:
+                    raise WithdrawalUncertainError(message, classification)
+                if classification.retryable:
+                    raise RetryableExchangeError(message, classification)
+                self.last_error_code = classification.code
+                return False, message
+
+        except (WithdrawalUncertainError, RetryableExchangeError):
+            raise
         except Exception as e:
+            # 网络超时等异常: 请求可能已到达OKX，不能当作确定的失败
             self.logger.error(f"OKX提币时发生未知错误: {e}", exc_info=True)
-            return False, f"未知错误: {e}"
+            classification = self.classify_error(e)
+            if classification.retryable and not classification.ambiguous:
+                raise RetryableExchangeError(f"OKX错误: {e}", classification) from e
+            raise WithdrawalUncertainError(f"未知错误: {e}", classification) from e
 
     def get_symbol_ticker(self, symbol: str) -> str | None: # symbol e.g. BTC-USDT
-        if not self.publicDataAPI:
-            self.logger.warning("OKX PublicDataAPI 未初始化 (get_symbol_ticker)。")
+        if not self.marketDataAPI:
+            self.logger.warning("OKX MarketAPI 未初始化 (get_symbol_ticker)。")
             return None
         try:
             # OKX symbol format is "COIN-QUOTE", e.g., "BTC-USDT".
             # Main app should provide it in this format.
             self.logger.debug(f"OKX: 请求获取价格，交易对: {symbol}")
-            result = self.publicDataAPI.get_ticker(instId=symbol) 
+            result = self._call('ticker', self.marketDataAPI.get_ticker, instId=symbol) 
             
             # 添加详细日志，帮助调试
             self.logger.debug(f"OKX get_ticker 原始响应 for {symbol}: {result}") # 明确是哪个symbol的响应
@@ -416,43 +708,57 @@ class OKXAPI(BaseExchangeAPI):
             self.logger.warning("OKX FundingAPI 未初始化 (get_all_coins_info)。")
             return []
         try:
-            result = self.fundingAPI.get_currencies()
-            if result and result.get('code') == '0' and result.get('data'):
-                okx_data = result['data']
-                coins_dict = {} 
-                for item in okx_data:
-                    coin_code = item.get('ccy')
-                    if not coin_code: continue
-
-                    if coin_code not in coins_dict:
-                        coins_dict[coin_code] = {'coin': coin_code, 'networkList': []}
-                    
-                    chain_full = item.get('chain', '')
-                    network_part = chain_full
-                    if f"{coin_code}-" in chain_full: # Normalize e.g. "USDT-TRC20" -> "TRC20"
-                        network_part = chain_full.split(f"{coin_code}-", 1)[-1]
-                    
-                    if not network_part: continue # Skip if no distinct network part
-
-                    network_info = {
-                        'network': network_part, 
-                        'originalChain': chain_full, 
-                        'withdrawEnable': item.get('canWd', False),
-                        'withdrawFee': item.get('minFee'), 
-                        'withdrawMin': item.get('minWd'), 
-                    }
-                    coins_dict[coin_code]['networkList'].append(network_info)
+            okx_data = self.currency_cache.get_all_items()
+            coins_dict = {} 
+            for item in okx_data:
+                coin_code = item.get('ccy')
+                if not coin_code: continue
+
+                if coin_code not in coins_dict:
+                    coins_dict[coin_code] = {'coin': coin_code, 'networkList': []}
                 
-                self.logger.info(f"OKX: 成功转换 {len(coins_dict)} 种币种的详细信息。")
-                return list(coins_dict.values())
-            else:
-                error_msg = result.get('msg', '获取所有币种详细信息失败')
-                self.logger.error(f"OKX get_all_coins_info API error: {error_msg} (Code: {result.get('code')})")
-                return []
+                chain_full = item.get('chain', '')
+                network_part = normalize_okx_network(coin_code, chain_full) # e.g. "USDT-TRC20" -> "TRC20"
+                
+                if not network_part: continue # Skip if no distinct network part
+
+                network_info = {
+                    'network': network_part, 
+                    'originalChain': chain_full, 
+                    'withdrawEnable': item.get('canWd', False),
+                    'withdrawFee': item.get('minFee'), 
+                    'withdrawMin': item.get('minWd'), 
+                }
+                coins_dict[coin_code]['networkList'].append(network_info)
+            
+            self.logger.info(f"OKX: 成功转换 {len(coins_dict)} 种币种的详细信息。")
+            return list(coins_dict.values())
+        except OKXExchangeAPIException as e:
+            self.logger.error(f"OKX get_all_coins_info API error: {e.message} (Code: {e.code})")
+            return []
         except Exception as e:
             self.logger.error(f"OKX get_all_coins_info 未知错误: {e}", exc_info=True)
             return []
 
+    def seed_coins_info(self, coins_info: list):
+        # get_all_coins_info() 的归一化格式还原为 get_currencies() 的原始记录
+        items = []
+        for coin_info in coins_info:
+            for net_info in coin_info.get('networkList') or []:
+                items.append({
+                    'ccy': coin_info.get('coin'),
+                    'chain': net_info.get('originalChain') or f"{coin_info.get('coin')}-{net_info.get('network')}",
+                    'canWd': net_info.get('withdrawEnable', False),
+                    'minFee': net_info.get('withdrawFee'),
+                    'minWd': net_info.get('withdrawMin'),
+                })
+        self.currency_cache.seed_items(items)
+
+    def refresh_coins_info(self) -> list:
+        if not self.fundingAPI: return []
+        self.currency_cache.get_all_items(force_refresh=True)
+        return self.get_all_coins_info()
+
     def get_withdrawal_history(self, coin: str = None) -> list:
         if not self.fundingAPI:
             self.logger.warning("OKX FundingAPI 未初始化 (get_withdrawal_history)。")
@@ -462,7 +768,7 @@ class OKXAPI(BaseExchangeAPI):
             if coin:
                 params['ccy'] = coin
             
-            result = self.fundingAPI.get_withdrawal_history(**params)
+            result = self._call('withdrawal_history', self.fundingAPI.get_withdrawal_history, **params)
             if result and result.get('code') == '0' and result.get('data'):
                 history_data = result['data']
                 formatted_history = []
@@ -493,6 +799,21 @@ class OKXAPI(BaseExchangeAPI):
             self.logger.error(f"获取OKX提现历史时发生未知错误: {e}", exc_info=True)
             return []
             
+    def find_withdrawal_by_client_id(self, coin: str, client_id: str) -> dict | None:
+        if not self.fundingAPI:
+            raise RuntimeError("OKX FundingAPI 未初始化")
+        # 查询失败时让异常向上抛出，调用方据此区分"不存在"和"无法确认"
+        result = self._call('withdrawal_history', self.fundingAPI.get_withdrawal_history,
+                            ccy=coin.upper(), clientId=client_id)
+        if not result or result.get('code') != '0':
+            raise RuntimeError(f"查询OKX提现记录失败: {result.get('msg') if result else '无响应'}")
+        for item in result.get('data') or []:
+            if item.get('clientId') == client_id:
+                state = item.get('state')
+                return {'id': item.get('wdId'), 'client_id': client_id, 'status_code': state,
+                        'failed': state in OKX_WITHDRAW_FAILED_STATES}
+        return None
+
     def _map_okx_withdraw_status(self, status_code_str: str) -> str:
         status_map = {
             "-2": "已取消", "-1": "失败", "0": "等待提现", 
@@ -511,7 +832,7 @@ class OKXAPI(BaseExchangeAPI):
             return 0
         try:
             # 获取服务器时间
-            result = self.publicDataAPI.get_system_time()
+            result = self._call('system_time', self.publicDataAPI.get_system_time)
             self.logger.debug(f"OKX get_system_time response: {result}")
             if result and result.get('code') == '0' and result.get('data'):
                 server_time_ms = int(result['data'][0]['ts'])
@@ -541,18 +862,17 @@ class OKXAPI(BaseExchangeAPI):
         fee_str = self.get_withdrawal_fee(coin, network) 
         min_w_val = None
 
-        all_coin_details = self.get_all_coins_info() 
-        for coin_detail in all_coin_details:
-            if coin_detail.get('coin') == coin:
-                for net_info in coin_detail.get('networkList', []):
-                    if net_info.get('network') == network and net_info.get('withdrawEnable'):
-                        min_w_str = net_info.get('withdrawMin')
-                        if min_w_str is not None:
-                            try: min_w_val = float(min_w_str)
-                            except ValueError: self.logger.error(f"OKX: 无法转换最小提现额 '{min_w_str}' for {coin}-{network}")
-                        break 
-                break 
-        
+        try:
+            record = self.currency_cache.get_record(coin, network)
+        except Exception as e:
+            self.logger.error(f"OKX: 获取 {coin}-{network} 币种信息失败: {e}")
+            record = None
+        if record and record['canWd']:
+            min_w_str = record['minWd']
+            if min_w_str is not None:
+                try: min_w_val = float(min_w_str)
+                except ValueError: self.logger.error(f"OKX: 无法转换最小提现额 '{min_w_str}' for {coin}-{network}")
+
         fee_val = None
         if fee_str is not None:
             try: fee_val = float(fee_str)
@@ -0,0 +1,131 @@
+import threading
+import time
+from dataclasses import dataclass
+
+# 令牌桶作用域: 'ip' 桶按交易所在进程内共享 (同一IP的所有API实例共用)，
+# 'account' 桶每个API实例 (账户) 独立。
+SCOPE_IP = 'ip'
+SCOPE_ACCOUNT = 'account'
+
+
+@dataclass(frozen=True)
+class BucketSpec:
+    """令牌桶定义: period 秒内最多消耗 capacity 个权重。"""
+    capacity: float
+    period: float
+    scope: str = SCOPE_IP
+
+
+class TokenBucket:
+    """
+    预约式令牌桶。
+
+    acquire() 在锁内立即扣除令牌 (余额可以为负)，然后在锁外睡眠到令牌补足为止。
+    因为扣除顺序就是调用顺序，先到的调用方一定先被放行，不会出现饥饿。
+    """
+
+    def __init__(self, name: str, capacity: float, period: float):
+        self.name = name
+        self.capacity = float(capacity)
+        self.rate = float(capacity) / float(period) # 每秒补充的令牌数
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill_locked(self, now: float):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def reserve(self, weight: float = 1) -> float:
+        """扣除 weight 个令牌，返回调用方需要等待的秒数。"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill_locked(now)
+            self._tokens -= weight
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self, weight: float = 1) -> float:
+        """阻塞直到可以消耗 weight 个令牌。返回实际等待的秒数。"""
+        wait = self.reserve(weight)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def sync_used(self, used: float):
+        """根据交易所返回的"已用权重"校正本地令牌数 (只会往少的方向校正)。"""
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            self._tokens = min(self._tokens, self.capacity - float(used))
+
+    def block_for(self, seconds: float):
+        """在 seconds 秒内暂停放行 (收到 429 / Retry-After 时使用)。"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            return self._tokens
+
+
+_shared_buckets: dict[tuple[str, str], TokenBucket] = {}
+_shared_lock = threading.Lock()
+
+
+def _get_shared_bucket(exchange: str, name: str, spec: BucketSpec) -> TokenBucket:
+    with _shared_lock:
+        key = (exchange, name)
+        bucket = _shared_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(f"{exchange}:{name}", spec.capacity, spec.period)
+            _shared_buckets[key] = bucket
+        return bucket
+
+
+class RateLimiter:
+    """
+    单个交易所API实例的限频器。
+
+    endpoints 把逻辑端点名映射到 [(桶名, 权重), ...]，一次调用可能同时消耗多个桶
+    (例如币安同时有IP权重和UID权重限制)。未登记的端点不受限制。
+    """
+
+    def __init__(self, exchange: str, buckets: dict[str, BucketSpec], endpoints: dict[str, list[tuple[str, float]]]):
+        self.exchange = exchange
+        self.endpoints = endpoints
+        self.buckets: dict[str, TokenBucket] = {}
+        for name, spec in buckets.items():
+            if spec.scope == SCOPE_IP:
+                self.buckets[name] = _get_shared_bucket(exchange, name, spec)
+            else:
+                self.buckets[name] = TokenBucket(f"{exchange}:{name}", spec.capacity, spec.period)
+        self.total_wait = 0.0 # 累计被限频等待的秒数，用于统计
+
+    def acquire(self, endpoint: str) -> float:
+        """在调用 endpoint 前阻塞等待，直到所有相关桶都有足够的令牌。"""
+        wait = 0.0
+        for bucket_name, weight in self.endpoints.get(endpoint, ()):
+            bucket = self.buckets.get(bucket_name)
+            if bucket is not None:
+                wait = max(wait, bucket.reserve(weight))
+        if wait > 0:
+            self.total_wait += wait
+            time.sleep(wait)
+        return wait
+
+    def sync_used(self, bucket_name: str, used: float):
+        bucket = self.buckets.get(bucket_name)
+        if bucket is not None:
+            bucket.sync_used(used)
+
+    def block_endpoint(self, endpoint: str, seconds: float):
+        """端点被交易所限频时，暂停其涉及的所有桶。"""
+        for bucket_name, _ in self.endpoints.get(endpoint, ()):
+            bucket = self.buckets.get(bucket_name)
+            if bucket is not None:
+                bucket.block_for(seconds)
@@ -0,0 +1,67 @@
+import random
+import threading
+from configparser import ConfigParser
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    提币失败时的重试策略: 带上限的指数退避 + 全抖动 (full jitter)。
+
+    第 n 次重试前等待 uniform(0, min(max_delay, base_delay * 2**(n-1))) 秒；
+    交易所给出 Retry-After 时至少等待该时长。
+    max_attempts 包含第一次调用，budget 为整个批次允许的重试总次数。
+    """
+    max_attempts: int = 3
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+    budget: int = 20
+
+    @classmethod
+    def from_config(cls, config: ConfigParser, section: str = 'WITHDRAWAL') -> "RetryPolicy":
+        default = cls()
+        return cls(
+            max_attempts=max(1, config.getint(section, 'retry_max_attempts', fallback=default.max_attempts)),
+            base_delay=max(0.0, config.getfloat(section, 'retry_base_delay', fallback=default.base_delay)),
+            max_delay=max(0.0, config.getfloat(section, 'retry_max_delay', fallback=default.max_delay)),
+            budget=max(0, config.getint(section, 'retry_budget', fallback=default.budget)),
+        )
+
+    def write_defaults(self, config: ConfigParser, section: str = 'WITHDRAWAL'):
+        config.set(section, 'retry_max_attempts', str(self.max_attempts))
+        config.set(section, 'retry_base_delay', str(self.base_delay))
+        config.set(section, 'retry_max_delay', str(self.max_delay))
+        config.set(section, 'retry_budget', str(self.budget))
+
+    def delay_for(self, retry_number: int, retry_after: float | None = None, rng: random.Random | None = None) -> float:
+        """第 retry_number 次重试 (从1开始) 前的等待秒数。"""
+        cap = min(self.max_delay, self.base_delay * (2 ** (retry_number - 1)))
+        delay = (rng or random).uniform(0, cap)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class RetryBudget:
+    """批次级别的重试预算，多账户并发时由各执行器共享。"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def try_consume(self) -> bool:
+        with self._lock:
+            if self._used >= self.total:
+                return False
+            self._used += 1
+            return True
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total - self._used)
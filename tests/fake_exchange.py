@@ -0,0 +1,77 @@
+"""测试用的内存交易所: 不发任何网络请求，withdraw / find_withdrawal_by_client_id 的行为可以逐次编排。"""
+import logging
+from configparser import ConfigParser
+
+from exchange_api_base import BaseExchangeAPI
+
+
+class FakeExchangeAPI(BaseExchangeAPI):
+    """
+    withdraw_effects / lookup_effects 是按调用顺序消费的列表，每一项为:
+      异常实例     - 抛出该异常
+      其它值       - 作为返回值 (withdraw 为 (success, message)，查询为记录字典或None)
+    列表耗尽后 withdraw 返回成功，查询返回 None。
+    """
+
+    def __init__(self, balance: str = "1000", fee: str = "1", precision: int | None = 2,
+                 withdraw_effects: list | None = None, lookup_effects: list | None = None):
+        super().__init__(ConfigParser(), logging.getLogger("test.fake_exchange"))
+        self.balance = balance
+        self.fee = fee
+        self.precision = precision
+        self.withdraw_effects = list(withdraw_effects or [])
+        self.lookup_effects = list(lookup_effects or [])
+        self.withdraw_calls: list[dict] = []
+        self.lookup_calls: list[str] = []
+        self.time_syncs = 0
+
+    @staticmethod
+    def _next(effects: list, default):
+        if not effects:
+            return default
+        effect = effects.pop(0)
+        if isinstance(effect, BaseException):
+            raise effect
+        return effect
+
+    def connect(self):
+        return True, "ok"
+
+    def close(self):
+        pass
+
+    def get_server_time_offset(self):
+        self.time_syncs += 1
+        return 0
+
+    def get_all_tradable_coins(self):
+        return ["USDT"]
+
+    def get_balance(self, asset):
+        return self.balance
+
+    def get_networks_for_coin(self, coin):
+        return ["TRX"]
+
+    def get_withdrawal_fee(self, coin, network, amount=None):
+        return self.fee
+
+    def get_withdraw_precision(self, coin, network):
+        return self.precision
+
+    def withdraw(self, coin, network, address, amount, memo=None, client_id=None):
+        self.withdraw_calls.append({'address': address, 'amount': amount, 'client_id': client_id})
+        return self._next(self.withdraw_effects, (True, f"wd-{len(self.withdraw_calls)}"))
+
+    def find_withdrawal_by_client_id(self, coin, client_id):
+        self.lookup_calls.append(client_id)
+        return self._next(self.lookup_effects, None)
+
+    def get_symbol_ticker(self, symbol):
+        return "1"
+
+    def get_all_coins_info(self):
+        return []
+
+    def get_withdrawal_history(self, coin=None):
+        return []
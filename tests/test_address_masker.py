@@ -0,0 +1,33 @@
+import pytest
+
+from address_masker import mask_address, mask_addresses_in_text
+
+LINE = "[12:00:01] [SUCCESS]: 地址 {addr} (第 3 个) 提币成功: wd-1"
+
+
+@pytest.mark.parametrize("address, masked", [
+    ("0x52908400098527886E0F7030069857D2E4169EE7", "0x529084...169EE7"), # EVM
+    ("TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7", "TLa2f6VP...5wYjU7"), # TRON
+    ("1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2", "1BvBMSEY...JaNVN2"), # BTC legacy
+    ("3J98t1WpEZ73CNmQviecrnyiWrnqRhWNLy", "3J98t1Wp...RhWNLy"), # BTC P2SH
+    ("bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq", "bc1qar0s...wf5mdq"), # BTC bech32
+    ("7EcDhSYGxXyscszYEp35KHN8vvw3svAuLKTzXwCFLtV", "7EcDhSYG...wCFLtV"), # SOL
+    # 旧实现只打码 '1' 之后的部分，把 "So" 和一串 '1' 原样留在日志里
+    ("So11111111111111111111111111111111111111112", "So111111...111112"),
+    ("Qncj4oM1b5TduM3JFsVKDnEtegWSoVEyE4CUwh849xy5", "Qncj4oM1...849xy5"),
+    # 以 'T' / '3' 开头的 SOL 地址不能只按 TRON / BTC 规则打码前34位
+    ("TRaUgXmkq1b2z5Wu8tZ3hV9HJAHNFhBV8PqcQvGwTEaB", "TRaUgXmk...GwTEaB"),
+    ("3vZ67CGoRYhMhL3P7PMRsdLyDxvkNQgT1YwNbHxZf5Ky", "3vZ67CGo...xZf5Ky"),
+])
+def test_address_in_log_line_is_masked(address, masked):
+    assert mask_addresses_in_text(LINE.format(addr=address)) == LINE.format(addr=masked)
+    assert mask_address(f"{address}:备注") == f"{masked}:备注"
+
+
+def test_multiple_addresses_and_plain_text():
+    text = ("[DEBUG]: [2/500] 处理地址: wallet-2 (0x52908400098527886E0F7030069857D2E4169EE7)，"
+            "转给 TLa2f6VPqDgRE67v1736s7bJ8Ray5wYjU7，计划数量: 1.2 USDT")
+    assert mask_addresses_in_text(text) == ("[DEBUG]: [2/500] 处理地址: wallet-2 (0x529084...169EE7)，"
+                                            "转给 TLa2f6VP...5wYjU7，计划数量: 1.2 USDT")
+    assert mask_addresses_in_text("下一次提币前等待 12 秒... (需要: 12.5, 可用: 3.1)") == \
+        "下一次提币前等待 12 秒... (需要: 12.5, 可用: 3.1)"
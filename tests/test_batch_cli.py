@@ -0,0 +1,114 @@
+import io
+import json
+import threading
+from decimal import Decimal
+
+import pytest
+
+import batch_cli
+from fake_exchange import FakeExchangeAPI
+from withdrawal_journal import STATUS_COMPLETED, replay_journal
+
+
+@pytest.fixture
+def cli_env(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[GENERAL]\n[WITHDRAWAL]\nenable_warning = false\n", encoding='utf-8')
+    addresses_path = tmp_path / "addresses.csv"
+    addresses_path.write_text("address,label\n" + "".join(f"T{i:033d},\n" for i in range(3)), encoding='utf-8')
+    apis = []
+
+    def install(api_factory):
+        def make(config, logger):
+            api = api_factory()
+            apis.append(api)
+            return api
+        monkeypatch.setattr(batch_cli, "_get_exchange_class", lambda exchange_name: make)
+
+    def run(stop_event=None, *extra):
+        argv = ["--config", str(config_path), "--exchange", "Binance", "--addresses", str(addresses_path),
+                "--coin", "USDT", "--network", "TRX", "--min-amount", "10", "--max-amount", "11",
+                "--min-interval", "0", "--max-interval", "0", "--sequential",
+                "--journal-dir", str(tmp_path / "journal"), "--events-file", str(tmp_path / "events.jsonl"),
+                "--log-file", str(tmp_path / "cli.log"), *extra]
+        output = io.StringIO()
+        code = batch_cli.run(batch_cli.build_arg_parser().parse_args(argv), batch_cli.JsonLineEmitter(output),
+                             stop_event or threading.Event())
+        events = [json.loads(line) for line in output.getvalue().splitlines()]
+        return code, events
+
+    return install, run, apis
+
+
+def _journal_path(events):
+    return next(event['path'] for event in events if event['event'] == "journal")
+
+
+def test_completed_batch_writes_batch_end(cli_env):
+    install, run, _ = cli_env
+    install(FakeExchangeAPI)
+    code, events = run()
+    assert code == batch_cli.EXIT_OK
+    assert replay_journal(_journal_path(events)).status == STATUS_COMPLETED
+
+
+def test_interrupted_batch_stays_resumable(cli_env):
+    install, run, apis = cli_env
+    stop_event = threading.Event()
+
+    class StoppingAPI(FakeExchangeAPI):
+        def withdraw(self, *args, **kwargs):
+            stop_event.set() # 模拟第一笔提币后收到 SIGINT
+            return super().withdraw(*args, **kwargs)
+
+    install(StoppingAPI)
+    code, events = run(stop_event)
+    assert code == batch_cli.EXIT_INTERRUPTED
+    journal_path = _journal_path(events)
+    state = replay_journal(journal_path)
+    assert not state.finished
+    assert len(state.completed) == 1
+
+    install(FakeExchangeAPI)
+    code, events = run(None, "--resume", journal_path)
+    assert code == batch_cli.EXIT_OK
+    assert next(event for event in events if event['event'] == "resume")['remaining'] == 2
+    assert len(apis[-1].withdraw_calls) == 2
+    assert replay_journal(journal_path).status == STATUS_COMPLETED
+
+
+def test_resume_uses_journal_parameters(cli_env):
+    install, run, apis = cli_env
+    stop_event = threading.Event()
+
+    class StoppingAPI(FakeExchangeAPI):
+        def withdraw(self, *args, **kwargs):
+            stop_event.set()
+            return super().withdraw(*args, **kwargs)
+
+    install(StoppingAPI)
+    _, events = run(stop_event)
+    journal_path = _journal_path(events)
+
+    install(FakeExchangeAPI)
+    code, _ = run(None, "--resume", journal_path, "--network", "BSC")
+    assert code == batch_cli.EXIT_USAGE
+
+    # 网络大小写不同视为同一批次；提币数量使用日志中的 10 - 11，而不是参数中的值
+    code, _ = run(None, "--resume", journal_path, "--network", "trx", "--min-amount", "20", "--max-amount", "21")
+    assert code == batch_cli.EXIT_OK
+    assert len(apis[-1].withdraw_calls) == 2
+    assert all(Decimal('10') <= Decimal(call['amount']) <= Decimal('11') for call in apis[-1].withdraw_calls)
+
+
+def test_batch_failing_with_exception_stays_resumable(cli_env):
+    install, run, _ = cli_env
+
+    class BrokenAPI(FakeExchangeAPI):
+        def get_balance(self, asset):
+            raise RuntimeError("unexpected")
+
+    install(BrokenAPI)
+    code, events = run()
+    assert code == batch_cli.EXIT_SETUP
+    assert not replay_journal(_journal_path(events)).finished
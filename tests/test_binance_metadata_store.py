@@ -0,0 +1,137 @@
+import logging
+import threading
+
+import pytest
+
+from binance_exchange import BinanceCoinMetadataStore
+
+LOGGER = logging.getLogger("test")
+
+
+def _coins(fee):
+    return [{'coin': 'USDT', 'networkList': [{'network': 'TRX', 'withdrawEnable': True, 'withdrawFee': fee,
+                                              'withdrawMin': '10', 'withdrawIntegerMultiple': '0.01'}]}]
+
+
+def test_seeded_snapshot_serves_ui_but_not_withdraw_parameters():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise ConnectionError("connection reset")
+
+    store = BinanceCoinMetadataStore(fetch, LOGGER)
+    store.seed(_coins('1'))
+    assert store.is_stale()
+    assert store.get_coins_info()[0]['coin'] == 'USDT'
+    assert [net.network for net in store.get_coin_networks("USDT")] == ["TRX"]
+    assert calls == []
+    # 刷新失败不能让快照充当提币参数，也不能推迟下一次刷新
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            store.get_network("USDT", "TRX")
+        with pytest.raises(ConnectionError):
+            store.get_coin_networks("USDT", live=True)
+    assert store.is_stale()
+    assert len(calls) == 4
+
+
+def test_seeded_snapshot_replaced_by_live_data():
+    store = BinanceCoinMetadataStore(lambda: _coins('2'), LOGGER)
+    store.seed(_coins('1'))
+    assert store.get_network("USDT", "TRX").withdraw_fee == '2'
+    assert not store.is_stale()
+    assert store.get_coin_networks("USDT")[0].withdraw_fee == '2'
+
+
+def test_live_data_kept_when_refresh_fails():
+    responses = [_coins('2')]
+
+    def fetch():
+        if responses:
+            return responses.pop()
+        raise ConnectionError("connection reset")
+
+    store = BinanceCoinMetadataStore(fetch, LOGGER, ttl=0)
+    assert store.get_network("USDT", "TRX").withdraw_fee == '2'
+    assert store.get_network("USDT", "TRX").withdraw_fee == '2'
+
+
+def test_snapshot_reads_do_not_wait_for_refresh_download():
+    started, release = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        return _coins('2')
+
+    store = BinanceCoinMetadataStore(fetch, LOGGER)
+    store.seed(_coins('1'))
+    worker = threading.Thread(target=store.refresh)
+    worker.start()
+    try:
+        assert started.wait(5)
+        # 后台下载进行中，界面读取快照立即返回，不等待锁
+        assert store.get_network("USDT", "TRX", live=False).withdraw_fee == '1'
+        assert store.from_snapshot
+    finally:
+        release.set()
+        worker.join(5)
+    assert store.get_network("USDT", "TRX", live=False).withdraw_fee == '2'
+    assert not store.from_snapshot
+
+
+def test_concurrent_live_reads_share_one_download():
+    calls = []
+    started, release = threading.Event(), threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return _coins('2')
+
+    store = BinanceCoinMetadataStore(fetch, LOGGER)
+    store.seed(_coins('1'))
+    results = []
+    leader = threading.Thread(target=lambda: results.append(store.get_network("USDT", "TRX").withdraw_fee))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(store.get_network("USDT", "TRX").withdraw_fee))
+                 for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert results == ['2'] * 4
+    assert len(calls) == 1
+
+
+def test_followers_get_leader_error():
+    started, release = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise ConnectionError("connection reset")
+
+    store = BinanceCoinMetadataStore(fetch, LOGGER)
+    store.seed(_coins('1'))
+    errors = []
+
+    def read():
+        try:
+            store.get_network("USDT", "TRX")
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 3
@@ -0,0 +1,54 @@
+import logging
+from decimal import Decimal
+
+from fake_exchange import FakeExchangeAPI
+from multi_account_executor import AccountConfig, MultiAccountExecutor
+from withdrawal_engine import DEFAULT_PRECISION, UNKNOWN_PRECISION, WithdrawalEngine
+
+LOGGER = logging.getLogger("test.multi_account")
+
+
+def _targets(count):
+    return [{'address': f"T{i:033d}", 'label': None} for i in range(count)]
+
+
+def test_on_plan_called_once_per_account_before_execution():
+    apis = {name: FakeExchangeAPI() for name in ("main", "sub1")}
+    accounts = [AccountConfig(name, "Binance", api, 0, 0) for name, api in apis.items()]
+    plans = []
+
+    def on_plan(plan, account_name):
+        # 计划导出发生在该账户的任何提币之前
+        assert apis[account_name].withdraw_calls == []
+        plans.append((account_name, len(plan.items)))
+
+    executor = MultiAccountExecutor(accounts, LOGGER, log=lambda message, level: None, on_plan=on_plan)
+    results = executor.run("USDT", "TRX", _targets(5), Decimal('10'), Decimal('11'), 0, 0)
+
+    assert sorted(plans) == [("main", 3), ("sub1", 2)]
+    assert sum(stats.succeeded for stats in results.values()) == 5
+
+
+def test_on_plan_error_does_not_stop_account():
+    api = FakeExchangeAPI()
+    accounts = [AccountConfig("main", "Binance", api, 0, 0)]
+
+    def on_plan(plan, account_name):
+        raise OSError("磁盘已满")
+
+    executor = MultiAccountExecutor(accounts, LOGGER, log=lambda message, level: None, on_plan=on_plan)
+    results = executor.run("USDT", "TRX", _targets(2), Decimal('10'), Decimal('11'), 0, 0)
+    assert results["main"].succeeded == 2
+
+
+def test_fallback_precision():
+    engine = WithdrawalEngine(FakeExchangeAPI(precision=None), "Binance", LOGGER, log=lambda message, level: None)
+    assert engine.fetch_fee_and_precision("USDT", "TRX") == (Decimal('1'), UNKNOWN_PRECISION)
+
+    def raise_timeout(coin, network):
+        raise OSError("timeout")
+
+    failing = FakeExchangeAPI()
+    failing.get_withdraw_precision = raise_timeout
+    engine = WithdrawalEngine(failing, "Binance", LOGGER, log=lambda message, level: None)
+    assert engine.fetch_fee_and_precision("USDT", "TRX") == (Decimal('0'), DEFAULT_PRECISION)
@@ -0,0 +1,123 @@
+import logging
+import threading
+
+import pytest
+
+from okx_exchange import OKXCurrencyCache, OKXExchangeAPIException
+
+LOGGER = logging.getLogger("test")
+USDT_ITEMS = [{'ccy': 'USDT', 'chain': 'USDT-TRC20', 'canWd': True, 'minFee': '1', 'minWd': '2'}]
+
+
+def _run_with_follower(fetch_started: threading.Event, release: threading.Event, cache: OKXCurrencyCache):
+    """leader 线程开始刷新后，在当前线程作为 follower 读取同一币种；结束后放行 leader。"""
+    leader_error = []
+
+    def leader():
+        try:
+            cache.get_records("USDT")
+        except Exception as e:
+            leader_error.append(e)
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    assert fetch_started.wait(5)
+    try:
+        return cache.get_records("USDT")
+    finally:
+        release.set()
+        thread.join(5)
+
+
+def test_follower_sees_leader_network_exception():
+    started, release = threading.Event(), threading.Event()
+
+    def fetch(ccy):
+        started.set()
+        release.wait(5)
+        raise ConnectionError("connection reset")
+
+    cache = OKXCurrencyCache(fetch, LOGGER)
+    threading.Timer(0.2, release.set).start()
+    with pytest.raises(ConnectionError):
+        _run_with_follower(started, release, cache)
+
+
+def test_follower_raises_when_wait_times_out_without_data():
+    started, release = threading.Event(), threading.Event()
+
+    def fetch(ccy):
+        started.set()
+        release.wait(5)
+        return {'code': '0', 'data': USDT_ITEMS}
+
+    cache = OKXCurrencyCache(fetch, LOGGER)
+    cache.INFLIGHT_WAIT_SECONDS = 0.1
+    with pytest.raises(OKXExchangeAPIException, match="超时"):
+        _run_with_follower(started, release, cache)
+
+
+def test_network_error_keeps_stale_data():
+    calls = []
+
+    def fetch(ccy):
+        calls.append(ccy)
+        if len(calls) > 1:
+            raise TimeoutError("read timeout")
+        return {'code': '0', 'data': USDT_ITEMS}
+
+    cache = OKXCurrencyCache(fetch, LOGGER)
+    assert cache.get_records("USDT")[0]['network'] == "TRC20"
+    assert cache.get_records("USDT", force_refresh=True)[0]['network'] == "TRC20"
+
+
+def test_seeded_snapshot_serves_ui_but_not_withdraw_parameters():
+    calls = []
+
+    def fetch(ccy):
+        calls.append(ccy)
+        raise ConnectionError("connection reset")
+
+    cache = OKXCurrencyCache(fetch, LOGGER)
+    cache.seed_items(USDT_ITEMS)
+    # 界面读取直接使用快照，不发请求
+    assert cache.get_records("USDT")[0]['network'] == "TRC20"
+    assert cache.get_all_items() == USDT_ITEMS
+    assert cache.get_record("USDT", "TRC20", live=False)['minFee'] == '1'
+    assert cache.is_seeded("usdt")
+    assert calls == []
+    # 提币参数必须来自实时数据，刷新失败时不能退回快照；失败也不会让快照变成"新鲜"数据
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            cache.get_record("USDT", "TRC20")
+    assert calls == ["USDT", "USDT"]
+
+
+def test_seeded_snapshot_replaced_by_live_record():
+    live_items = [dict(USDT_ITEMS[0], minFee='3')]
+    calls = []
+
+    def fetch(ccy):
+        calls.append(ccy)
+        return {'code': '0', 'data': live_items}
+
+    cache = OKXCurrencyCache(fetch, LOGGER)
+    cache.seed_items(USDT_ITEMS)
+    assert cache.get_record("USDT", "TRC20")['minFee'] == '3'
+    assert cache.get_record("USDT", "TRC20")['minFee'] == '3'
+    assert calls == ["USDT"]
+    assert not cache.is_seeded("USDT")
+
+
+def test_per_currency_refresh_updates_all_items():
+    btc_items = [{'ccy': 'BTC', 'chain': 'BTC-Bitcoin', 'canWd': True, 'minFee': '0.0002', 'minWd': '0.001'}]
+    live_usdt = [dict(USDT_ITEMS[0], minFee='3')]
+
+    def fetch(ccy):
+        return {'code': '0', 'data': live_usdt if ccy == "USDT" else USDT_ITEMS + btc_items}
+
+    cache = OKXCurrencyCache(fetch, LOGGER)
+    assert cache.get_all_items() == USDT_ITEMS + btc_items
+    cache.get_records("USDT", force_refresh=True)
+    # 全量列表 (get_all_coins_info 和磁盘快照的来源) 中的 USDT 已替换为刷新后的记录，其它币种保持不变
+    assert cache.get_all_items() == live_usdt + btc_items
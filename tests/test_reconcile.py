@@ -0,0 +1,96 @@
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from exchange_api_base import WithdrawalUncertainError
+from fake_exchange import FakeExchangeAPI
+from withdrawal_engine import (RECONCILE_NOT_FOUND, RECONCILE_REJECTED, RECONCILE_SUBMITTED, RECONCILE_UNKNOWN,
+                               RECONCILE_WINDOW, WithdrawalEngine, reconcile_journal_state, reconcile_withdrawal)
+from withdrawal_failures import FAIL_UNCERTAIN
+from withdrawal_journal import WithdrawalJournal, replay_journal
+from withdrawal_plan import PlannedWithdrawal
+
+LOGGER = logging.getLogger("test.reconcile")
+NO_WAIT = (0.0, 0.0, 0.0)
+
+
+def test_found_after_indexing_lag():
+    api = FakeExchangeAPI(lookup_effects=[None, None, {'id': "wd-9", 'failed': False}])
+    assert reconcile_withdrawal(api, "USDT", "cid", delays=NO_WAIT) == (RECONCILE_SUBMITTED, "wd-9")
+    assert len(api.lookup_calls) == 3
+
+
+def test_rejected_record():
+    api = FakeExchangeAPI(lookup_effects=[{'id': "wd-9", 'failed': True, 'status_code': 1}])
+    assert reconcile_withdrawal(api, "USDT", "cid", delays=NO_WAIT)[0] == RECONCILE_REJECTED
+
+
+def test_not_found_only_after_window():
+    api = FakeExchangeAPI()
+    assert reconcile_withdrawal(api, "USDT", "cid", delays=NO_WAIT, window=60)[0] == RECONCILE_UNKNOWN
+    assert reconcile_withdrawal(api, "USDT", "cid", delays=NO_WAIT, window=60, elapsed=61)[0] == RECONCILE_NOT_FOUND
+
+
+def test_lookup_errors_are_retried():
+    api = FakeExchangeAPI(lookup_effects=[ConnectionError("reset"), None, None])
+    assert reconcile_withdrawal(api, "USDT", "cid", delays=NO_WAIT)[0] == RECONCILE_NOT_FOUND
+
+    api = FakeExchangeAPI(lookup_effects=[None, None, ConnectionError("reset")])
+    outcome, detail = reconcile_withdrawal(api, "USDT", "cid", delays=NO_WAIT)
+    assert outcome == RECONCILE_UNKNOWN
+    assert "reset" in detail
+
+
+def test_stop_during_polling_leaves_result_unknown():
+    api = FakeExchangeAPI()
+    outcome, _ = reconcile_withdrawal(api, "USDT", "cid", delays=(1.0, 1.0), sleep=lambda seconds: False)
+    assert outcome == RECONCILE_UNKNOWN
+    assert api.lookup_calls == []
+
+
+def _uncertain_journal(tmp_path, count):
+    targets = [{'address': f"addr{i}", 'label': None} for i in range(1, count + 1)]
+    journal = WithdrawalJournal.create(str(tmp_path), LOGGER, "Binance", "USDT", "TRX", targets)
+    for i in range(1, count + 1):
+        planned = PlannedWithdrawal(index=i, address=f"addr{i}", label=None, amount=Decimal('10'), amount_str="10",
+                                    usd_value=None, api_address=f"addr{i}", is_large=False)
+        journal.record_planned(planned, client_id=f"cid{i}")
+        journal.record_result(planned, False, "超时", uncertain=True)
+    journal.close()
+    return replay_journal(journal.path)
+
+
+def test_journal_keeps_recent_not_found_uncertain(tmp_path):
+    state = _uncertain_journal(tmp_path, 1)
+    resolved = reconcile_journal_state(state, FakeExchangeAPI(), LOGGER)
+    assert resolved == 0
+    assert set(state.uncertain) == {"addr1"}
+    assert state.remaining_targets() == []
+    assert set(replay_journal(state.path).uncertain) == {"addr1"}
+
+
+def test_journal_resolves_old_entries(tmp_path):
+    state = _uncertain_journal(tmp_path, 2)
+    old = (datetime.now() - timedelta(seconds=RECONCILE_WINDOW + 5)).isoformat()
+    for record in state.uncertain.values():
+        record['ts'] = old
+    api = FakeExchangeAPI(lookup_effects=[{'id': "wd-1", 'failed': False}, None])
+    assert reconcile_journal_state(state, api, LOGGER) == 2
+    assert state.completed == {"addr1": "wd-1"}
+    assert set(state.failed) == {"addr2"}
+    replayed = replay_journal(state.path)
+    assert replayed.uncertain == {}
+    assert [t['address'] for t in replayed.remaining_targets()] == ["addr2"]
+
+
+def test_unconfirmed_withdrawal_is_classified_uncertain():
+    api = FakeExchangeAPI(withdraw_effects=[WithdrawalUncertainError("read timeout")],
+                          lookup_effects=[ConnectionError("reset")] * 3)
+    engine = WithdrawalEngine(api, "Binance", LOGGER, log=lambda message, level: None)
+    engine.reconcile_delays = NO_WAIT
+    plan = engine.prepare("USDT", "TRX", [{'address': "addr1", 'label': None}], Decimal('10'), Decimal('10'))
+    stats = engine.execute(plan, 0, 0)
+    assert stats.failed == 1
+    assert len(api.withdraw_calls) == 1
+    assert [item.reason for item in engine.failures.items] == [FAIL_UNCERTAIN]
+    assert engine.failures.rerun_targets() == []
@@ -0,0 +1,83 @@
+import logging
+import time
+from configparser import ConfigParser
+from decimal import Decimal
+
+import pytest
+
+import binance_exchange
+from exchange_api_base import ErrorClassification, RetryableExchangeError, WithdrawalUncertainError
+from fake_exchange import FakeExchangeAPI
+from retry_policy import RetryPolicy
+from withdrawal_engine import WithdrawalEngine
+from withdrawal_failures import FAIL_API_ERROR
+
+LOGGER = logging.getLogger("test.submit")
+RATE_LIMITED = ErrorClassification(retryable=True, reason="限频")
+
+
+def _run_one(api):
+    engine = WithdrawalEngine(api, "Binance", LOGGER, log=lambda message, level: None,
+                              retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01, budget=5))
+    engine.reconcile_delays = (0.0, 0.0)
+    plan = engine.prepare("USDT", "TRX", [{'address': "addr1", 'label': None}], Decimal('10'), Decimal('10'))
+    return engine, engine.execute(plan, 0, 0)
+
+
+def test_rejected_request_is_retried_with_same_client_id():
+    api = FakeExchangeAPI(withdraw_effects=[RetryableExchangeError("429", RATE_LIMITED)])
+    _, stats = _run_one(api)
+    assert stats.succeeded == 1 and stats.retries == 1
+    assert len({call['client_id'] for call in api.withdraw_calls}) == 1
+    assert len(api.withdraw_calls) == 2
+
+
+def test_ambiguous_failure_is_not_resubmitted():
+    api = FakeExchangeAPI(withdraw_effects=[WithdrawalUncertainError("HTTP 503")])
+    engine, stats = _run_one(api)
+    assert stats.failed == 1 and stats.retries == 0
+    assert len(api.withdraw_calls) == 1
+    assert len(api.lookup_calls) == 2
+    # 对账确认不存在: 记为可由用户重新提币的失败
+    assert [item.reason for item in engine.failures.items] == [FAIL_API_ERROR]
+
+
+def test_transient_lookup_error_is_retried():
+    api = FakeExchangeAPI(withdraw_effects=[WithdrawalUncertainError("read timeout")],
+                          lookup_effects=[RuntimeError("APIError(code=-1008): server busy"),
+                                          {'id': "wd-7", 'failed': False}])
+    _, stats = _run_one(api)
+    assert stats.succeeded == 1
+    assert len(api.withdraw_calls) == 1
+
+
+def _binance_api_error(code, message):
+    cls = binance_exchange.BinanceAPIException
+    error = cls.__new__(cls)
+    Exception.__init__(error, message)
+    error.code, error.status_code, error.message = code, 400, message
+    return error
+
+
+class _TimestampRejectingClient:
+    response = None
+    timestamp_offset = 0
+
+    def __init__(self, server_lag_ms):
+        self.server_lag_ms = server_lag_ms
+
+    def get_server_time(self):
+        return {'serverTime': int(time.time() * 1000) - self.server_lag_ms}
+
+    def withdraw(self, **params):
+        raise _binance_api_error(-1021, "Timestamp for this request is outside of the recvWindow.")
+
+
+def test_binance_timestamp_error_resyncs_before_retry():
+    api = binance_exchange.BinanceAPI(ConfigParser(), LOGGER)
+    api.rate_limiter = None
+    api.client = _TimestampRejectingClient(server_lag_ms=5000)
+    with pytest.raises(RetryableExchangeError):
+        api.withdraw("USDT", "TRX", "addr1", "10", client_id="cid")
+    assert 4900 <= api.time_offset <= 5500
+    assert api.client.timestamp_offset == -api.time_offset
@@ -0,0 +1,67 @@
+import logging
+from decimal import Decimal
+
+from exchange_api_base import ErrorClassification, RetryableExchangeError, WithdrawalUncertainError
+from fake_exchange import FakeExchangeAPI
+from retry_policy import RetryPolicy
+from withdrawal_engine import WithdrawalEngine
+from withdrawal_events import error_code_of
+
+LOGGER = logging.getLogger("test.events")
+
+
+class _SdkError(Exception):
+    def __init__(self, code):
+        super().__init__(f"APIError(code={code})")
+        self.code = code
+
+
+class _EventSink:
+    def __init__(self):
+        self.events = []
+
+    def write(self, event):
+        self.events.append(event)
+
+
+def _run_one(api):
+    sink = _EventSink()
+    engine = WithdrawalEngine(api, "Binance", LOGGER, log=lambda message, level: None, events=sink,
+                              retry_policy=RetryPolicy(max_attempts=2, base_delay=0.01, max_delay=0.01, budget=5))
+    engine.reconcile_delays = (0.0,)
+    plan = engine.prepare("USDT", "TRX", [{'address': "addr1", 'label': None}], Decimal('10'), Decimal('10'))
+    engine.execute(plan, 0, 0)
+    return sink.events[0]
+
+
+def test_error_code_of():
+    assert error_code_of(RetryableExchangeError("429", ErrorClassification(True, "限频", code="-1003"))) == "-1003"
+    try:
+        try:
+            raise _SdkError(-4026)
+        except _SdkError as e:
+            raise WithdrawalUncertainError("timeout") from e
+    except WithdrawalUncertainError as wrapped:
+        assert error_code_of(wrapped) == "-4026"
+    assert error_code_of(TimeoutError("read timeout")) is None
+
+
+def test_event_records_code_of_raised_error():
+    rate_limited = RetryableExchangeError("OKX错误", ErrorClassification(True, "OKX限频", code="50011"))
+    event = _run_one(FakeExchangeAPI(withdraw_effects=[rate_limited]))
+    assert event['result'] == "success"
+    assert event['api_calls'][0]['error_code'] == "50011"
+    assert 'error_code' not in event['api_calls'][1]
+    assert event['error_code'] == "50011"
+
+
+def test_event_records_code_of_returned_failure():
+    class RejectingAPI(FakeExchangeAPI):
+        def withdraw(self, *args, **kwargs):
+            self.last_error_code = "58207"
+            return False, "OKX错误 (Code: 58207): 地址不在白名单"
+
+    event = _run_one(RejectingAPI())
+    assert event['result'] == "failed"
+    assert event['api_calls'][0]['error_code'] == "58207"
+    assert event['error_code'] == "58207"
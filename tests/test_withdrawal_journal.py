@@ -0,0 +1,59 @@
+import logging
+from decimal import Decimal
+
+from withdrawal_journal import (STATUS_COMPLETED, WithdrawalJournal, find_unfinished_batches, mark_abandoned,
+                                replay_journal)
+from withdrawal_plan import PlannedWithdrawal
+
+LOGGER = logging.getLogger("test.journal")
+TARGETS = [{'address': f"addr{i}", 'label': None} for i in range(1, 5)]
+
+
+def _planned(index):
+    return PlannedWithdrawal(index=index, address=f"addr{index}", label=None, amount=Decimal('10'), amount_str="10",
+                             usd_value=None, api_address=f"addr{index}", is_large=False)
+
+
+def _create(tmp_path):
+    return WithdrawalJournal.create(str(tmp_path), LOGGER, "Binance", "USDT", "TRX", TARGETS)
+
+
+def test_replay_classifies_addresses(tmp_path):
+    journal = _create(tmp_path)
+    for index in (1, 2, 3, 4):
+        journal.record_planned(_planned(index), client_id=f"cid{index}")
+    journal.record_result(_planned(1), True, "wd-1")
+    journal.record_result(_planned(2), False, "余额不足")
+    journal.record_result(_planned(3), False, "超时", uncertain=True)
+    journal.close() # 地址4: 已发出请求但没有结果 (崩溃)
+
+    state = replay_journal(journal.path)
+    assert state.completed == {"addr1": "wd-1"}
+    assert state.failed == {"addr2": "余额不足"}
+    assert set(state.uncertain) == {"addr3", "addr4"}
+    assert state.uncertain["addr3"]['client_id'] == "cid3"
+    assert not state.finished
+    assert [t['address'] for t in state.remaining_targets()] == ["addr2"]
+
+
+def test_replay_ignores_truncated_last_line(tmp_path):
+    journal = _create(tmp_path)
+    journal.record_planned(_planned(1), client_id="cid1")
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "done", "address": "ad')
+    state = replay_journal(journal.path)
+    assert set(state.uncertain) == {"addr1"}
+
+
+def test_closed_batch_is_resumable_and_finished_batch_is_not(tmp_path):
+    interrupted = _create(tmp_path)
+    interrupted.close()
+    completed = _create(tmp_path)
+    completed.finish(STATUS_COMPLETED)
+    unfinished = find_unfinished_batches(str(tmp_path), LOGGER)
+    assert [state.path for state in unfinished] == [interrupted.path]
+    assert replay_journal(completed.path).status == STATUS_COMPLETED
+
+    mark_abandoned(unfinished[0], LOGGER)
+    assert find_unfinished_batches(str(tmp_path), LOGGER) == []
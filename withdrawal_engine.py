@@ -0,0 +1,511 @@
+import logging
+import random
+import time
+import uuid
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from balance_ledger import BalanceLedger
+from exchange_api_base import BaseExchangeAPI, ErrorClassification, RetryableExchangeError
+from retry_policy import RetryBudget, RetryPolicy
+from withdrawal_failures import (FailureSet, FAIL_API_ERROR, FAIL_BALANCE_UNKNOWN, FAIL_INSUFFICIENT_BALANCE,
+                                 FAIL_JOURNAL, FAIL_LARGE_REJECTED, FAIL_NOT_PROCESSED, FAIL_UNCERTAIN)
+from withdrawal_events import (AttemptTrace, RESULT_FAILED, RESULT_SKIPPED, RESULT_SUCCESS, RESULT_UNCERTAIN,
+                               WithdrawalEventLog)
+from withdrawal_plan import WithdrawalPlan, PlannedWithdrawal, build_withdrawal_plan, make_client_id
+
+DEFAULT_PRECISION = 8 # 获取手续费或精度出错时使用的默认精度
+UNKNOWN_PRECISION = 6 # API未返回精度时使用的保守默认值
+# 提币请求异常后按 client_id 轮询查询前的等待 (秒)。交易所的提现记录有索引延迟，刚受理的提币
+# 可能暂时查不到，合计约2分钟的窗口内一直查不到才认为交易所确实没有这笔提币
+RECONCILE_DELAYS = (3.0, 7.0, 15.0, 30.0, 60.0)
+RECONCILE_WINDOW = sum(RECONCILE_DELAYS)
+
+# 按 client_id 对账的结果
+RECONCILE_SUBMITTED = "submitted" # 交易所已受理
+RECONCILE_REJECTED = "rejected" # 交易所已受理但随后取消/拒绝
+RECONCILE_NOT_FOUND = "not_found" # 请求发出超过索引延迟窗口后仍查不到，确认交易所没有这笔提币
+RECONCILE_UNKNOWN = "unknown" # 查询失败或仍在索引延迟窗口内，无法判断
+
+
+def reconcile_withdrawal(exchange_api: BaseExchangeAPI, coin: str, client_id: str | None,
+                         delays: tuple[float, ...] = RECONCILE_DELAYS, window: float | None = None,
+                         elapsed: float = 0.0, sleep=time.sleep) -> tuple[str, str]:
+    """
+    按 client_id 查询提币是否已被交易所受理。返回 (对账结果, 提币ID或说明)。
+
+    依次等待 delays 中的秒数后查询，查到记录立即返回；查询本身出错 (网络异常、限频等) 时继续下一次查询。
+    只有请求发出后已经过 window 秒 (默认为 delays 之和)、且最后一次查询成功但仍查不到时，
+    才返回 RECONCILE_NOT_FOUND，否则返回 RECONCILE_UNKNOWN。
+    elapsed 为调用时距离请求发出已经过去的秒数；sleep 返回False时停止轮询。
+    """
+    if not client_id:
+        return RECONCILE_UNKNOWN, "没有 client_id，无法对账"
+    window = sum(delays) if window is None else window
+    sent_at = time.monotonic() - elapsed
+    error = None
+    for delay in delays:
+        if delay > 0 and sleep(delay) is False:
+            break
+        try:
+            record = exchange_api.find_withdrawal_by_client_id(coin, client_id)
+        except Exception as e:
+            error = e
+            continue
+        error = None
+        if record is not None:
+            if record.get('failed'):
+                return RECONCILE_REJECTED, f"交易所已取消或拒绝 (状态: {record.get('status_code')})"
+            return RECONCILE_SUBMITTED, str(record.get('id') or client_id)
+    if error is not None:
+        return RECONCILE_UNKNOWN, f"对账查询失败: {error}"
+    waited = time.monotonic() - sent_at
+    if waited < window:
+        return RECONCILE_UNKNOWN, f"请求发出 {waited:.0f} 秒后交易所仍无此提币记录，尚未超过 {window:.0f} 秒的记录延迟窗口"
+    return RECONCILE_NOT_FOUND, "交易所无此提币记录"
+
+
+def _record_age(record: dict) -> float:
+    """日志记录写入至今经过的秒数，没有时间戳时为0。"""
+    try:
+        return max(0.0, (datetime.now() - datetime.fromisoformat(record['ts'])).total_seconds())
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+def reconcile_journal_state(state, exchange_api: BaseExchangeAPI, logger: logging.Logger,
+                            account: str | None = None) -> int:
+    """
+    对批次日志中结果未知的地址逐个按 client_id 对账，并把确定的结果补写到日志。
+
+    只处理由 account 账户 (None 为主账户) 发出的条目，其它账户的提币在这个API上查不到。
+    每个条目只查询一次: 距离日志记录已超过 RECONCILE_WINDOW 秒仍查不到时，确认交易所没有受理，
+    该地址变为确定的失败并在恢复批次时重新提币；记录较新或查询失败时保持结果未知。
+    返回已确定结果的地址数量。
+    """
+    from withdrawal_journal import WithdrawalJournal # 避免循环导入
+    coin = state.header.get('coin', '')
+    resolved = 0
+    journal = WithdrawalJournal.reopen(state, logger)
+    try:
+        for address, record in list(state.uncertain.items()):
+            if record.get('account') != account:
+                continue
+            outcome, message = reconcile_withdrawal(exchange_api, coin, record.get('client_id'), delays=(0.0,),
+                                                    window=RECONCILE_WINDOW, elapsed=_record_age(record))
+            logger.info(f"批次 {state.batch_id} 对账 {record.get('client_id')}: {outcome} ({message})")
+            if outcome == RECONCILE_UNKNOWN:
+                continue
+            success = outcome == RECONCILE_SUBMITTED
+            journal.record_reconciled(record, success, message)
+            del state.uncertain[address]
+            if success:
+                state.completed[address] = message
+            else:
+                state.failed[address] = message
+            resolved += 1
+    finally:
+        journal.close()
+    return resolved
+
+
+@dataclass
+class WithdrawalStats:
+    """一次执行的结果统计。"""
+    total: int = 0
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    balance_queries: int = 0
+    retries: int = 0 # 实际执行的重试次数
+    retry_exhausted: int = 0 # 可重试但因次数或预算用尽而放弃的提币
+    stopped: bool = False
+
+
+class WithdrawalEngine:
+    """
+    单个交易所账户的提币执行器，不依赖任何界面代码。
+
+    界面 (或命令行、多账户执行器) 通过回调接收日志、进度和确认请求:
+      log(message, level)                     - 日志
+      on_progress(processed, total)           - 每处理完一个条目调用一次
+      on_wait(percentage, text)               - 两笔提币之间的等待进度
+      confirm_large(coin, network, planned) -> bool - 大额提币确认，未提供时视为确认
+      on_result(planned, success, message)    - 每笔提币API调用的结果
+      on_retry(planned, attempt, delay, reason, budget_remaining) - 临时错误后即将重试
+      should_stop() -> bool                   - 返回True时尽快停止
+      mask(text) -> str                       - 日志中的地址脱敏
+
+    提供 journal (WithdrawalJournal) 时，每笔提币前后都会写入崩溃安全的日志。
+    每笔提币都带有确定性的 client_id；API调用异常时先按 client_id 向交易所对账，
+    只有确认交易所没有这笔提币时才把它当作失败，这类失败不会自动重新提币。
+    只有交易所明确没有处理请求的临时错误 (限频等，RetryableExchangeError) 按 retry_policy 退避重试，
+    retry_budget 限制整个批次的重试总次数 (多账户时共享)。
+    所有被跳过或失败的地址连同原因记录到 failures (FailureSet)，未提供时在 prepare() 中创建。
+    提供 events (WithdrawalEventLog) 时，每个处理过的条目写一行结构化事件 (各阶段时间点和API耗时)。
+    """
+
+    def __init__(self, exchange_api: BaseExchangeAPI, exchange_name: str, logger: logging.Logger,
+                 log=None, on_progress=None, on_wait=None, confirm_large=None, on_result=None,
+                 should_stop=None, mask=None, resync_every: int = BalanceLedger.DEFAULT_RESYNC_EVERY,
+                 rng: random.Random | None = None, name: str | None = None, journal=None,
+                 retry_policy: RetryPolicy | None = None, retry_budget: RetryBudget | None = None, on_retry=None,
+                 failures: FailureSet | None = None, events: WithdrawalEventLog | None = None):
+        self.exchange_api = exchange_api
+        self.exchange_name = exchange_name
+        self.logger = logger
+        self.name = name # 多账户时用于日志前缀
+        self._log = log
+        self._on_progress = on_progress
+        self._on_wait = on_wait
+        self._confirm_large = confirm_large
+        self._on_result = on_result
+        self._should_stop = should_stop or (lambda: False)
+        self._mask = mask or (lambda text: text)
+        self.resync_every = resync_every
+        self.rng = rng or random.Random()
+        self.ledger: BalanceLedger | None = None
+        self.journal = journal # WithdrawalJournal，为None时不记录
+        self._fallback_batch_id = uuid.uuid4().hex # 没有日志时用于生成 client_id
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_budget = retry_budget or RetryBudget(self.retry_policy.budget)
+        self._on_retry = on_retry
+        self.failures = failures
+        self.reconcile_delays = RECONCILE_DELAYS
+        self.events = events
+        self._planned_at: float | None = None # 计划生成的时间
+        self._trace: AttemptTrace | None = None # 当前条目的事件记录
+
+    def log_message(self, message: str, level: str = "INFO", exc_info: bool = False):
+        if self.name:
+            message = f"[{self.name}] {message}"
+        if self._log is not None:
+            self._log(message, level)
+        else:
+            log_level = getattr(logging, level.upper(), logging.INFO) if level.upper() != "SUCCESS" else logging.INFO
+            self.logger.log(log_level, message, exc_info=exc_info)
+
+    def fetch_fee_and_precision(self, coin: str, network: str) -> tuple[Decimal, int]:
+        """
+        获取提币手续费和精度。获取失败时手续费为0；API未返回精度时为 UNKNOWN_PRECISION，
+        出错时为 DEFAULT_PRECISION。
+        """
+        fee_decimal = Decimal('0')
+        actual_precision = DEFAULT_PRECISION
+        self.log_message(f"获取 {coin}-{network} 的提现手续费和精度...", level="DEBUG")
+        try:
+            fee_info = self.exchange_api.get_withdrawal_fee(coin, network)
+            fee_str = None
+            if isinstance(fee_info, dict):
+                fee_str = fee_info.get('fee')
+            elif isinstance(fee_info, (str, float, int)):
+                fee_str = str(fee_info)
+            if fee_str:
+                fee_decimal = Decimal(fee_str)
+                self.log_message(f"获取到提币手续费: {fee_decimal} {coin}", level="INFO")
+            else:
+                self.log_message(f"无法解析或获取 {coin}-{network} 的手续费信息，将使用 0。", level="WARNING")
+
+            precision_from_api = self.exchange_api.get_withdraw_precision(coin, network)
+            if precision_from_api is not None:
+                actual_precision = precision_from_api
+                self.log_message(f"获取到 {coin}-{network} 的实际提现精度: {actual_precision} 位小数", level="INFO")
+            else:
+                actual_precision = UNKNOWN_PRECISION
+                self.log_message(f"无法从API获取 {coin}-{network} 的提现精度，将使用默认值: {actual_precision} 位小数", level="WARNING")
+        except Exception as e:
+            self.log_message(f"获取手续费或精度时出错: {e}，将使用默认手续费0和默认精度{actual_precision}。", level="ERROR")
+            fee_decimal = Decimal('0')
+        return fee_decimal, actual_precision
+
+    def prepare(self, coin: str, network: str, target_addresses: list, min_amount: Decimal, max_amount: Decimal,
+                usd_price: Decimal | None = None, warning_threshold: float | None = None) -> WithdrawalPlan:
+        """获取手续费/精度和余额快照，生成提币计划。失败时抛出异常。"""
+        if self.failures is None:
+            self.failures = FailureSet(self.exchange_name, coin, network, min_amount, max_amount)
+        fee_decimal, precision = self.fetch_fee_and_precision(coin, network)
+        api = self.exchange_api
+        self.ledger = BalanceLedger(lambda: api.get_balance(coin), self.logger, resync_every=self.resync_every)
+        balance_snapshot = self.ledger.sync() # 批次开始时的余额快照，同时作为本地账本的初始值
+        plan = build_withdrawal_plan(
+            exchange_name=self.exchange_name,
+            coin=coin,
+            network=network,
+            target_addresses=target_addresses,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            precision=precision,
+            fee=fee_decimal,
+            usd_price=usd_price,
+            warning_threshold=warning_threshold,
+            balance_snapshot=balance_snapshot,
+            rng=self.rng,
+        )
+        self._planned_at = time.time()
+        for line in plan.summary_lines():
+            self.log_message(line, level="INFO")
+        if plan.balance_sufficient is False:
+            self.log_message(f"当前余额 {plan.balance_snapshot} {coin} 不足以完成全部 {len(plan.executable_items)} 笔提币 "
+                             f"(需要 {plan.total_required} {coin})，余额耗尽后剩余地址将被跳过。", level="WARNING")
+        return plan
+
+    @property
+    def batch_id(self) -> str:
+        return self.journal.batch_id if self.journal is not None else self._fallback_batch_id
+
+    def client_id_for(self, planned: PlannedWithdrawal) -> str:
+        return make_client_id(self.batch_id, planned.address, planned.index, account=self.name)
+
+    def _reconcile_after_error(self, coin: str, client_id: str, error_message: str) -> tuple[str, bool, str, bool]:
+        """提币请求异常后按 client_id 轮询对账。返回 (对账结果, success, message, uncertain)。"""
+        self.log_message(f"  -> 提币结果未知，将在 {sum(self.reconcile_delays):.0f} 秒内按 client_id {client_id} "
+                         f"查询 {len(self.reconcile_delays)} 次...", level="WARNING")
+        with self._api_call("reconcile"):
+            outcome, detail = reconcile_withdrawal(self.exchange_api, coin, client_id, delays=self.reconcile_delays,
+                                                   sleep=self._sleep_unless_stopped)
+        if outcome == RECONCILE_SUBMITTED:
+            self.log_message(f"  -> 对账确认交易所已受理该笔提币 (ID: {detail})。", level="INFO")
+            return outcome, True, detail, False
+        if outcome in (RECONCILE_REJECTED, RECONCILE_NOT_FOUND):
+            self.log_message(f"  -> 对账结果: {detail}，确认未提币。", level="WARNING")
+            return outcome, False, f"{error_message}；{detail}", False
+        self.log_message(f"  -> {detail}，该笔提币结果仍未知，请在交易所提现记录中核对。", level="ERROR")
+        return outcome, False, f"{error_message}；{detail}", True
+
+    def _sleep_unless_stopped(self, seconds: float) -> bool:
+        """等待指定秒数，收到停止信号时提前返回False。"""
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            if self._should_stop():
+                return False
+            time.sleep(min(0.5, max(0.0, deadline - time.time())))
+        return True
+
+    def _next_retry_delay(self, planned: PlannedWithdrawal, attempt: int, classification: ErrorClassification | None,
+                          stats: WithdrawalStats) -> float | None:
+        """判断第 attempt 次调用失败后能否重试。可以重试时返回等待秒数，否则返回None。"""
+        if classification is None or not classification.retryable:
+            return None
+        if attempt >= self.retry_policy.max_attempts or not self.retry_budget.try_consume():
+            stats.retry_exhausted += 1
+            self.log_message(f"  -> 第 {planned.index} 个地址已重试 {attempt - 1} 次，重试次数或批次重试预算已用尽 "
+                             f"(剩余预算 {self.retry_budget.remaining}/{self.retry_budget.total})。", level="WARNING")
+            return None
+        return self.retry_policy.delay_for(attempt, classification.retry_after, self.rng)
+
+    def _submit_with_retry(self, plan: WithdrawalPlan, planned: PlannedWithdrawal, client_id: str,
+                           stats: WithdrawalStats) -> tuple[bool, str, bool]:
+        """
+        调用提币API，临时错误时退避重试。返回 (success, message, uncertain)。
+
+        只有交易所明确没有处理这笔请求的错误 (RetryableExchangeError，例如限频) 才会重试，
+        每次重试都使用同一个 client_id。结果未知的错误 (超时、5xx) 只按 client_id 对账，
+        不会自动重新提币: 对账确认不存在时记为失败 (可由用户重新提币)，无法确认时记为结果未知。
+        """
+        coin = plan.coin
+        attempt = 1
+        while True:
+            try:
+                self.log_message(f"  -> 准备调用API提币: {planned.amount_str} {coin} 到 {self._mask(planned.api_address)}...", level="INFO")
+                with self._api_call("withdraw"):
+                    success, message = self.exchange_api.withdraw(
+                        coin=coin,
+                        network=plan.network,
+                        address=planned.api_address,
+                        amount=planned.amount_str,
+                        memo=None,
+                        client_id=client_id,
+                    )
+                if not success and self._trace is not None:
+                    self._trace.record_error_code(self.exchange_api.last_error_code)
+                return success, message, False
+            except RetryableExchangeError as e:
+                # 交易所明确没有处理该请求
+                classification = e.classification
+                message = str(e)
+                self.log_message(f"提币请求遇到临时错误: {classification.reason}", level="WARNING")
+            except Exception as e:
+                # 请求可能已被交易所受理 (例如超时)，按 client_id 对账决定结果，不自动重新提币
+                self.log_message(f"提币API调用时发生异常: {e}", level="ERROR", exc_info=True)
+                _outcome, success, message, uncertain = self._reconcile_after_error(coin, client_id, f"API调用异常: {e}")
+                return success, message, uncertain
+
+            delay = self._next_retry_delay(planned, attempt, classification, stats)
+            if delay is None:
+                return False, message, False
+            stats.retries += 1
+            self.log_message(f"  -> {delay:.1f} 秒后第 {attempt} 次重试 (最多 {self.retry_policy.max_attempts - 1} 次，"
+                             f"批次剩余重试预算 {self.retry_budget.remaining}/{self.retry_budget.total})", level="WARNING")
+            if self._on_retry is not None:
+                self._on_retry(planned, attempt, delay, classification.reason, self.retry_budget.remaining)
+            if not self._sleep_unless_stopped(delay):
+                self.log_message("在重试等待期间收到停止信号，放弃重试。", level="INFO")
+                return False, message, False
+            attempt += 1
+
+    def _api_call(self, name: str):
+        return self._trace.api_call(name) if self._trace is not None else nullcontext()
+
+    def _record_failure(self, planned: PlannedWithdrawal, reason: str, detail: str = ""):
+        if self._trace is not None:
+            result = {FAIL_API_ERROR: RESULT_FAILED, FAIL_UNCERTAIN: RESULT_UNCERTAIN}.get(reason, RESULT_SKIPPED)
+            self._trace.set_result(result, reason, detail or None)
+        if self.failures is not None:
+            self.failures.add(planned.address, planned.label, reason, detail, planned.amount_str,
+                              account=self.name, index=planned.index)
+
+    def _describe(self, planned: PlannedWithdrawal) -> str:
+        masked = self._mask(planned.address)
+        return f"{planned.label} ({masked})" if planned.label else masked
+
+    def _execute_one(self, plan: WithdrawalPlan, planned: PlannedWithdrawal, stats: WithdrawalStats) -> bool:
+        """处理单个计划条目，结果记录到 stats。返回是否实际调用了提币API。"""
+        if self.events is None:
+            return self._process_item(plan, planned, stats)
+        self._trace = AttemptTrace(plan, planned, self.batch_id, self.name,
+                                   self.client_id_for(planned) if planned.executable else None,
+                                   self._planned_at, mask=self._mask)
+        try:
+            return self._process_item(plan, planned, stats)
+        finally:
+            trace, self._trace = self._trace, None
+            try:
+                self.events.write(trace.to_event())
+            except Exception as e:
+                self.log_message(f"写入提币事件失败: {e}", level="WARNING")
+
+    def _process_item(self, plan: WithdrawalPlan, planned: PlannedWithdrawal, stats: WithdrawalStats) -> bool:
+        coin = plan.coin
+        total = len(plan.items)
+        if not planned.executable:
+            self.log_message(f"[{planned.index}/{total}] {planned.skip_reason} ({planned.amount})，跳过此地址。", level="WARNING")
+            self._record_failure(planned, planned.skip_reason)
+            stats.skipped += 1
+            return False
+
+        self.log_message(f"[{planned.index}/{total}] 处理地址: {self._describe(planned)}，计划数量: {planned.amount_str} {coin}", level="DEBUG")
+
+        # 1. 大额提币确认 (在余额检查之前)
+        if planned.is_large and self._confirm_large is not None:
+            try:
+                self.log_message(f"警告：地址 {planned.index} 的提币金额 ${planned.usd_value:.2f} 达到或超过大额阈值", level="WARNING")
+                if not self._confirm_large(plan.coin, plan.network, planned):
+                    self.log_message(f"  -> 用户未确认或取消了大额提币，跳过地址 {self._mask(planned.address)} (第 {planned.index} 个)", level="WARNING")
+                    self._record_failure(planned, FAIL_LARGE_REJECTED, f"${planned.usd_value:.2f}")
+                    stats.skipped += 1
+                    return False
+                self.log_message(f"  -> 用户已确认大额提币，继续执行对地址 {self._mask(planned.address)} 的提币操作。", level="INFO")
+            except Exception as e:
+                self.log_message(f"大额提币确认时出错: {e}", level="WARNING")
+
+        # 2. 余额检查 (本地账本，必要时才与交易所同步)
+        required_amount = planned.amount + plan.fee
+        sync_count = self.ledger.sync_count
+        check_start = time.perf_counter()
+        try:
+            enough, balance_decimal = self.ledger.check(required_amount)
+        except Exception as e:
+            self.log_message(f"检查余额时出错: {e}，跳过此地址 {self._mask(planned.address)} (第 {planned.index} 个)", level="ERROR")
+            self._record_failure(planned, FAIL_BALANCE_UNKNOWN, str(e))
+            stats.skipped += 1
+            return False
+        if self._trace is not None:
+            self._trace.mark("balance_checked", (time.perf_counter() - check_start) * 1000,
+                             balance_synced=self.ledger.sync_count != sync_count,
+                             balance=str(balance_decimal) if balance_decimal is not None else None)
+        if balance_decimal is None:
+            self.log_message(f"无法获取 {coin} 余额，跳过地址 {self._mask(planned.address)} (第 {planned.index} 个)", level="WARNING")
+            self._record_failure(planned, FAIL_BALANCE_UNKNOWN)
+            stats.skipped += 1
+            return False
+        if not enough:
+            self.log_message(f"余额不足 (需要: {required_amount}, 可用: {balance_decimal})，跳过地址 {self._mask(planned.address)} (第 {planned.index} 个)", level="WARNING")
+            self._record_failure(planned, FAIL_INSUFFICIENT_BALANCE, f"需要 {required_amount}，可用 {balance_decimal}")
+            stats.skipped += 1
+            return False
+        self.log_message(f"  -> 余额检查通过 (可用: {balance_decimal}, 需要: {required_amount})", level="DEBUG")
+
+        # 3. 调用提币API (先写日志，确保崩溃后能知道这笔请求可能已发出)
+        client_id = self.client_id_for(planned)
+        if self.journal is not None:
+            try:
+                self.journal.record_planned(planned, account=self.name, client_id=client_id)
+            except Exception as e:
+                self.log_message(f"写入提币日志失败，为安全起见跳过地址 {self._mask(planned.address)}: {e}", level="ERROR")
+                self._record_failure(planned, FAIL_JOURNAL, str(e))
+                stats.skipped += 1
+                return False
+        success, message, uncertain = self._submit_with_retry(plan, planned, client_id, stats)
+        if self._trace is not None:
+            self._trace.mark_response()
+        if self.journal is not None:
+            try:
+                self.journal.record_result(planned, success, message, account=self.name, uncertain=uncertain)
+            except Exception as e:
+                self.log_message(f"写入提币结果日志失败: {e}", level="ERROR")
+
+        # 4. 处理结果
+        if success:
+            self.ledger.record_success(planned.amount, plan.fee)
+            stats.succeeded += 1
+            if self._trace is not None:
+                self._trace.set_result(RESULT_SUCCESS, message=message, withdrawal_id=message)
+            self.log_message(f"地址 {self._mask(planned.address)} (第 {planned.index} 个) 提币成功: {message}", level="SUCCESS")
+        else:
+            self.ledger.record_failure()
+            self._record_failure(planned, FAIL_UNCERTAIN if uncertain else FAIL_API_ERROR, message)
+            stats.failed += 1
+            self.log_message(f"地址 {self._mask(planned.api_address)} (第 {planned.index} 个) 提币失败: {message}", level="ERROR")
+        if self._on_result is not None:
+            self._on_result(planned, success, message)
+        return True
+
+    def _wait_between(self, min_interval: int, max_interval: int) -> bool:
+        """两笔提币之间的随机等待。收到停止信号时返回False。"""
+        wait_time = self.rng.randint(min_interval, max_interval)
+        self.log_message(f"下一次提币前等待 {wait_time} 秒...", level="DEBUG")
+        wait_start = time.time()
+        while time.time() - wait_start < wait_time:
+            if self._should_stop():
+                self.log_message("在等待期间收到停止信号，退出...", level="INFO")
+                return False
+            if self._on_wait is not None:
+                elapsed = time.time() - wait_start
+                self._on_wait(int(elapsed / wait_time * 100), f"等待: {int(wait_time - elapsed)}秒")
+            time.sleep(min(0.5, max(0.0, wait_time - (time.time() - wait_start))))
+        return True
+
+    def execute(self, plan: WithdrawalPlan, min_interval: int, max_interval: int) -> WithdrawalStats:
+        """按计划顺序执行提币。必须先调用 prepare()。"""
+        if self.ledger is None:
+            raise RuntimeError("WithdrawalEngine.execute() 之前必须先调用 prepare()")
+        stats = WithdrawalStats(total=len(plan.items))
+        try:
+            for planned in plan.items:
+                if self._should_stop():
+                    self.log_message("提币线程收到停止信号，正在退出...", level="INFO")
+                    stats.stopped = True
+                    break
+                attempted = self._execute_one(plan, planned, stats)
+                stats.processed += 1
+                if self._on_progress is not None:
+                    self._on_progress(stats.processed, stats.total)
+                if attempted and planned.index < stats.total: # 跳过的条目不需要等待
+                    if not self._wait_between(min_interval, max_interval):
+                        stats.stopped = True
+                        break
+                if self._on_wait is not None:
+                    self._on_wait(0, "等待: 0秒")
+            if stats.stopped:
+                for planned in plan.items[stats.processed:]:
+                    self._record_failure(planned, planned.skip_reason or FAIL_NOT_PROCESSED)
+        finally:
+            stats.balance_queries = self.ledger.sync_count
+            self.log_message(f"本批次共向交易所查询余额 {stats.balance_queries} 次。", level="DEBUG")
+            if stats.retries or stats.retry_exhausted:
+                self.log_message(f"本批次重试 {stats.retries} 次，{stats.retry_exhausted} 笔因重试次数或预算用尽而失败，"
+                                 f"剩余重试预算 {self.retry_budget.remaining}/{self.retry_budget.total}。", level="INFO")
+        return stats
@@ -0,0 +1,185 @@
+"""
+结构化的提币事件流 (JSON Lines)。
+
+每个被处理的计划条目写一行JSON，包含计划、余额检查、提交和响应的时间点，
+每次API调用的耗时和交易所错误码，以及数量、手续费、结果和提币ID。文件按大小轮转，
+离线分析可以直接 pandas.read_json(path, lines=True)。
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+EVENT_LOG_FILE = "withdrawal_events.jsonl"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+EVENT_SCHEMA_VERSION = 1
+
+# 单个条目的处理结果
+RESULT_SUCCESS = "success"
+RESULT_FAILED = "failed"
+RESULT_UNCERTAIN = "uncertain" # 请求可能已被受理
+RESULT_SKIPPED = "skipped" # 未调用提币API
+RESULT_ERROR = "error" # 处理过程中出现意外异常
+
+
+def format_timestamp(epoch: float) -> str:
+    """带时区的ISO 8601时间 (毫秒)。"""
+    return datetime.fromtimestamp(epoch).astimezone().isoformat(timespec='milliseconds')
+
+
+def error_code_of(error: BaseException) -> str | None:
+    """异常对应的交易所错误码: 优先取分类结果中的 code，其次是异常 (或引发它的SDK异常) 的 code / sCode。"""
+    classification = getattr(error, 'classification', None)
+    if getattr(classification, 'code', None) is not None:
+        return str(classification.code)
+    for candidate in (error, error.__cause__):
+        for attr in ('code', 'sCode'):
+            value = getattr(candidate, attr, None)
+            if value not in (None, ''):
+                return str(value)
+    return None
+
+
+class AttemptTrace:
+    """单个计划条目的处理过程。由 WithdrawalEngine 填写，处理结束后 to_event() 得到一行事件。"""
+
+    def __init__(self, plan, planned, batch_id: str, account: str | None, client_id: str | None,
+                 planned_at: float | None, mask=None):
+        mask = mask or (lambda text: text)
+        self.event = {
+            'schema': EVENT_SCHEMA_VERSION,
+            'batch_id': batch_id,
+            'account': account,
+            'exchange': plan.exchange_name,
+            'coin': plan.coin,
+            'network': plan.network,
+            'index': planned.index,
+            'address': mask(planned.address),
+            'amount': planned.amount_str,
+            'fee': str(plan.fee),
+            'usd_value': str(planned.usd_value) if planned.usd_value is not None else None,
+            'large': bool(planned.is_large),
+            'client_id': client_id,
+            'planned_at': format_timestamp(planned_at) if planned_at else None,
+            'started_at': format_timestamp(time.time()),
+        }
+        self.api_calls: list[dict] = []
+        self._submit_started: float | None = None
+        self.result = RESULT_ERROR
+        self.reason: str | None = None
+        self.message: str | None = None
+        self.withdrawal_id: str | None = None
+        self.error_code: str | None = None # 最近一次失败的API调用的交易所错误码
+
+    def mark(self, stage: str, elapsed_ms: float | None = None, **fields):
+        """记录某个阶段结束的时间点 (<stage>_at) 和可选的耗时 (<stage>_ms)。"""
+        self.event[f"{stage}_at"] = format_timestamp(time.time())
+        if elapsed_ms is not None:
+            self.event[f"{stage}_ms"] = round(elapsed_ms, 1)
+        self.event.update(fields)
+
+    @contextmanager
+    def api_call(self, name: str):
+        """记录一次API调用的开始时间、耗时、异常类型和交易所错误码。"""
+        started = time.time()
+        if name == "withdraw" and self._submit_started is None:
+            self._submit_started = started
+            self.event['submitted_at'] = format_timestamp(started)
+        entry = {'call': name, 'started_at': format_timestamp(started)}
+        self.api_calls.append(entry)
+        perf_start = time.perf_counter()
+        try:
+            yield entry
+        except Exception as e:
+            entry['error'] = type(e).__name__
+            self.record_error_code(error_code_of(e), entry)
+            raise
+        finally:
+            entry['latency_ms'] = round((time.perf_counter() - perf_start) * 1000, 1)
+
+    def record_error_code(self, code: str | None, entry: dict | None = None):
+        """记录交易所错误码 (默认记到最近一次API调用上)。API返回失败但没有抛出异常时由调用方使用。"""
+        if code is None:
+            return
+        entry = entry if entry is not None else (self.api_calls[-1] if self.api_calls else None)
+        if entry is not None:
+            entry['error_code'] = code
+        self.error_code = code
+
+    def mark_response(self):
+        """提币请求 (包括重试和对账) 结束。"""
+        now = time.time()
+        self.event['responded_at'] = format_timestamp(now)
+        if self._submit_started is not None:
+            self.event['submit_ms'] = round((now - self._submit_started) * 1000, 1)
+
+    def set_result(self, result: str, reason: str | None = None, message: str | None = None,
+                   withdrawal_id: str | None = None):
+        self.result = result
+        self.reason = reason
+        self.message = message
+        self.withdrawal_id = withdrawal_id
+
+    def to_event(self) -> dict:
+        event = dict(self.event)
+        event['finished_at'] = format_timestamp(time.time())
+        event['attempts'] = sum(1 for call in self.api_calls if call['call'] == "withdraw")
+        event['api_calls'] = self.api_calls
+        event['result'] = self.result
+        event['reason'] = self.reason
+        event['error_code'] = self.error_code
+        event['withdrawal_id'] = self.withdrawal_id
+        event['message'] = self.message
+        return event
+
+
+class WithdrawalEventLog:
+    """按大小轮转的JSONL事件文件 (线程安全，多账户执行器共用一个实例)。"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write(self, event: dict):
+        line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        size = len(line.encode('utf-8'))
+        with self._lock:
+            if self._file is None:
+                self._open()
+            if self.max_bytes > 0 and self._size > 0 and self._size + size > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self._size += size
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,121 @@
+import csv
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from withdrawal_plan import SKIP_AMOUNT_TOO_SMALL, SKIP_EMPTY_ADDRESS
+
+# 失败/跳过原因
+FAIL_EMPTY_ADDRESS = SKIP_EMPTY_ADDRESS
+FAIL_AMOUNT_TOO_SMALL = SKIP_AMOUNT_TOO_SMALL
+FAIL_LARGE_REJECTED = "大额提币未确认"
+FAIL_BALANCE_UNKNOWN = "无法获取余额"
+FAIL_INSUFFICIENT_BALANCE = "余额不足"
+FAIL_JOURNAL = "写入提币日志失败"
+FAIL_API_ERROR = "API错误"
+FAIL_UNCERTAIN = "结果未知" # 请求可能已被受理，不会被自动重新提币
+FAIL_PLAN_ERROR = "生成提币计划失败"
+FAIL_NOT_PROCESSED = "批次停止，未执行"
+
+# 重新提币时排除的原因: 结果未知的地址可能已经到账，空地址重试也没有意义
+NOT_RERUNNABLE_REASONS = (FAIL_UNCERTAIN, FAIL_EMPTY_ADDRESS)
+
+FAILURE_CSV_COLUMNS = ['address', 'label', 'reason', 'detail', 'amount', 'account', 'index']
+
+
+def _safe_file_part(text) -> str:
+    return re.sub(r'[^\w.-]', '_', str(text))
+
+
+@dataclass(frozen=True)
+class FailedWithdrawal:
+    """批次中未成功提币的单个地址。"""
+    address: str
+    label: str | None
+    reason: str # FAIL_* 之一
+    detail: str = "" # 交易所返回的错误信息等
+    amount: str = "" # 计划数量
+    account: str | None = None # 多账户时的账户名
+    index: int | None = None # 计划内的序号
+
+    @property
+    def rerunnable(self) -> bool:
+        return self.reason not in NOT_RERUNNABLE_REASONS
+
+
+class FailureSet:
+    """
+    一个批次中所有被跳过或失败的地址 (线程安全，多账户执行器共用一个实例)。
+
+    可以保存为CSV (包含 address/label 列，能直接作为地址文件重新导入)，
+    也可以用 rerun_targets() 得到用相同币种和网络重新提币的目标列表。
+    """
+
+    def __init__(self, exchange_name: str, coin: str, network: str,
+                 min_amount: Decimal | None = None, max_amount: Decimal | None = None,
+                 source_path: str | None = None):
+        self.exchange_name = exchange_name
+        self.coin = coin
+        self.network = network
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.source_path = source_path # 原地址文件，CSV默认保存在它旁边
+        self._items: list[FailedWithdrawal] = []
+        self._lock = threading.Lock()
+
+    def add(self, address: str, label: str | None, reason: str, detail: str = "", amount: str = "",
+            account: str | None = None, index: int | None = None):
+        item = FailedWithdrawal(address, label, reason, detail or "", amount or "", account, index)
+        with self._lock:
+            self._items.append(item)
+
+    @property
+    def items(self) -> list[FailedWithdrawal]:
+        with self._lock:
+            return list(self._items)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def counts_by_reason(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for item in self.items:
+            counts[item.reason] = counts.get(item.reason, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        counts = "，".join(f"{reason} {count}" for reason, count in self.counts_by_reason().items())
+        return f"{self.exchange_name} {self.coin} ({self.network}) 未成功 {len(self)} 个地址: {counts}"
+
+    def rerun_targets(self) -> list[dict]:
+        """可重新提币的目标地址 [{'address', 'label'}]，按原计划顺序去重。"""
+        seen = set()
+        targets = []
+        for item in sorted(self.items, key=lambda i: (i.index is None, i.index or 0)):
+            if not item.rerunnable or item.address in seen:
+                continue
+            seen.add(item.address)
+            targets.append({'address': item.address, 'label': item.label})
+        return targets
+
+    def default_csv_path(self) -> str:
+        """原地址文件旁边的 <文件名>_failed_<币种>_<网络>_<时间>.csv；没有原文件时使用当前目录。"""
+        directory = os.path.dirname(os.path.abspath(self.source_path)) if self.source_path else os.getcwd()
+        stem = os.path.splitext(os.path.basename(self.source_path))[0] if self.source_path else "addresses"
+        file_name = f"{stem}_failed_{_safe_file_part(self.coin)}_{_safe_file_part(self.network)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        return os.path.join(directory, file_name)
+
+    def save_csv(self, file_path: str | None = None) -> str:
+        """保存为CSV，返回实际路径。"""
+        file_path = file_path or self.default_csv_path()
+        with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(FAILURE_CSV_COLUMNS)
+            for item in self.items:
+                writer.writerow([item.address, item.label or '', item.reason, item.detail, item.amount,
+                                 item.account or '', item.index if item.index is not None else ''])
+        return file_path
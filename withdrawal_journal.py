@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+
+# 记录类型
+RECORD_BATCH_START = "batch_start"
+RECORD_PLANNED = "planned" # 即将调用提币API
+RECORD_DONE = "done"
+RECORD_FAILED = "failed"
+RECORD_BATCH_END = "batch_end"
+
+# 批次结束状态
+STATUS_COMPLETED = "completed"
+STATUS_STOPPED = "stopped"
+STATUS_ABANDONED = "abandoned"
+
+
+class WithdrawalJournal:
+    """
+    追加写入的提币日志 (JSONL)，每个批次一个文件。
+
+    每笔提币调用API前写入 planned 记录，调用后写入 done / failed 记录，
+    每条记录写入后立即 flush + fsync。程序崩溃或被关闭后，通过 replay_journal()
+    可以知道哪些地址已经提币成功，哪些地址处于"已发出请求但结果未知"的状态。
+    """
+
+    def __init__(self, path: str, batch_id: str, logger: logging.Logger):
+        self.path = path
+        self.batch_id = batch_id
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @classmethod
+    def create(cls, directory: str, logger: logging.Logger, exchange_name: str, coin: str, network: str,
+               targets: list, params: dict | None = None) -> "WithdrawalJournal":
+        """创建新批次的日志文件并写入 batch_start 记录 (包含完整的目标地址列表，用于恢复)。"""
+        os.makedirs(directory, exist_ok=True)
+        batch_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        journal = cls(os.path.join(directory, f"batch_{batch_id}.jsonl"), batch_id, logger)
+        journal._append({
+            'type': RECORD_BATCH_START,
+            'batch_id': batch_id,
+            'exchange': exchange_name,
+            'coin': coin,
+            'network': network,
+            'targets': [{'address': t.get('address'), 'label': t.get('label')} for t in targets],
+            'params': params or {},
+        })
+        return journal
+
+    @classmethod
+    def reopen(cls, state: "JournalState", logger: logging.Logger) -> "WithdrawalJournal":
+        """恢复批次时继续向原文件追加。"""
+        return cls(state.path, state.batch_id, logger)
+
+    def _append(self, record: dict):
+        record.setdefault('ts', datetime.now().isoformat(timespec='milliseconds'))
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file.closed:
+                raise ValueError(f"提币日志已关闭: {self.path}")
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_planned(self, planned, account: str | None = None, client_id: str | None = None):
+        self._append({'type': RECORD_PLANNED, 'index': planned.index, 'address': planned.address,
+                      'amount': planned.amount_str, 'account': account, 'client_id': client_id})
+
+    def record_result(self, planned, success: bool, message: str, account: str | None = None, uncertain: bool = False):
+        """
+        记录提币结果。uncertain=True 表示API调用异常 (例如超时)，请求可能已被交易所受理，
+        恢复时该地址不会被自动重试。
+        """
+        record = {'type': RECORD_DONE if success else RECORD_FAILED, 'index': planned.index,
+                  'address': planned.address, 'account': account}
+        if success:
+            record['withdraw_id'] = message
+        else:
+            record['message'] = message
+            record['uncertain'] = uncertain
+        self._append(record)
+
+    def record_reconciled(self, record: dict, success: bool, message: str):
+        """按 client_id 对账后，为结果未知的条目补写确定的结果。record 为回放得到的 planned 记录。"""
+        result = {'type': RECORD_DONE if success else RECORD_FAILED, 'index': record.get('index'),
+                  'address': record.get('address'), 'account': record.get('account'), 'reconciled': True}
+        if success:
+            result['withdraw_id'] = message
+        else:
+            result['message'] = message
+            result['uncertain'] = False
+        self._append(result)
+
+    def finish(self, status: str):
+        try:
+            self._append({'type': RECORD_BATCH_END, 'status': status})
+        finally:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+@dataclass
+class JournalState:
+    """回放日志文件得到的批次状态。"""
+    path: str
+    batch_id: str
+    header: dict
+    completed: dict[str, str] = field(default_factory=dict) # 地址 -> 提币ID
+    failed: dict[str, str] = field(default_factory=dict) # 地址 -> 错误信息 (确定未提币)
+    uncertain: dict[str, dict] = field(default_factory=dict) # 地址 -> planned 记录 (结果未知)
+    status: str | None = None # batch_end 的状态，None 表示批次未结束
+
+    @property
+    def finished(self) -> bool:
+        return self.status is not None
+
+    @property
+    def targets(self) -> list[dict]:
+        return self.header.get('targets', [])
+
+    def remaining_targets(self) -> list[dict]:
+        """尚未处理的目标地址 (不含已成功和结果未知的地址；确定失败的地址会被重新尝试)。"""
+        return [t for t in self.targets if t.get('address') not in self.completed and t.get('address') not in self.uncertain]
+
+    def describe(self) -> str:
+        h = self.header
+        return (f"批次 {self.batch_id}: {h.get('exchange')} {h.get('coin')} ({h.get('network')})，"
+                f"共 {len(self.targets)} 个地址，已完成 {len(self.completed)}，结果未知 {len(self.uncertain)}，"
+                f"待处理 {len(self.remaining_targets())}")
+
+
+def replay_journal(path: str) -> JournalState | None:
+    """
+    回放日志文件。最后一行不完整 (写入时崩溃) 时忽略该行。
+    文件缺少 batch_start 记录时返回None。
+    """
+    state = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            record_type = record.get('type')
+            if record_type == RECORD_BATCH_START:
+                state = JournalState(path=path, batch_id=record.get('batch_id', ''), header=record)
+                continue
+            if state is None:
+                continue
+            address = record.get('address')
+            if record_type == RECORD_PLANNED:
+                state.uncertain[address] = record
+                state.failed.pop(address, None)
+            elif record_type == RECORD_DONE:
+                state.uncertain.pop(address, None)
+                state.completed[address] = record.get('withdraw_id', '')
+            elif record_type == RECORD_FAILED:
+                if record.get('uncertain'):
+                    # 保留 planned 记录中的 client_id 等字段，供之后对账
+                    state.uncertain[address] = {**state.uncertain.get(address, {}), **record}
+                else:
+                    state.uncertain.pop(address, None)
+                    state.failed[address] = record.get('message', '')
+            elif record_type == RECORD_BATCH_END:
+                state.status = record.get('status')
+    return state
+
+
+def find_unfinished_batches(directory: str, logger: logging.Logger | None = None) -> list[JournalState]:
+    """找出目录中所有未结束的批次，按文件名 (即创建时间) 排序。"""
+    if not os.path.isdir(directory):
+        return []
+    unfinished = []
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("batch_") and name.endswith(".jsonl")):
+            continue
+        try:
+            state = replay_journal(os.path.join(directory, name))
+        except OSError as e:
+            if logger: logger.warning(f"读取提币日志 {name} 失败: {e}")
+            continue
+        if state is not None and not state.finished:
+            unfinished.append(state)
+    return unfinished
+
+
+def mark_abandoned(state: JournalState, logger: logging.Logger):
+    """用户选择不恢复时，为批次写入结束记录，之后启动不再提示。"""
+    journal = WithdrawalJournal.reopen(state, logger)
+    journal.finish(STATUS_ABANDONED)
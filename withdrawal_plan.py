@@ -0,0 +1,185 @@
+import csv
+import hashlib
+import random
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_DOWN
+
+# 计划条目的跳过原因
+SKIP_EMPTY_ADDRESS = "地址为空"
+SKIP_AMOUNT_TOO_SMALL = "提币数量过小"
+
+
+@dataclass(frozen=True)
+class PlannedWithdrawal:
+    """单笔计划提币。所有字段在执行前确定，执行阶段不再修改。"""
+    index: int # 计划内的序号 (1-based)
+    address: str
+    label: str | None
+    amount: Decimal # 已按精度向下截断
+    amount_str: str # 传给API的精确字符串
+    usd_value: Decimal | None
+    api_address: str # 实际传给API的地址 (OKX 非EVM地址可能为 addr:label)
+    is_large: bool # 是否达到大额预警阈值
+    skip_reason: str | None = None # 不为None时该条目不会被执行
+
+    @property
+    def executable(self) -> bool:
+        return self.skip_reason is None
+
+
+@dataclass(frozen=True)
+class WithdrawalPlan:
+    """一次批量提币的完整计划。"""
+    exchange_name: str
+    coin: str
+    network: str
+    fee: Decimal
+    precision: int
+    usd_price: Decimal | None
+    balance_snapshot: Decimal | None # 计划生成时的余额快照，无法获取时为None
+    items: tuple[PlannedWithdrawal, ...]
+
+    @property
+    def executable_items(self) -> list[PlannedWithdrawal]:
+        return [item for item in self.items if item.executable]
+
+    @property
+    def total_amount(self) -> Decimal:
+        return sum((item.amount for item in self.executable_items), Decimal('0'))
+
+    @property
+    def total_fee(self) -> Decimal:
+        return self.fee * len(self.executable_items)
+
+    @property
+    def total_required(self) -> Decimal:
+        return self.total_amount + self.total_fee
+
+    @property
+    def large_count(self) -> int:
+        return sum(1 for item in self.executable_items if item.is_large)
+
+    @property
+    def skipped_count(self) -> int:
+        return len(self.items) - len(self.executable_items)
+
+    @property
+    def balance_sufficient(self) -> bool | None:
+        """余额快照是否足够覆盖整批提币；没有快照时返回None。"""
+        if self.balance_snapshot is None:
+            return None
+        return self.balance_snapshot >= self.total_required
+
+    def summary_lines(self) -> list[str]:
+        """生成用于日志/界面展示的计划摘要。"""
+        lines = [
+            f"提币计划: {self.exchange_name} {self.coin} ({self.network})，共 {len(self.items)} 个地址，"
+            f"可执行 {len(self.executable_items)} 笔，跳过 {self.skipped_count} 笔。",
+            f"  -> 合计数量: {self.total_amount} {self.coin}，合计手续费: {self.total_fee} {self.coin}，"
+            f"总需求: {self.total_required} {self.coin} (精度 {self.precision} 位)",
+        ]
+        if self.usd_price is not None:
+            lines.append(f"  -> 估值约 ${self.total_amount * self.usd_price:.2f}，大额提币 {self.large_count} 笔。")
+        if self.balance_snapshot is not None:
+            status = "充足" if self.balance_sufficient else "不足"
+            lines.append(f"  -> 当前余额: {self.balance_snapshot} {self.coin}，余额{status}。")
+        return lines
+
+    def export_csv(self, file_path: str):
+        """把计划导出为CSV，便于执行前核对。"""
+        with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['index', 'address', 'label', 'api_address', 'amount', 'usd_value', 'is_large', 'skip_reason'])
+            for item in self.items:
+                writer.writerow([
+                    item.index, item.address, item.label or '', item.api_address, item.amount_str,
+                    f"{item.usd_value:.2f}" if item.usd_value is not None else '',
+                    item.is_large, item.skip_reason or '',
+                ])
+
+
+CLIENT_ID_PREFIX = "mwh"
+CLIENT_ID_LENGTH = 32 # OKX clientId 最长32位字母数字，币安 withdrawOrderId 同样适用
+
+
+def make_client_id(batch_id: str, address: str, index: int, account: str | None = None) -> str:
+    """
+    为单笔计划提币生成确定性的客户端提币标识。
+
+    同一批次、同一账户、同一序号和地址总是得到相同的ID，超时后可以据此向交易所查询
+    这笔提币是否已被受理，而不必猜测。
+    """
+    digest = hashlib.sha256(f"{batch_id}|{account or ''}|{index}|{address}".encode('utf-8')).hexdigest()
+    return (CLIENT_ID_PREFIX + digest)[:CLIENT_ID_LENGTH]
+
+
+def build_api_address(exchange_name: str, address: str, label: str | None) -> str:
+    """构造传给交易所API的地址参数。
+
+    OKX 的非EVM地址 (SOL、SUI等) 在有label时需要使用 address:label 格式，
+    EVM地址则始终使用原始地址并忽略label。
+    """
+    if exchange_name != 'OKX' or not label:
+        return address
+    is_evm_address = address.startswith('0x') and len(address) == 42
+    if is_evm_address:
+        return address
+    return f"{address}:{label}"
+
+
+def build_withdrawal_plan(exchange_name: str, coin: str, network: str, target_addresses: list,
+                          min_amount: Decimal, max_amount: Decimal, precision: int, fee: Decimal,
+                          usd_price: Decimal | None = None, warning_threshold: float | None = None,
+                          balance_snapshot: Decimal | None = None, rng: random.Random | None = None) -> WithdrawalPlan:
+    """
+    把目标地址列表转换为不可变的提币计划。
+
+    Args:
+        target_addresses (list): [{'address': str, 'label': str | None}, ...]，已按执行顺序排列。
+        warning_threshold (float | None): 大额预警阈值 (USD)。为None时不标记大额。
+        rng (random.Random | None): 随机数来源，默认使用 random 模块。
+
+    Returns:
+        WithdrawalPlan: 计划本身不做任何网络请求。
+    """
+    rng = rng or random
+    quantizer = Decimal('1e-' + str(precision))
+    threshold = Decimal(str(warning_threshold)) if warning_threshold is not None else None
+    items = []
+    for i, address_info in enumerate(target_addresses):
+        addr = (address_info.get('address') or '').strip()
+        label = address_info.get('label')
+        if not addr:
+            items.append(PlannedWithdrawal(i + 1, '', label, Decimal('0'), '0', None, '', False, SKIP_EMPTY_ADDRESS))
+            continue
+
+        amount_raw = Decimal(rng.uniform(float(min_amount), float(max_amount)))
+        # 根据精度进行截断 (向下取整)
+        amount = amount_raw.quantize(quantizer, rounding=ROUND_DOWN)
+        amount_str = f"{amount:.{precision}f}"
+        usd_value = amount * usd_price if usd_price is not None else None
+        is_large = threshold is not None and usd_value is not None and usd_value >= threshold
+        skip_reason = SKIP_AMOUNT_TOO_SMALL if amount <= 0 else None
+
+        items.append(PlannedWithdrawal(
+            index=i + 1,
+            address=addr,
+            label=label,
+            amount=amount,
+            amount_str=amount_str,
+            usd_value=usd_value,
+            api_address=build_api_address(exchange_name, addr, label),
+            is_large=is_large,
+            skip_reason=skip_reason,
+        ))
+
+    return WithdrawalPlan(
+        exchange_name=exchange_name,
+        coin=coin,
+        network=network,
+        fee=fee,
+        precision=precision,
+        usd_price=usd_price,
+        balance_snapshot=balance_snapshot,
+        items=tuple(items),
+    )